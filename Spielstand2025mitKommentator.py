@@ -1,6 +1,7 @@
 import streamlit as st
 import pyrebase
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from vatertag.verlauf import verlauf_fuer
 
 st.set_page_config(page_title="Vatertagsspiele 2025 – Live", layout="wide")
 
@@ -15,23 +16,34 @@ firebase_config = {
 firebase = pyrebase.initialize_app(firebase_config)
 db = firebase.database()
 
-# Daten abrufen
 spiel_id = "vatertag2025"
-spiel = db.child("spiele").child(spiel_id).get().val()
-spieler = db.child("spieler").order_by_child("spiel_id").equal_to(spiel_id).get().val()
-runden = db.child("runden").order_by_child("spiel_id").equal_to(spiel_id).get().val()
-multiplikatoren = db.child("multiplikatoren").child(spiel_id).get().val()
 
-# Sicherstellen, dass Session-State gesetzt ist
+# Abfragen für dieses Spiel; spieler und runden brauchen ".indexOn": "spiel_id" in den Datenbankregeln
+ABFRAGEN = {
+    "spieler": lambda d: d.child("spieler").order_by_child("spiel_id").equal_to(spiel_id),
+    "runden": lambda d: d.child("runden").order_by_child("spiel_id").equal_to(spiel_id),
+    "multiplikatoren": lambda d: d.child("multiplikatoren").child(spiel_id),
+}
+
+def daten_abrufen():
+    # Alle Abfragen gleichzeitig: gewartet wird so lange wie auf die langsamste, nicht auf alle nacheinander.
+    # Jede mit eigenem Database-Objekt, pyrebase merkt sich den Pfad aus child() im Objekt.
+    with ThreadPoolExecutor(max_workers=len(ABFRAGEN)) as pool:
+        laufend = {
+            key: pool.submit(lambda abfrage=abfrage: abfrage(firebase.database()).get().val())
+            for key, abfrage in ABFRAGEN.items()
+        }
+        return {key: f.result() for key, f in laufend.items()}
+
+# Daten einmal pro Sitzung abrufen
 if "spieler" not in st.session_state:
-    st.session_state.spieler = list(spieler.values()) if spieler else []
-if "runden" not in st.session_state:
-    st.session_state.runden = list(runden.values()) if runden else []
-if "multiplikatoren" not in st.session_state:
-    st.session_state.multiplikatoren = multiplikatoren if multiplikatoren else {}
-
-# Live Punkteverlauf und Gewinnanalyse vorbereiten
-punkteverlauf = []
+    daten = daten_abrufen()
+    st.session_state.spieler = list(daten["spieler"].values()) if daten["spieler"] else []
+    st.session_state.runden = list(daten["runden"].values()) if daten["runden"] else []
+    st.session_state.multiplikatoren = daten["multiplikatoren"] if daten["multiplikatoren"] else {}
+
+# Live Punkteverlauf (je Spieler ein Stand pro Runde) und Gewinnanalyse vorbereiten
+punkteverlauf = {sp["name"]: [] for sp in st.session_state.spieler}
 gewinnerliste = []
 kommentare = []
 bonus_empfaenger_pro_runde = []
@@ -55,11 +67,7 @@ for runden_idx, runde in enumerate(st.session_state.runden):
         gewinn = gewinne[name]
         punkte = einsatz * gewinn * runden_multiplikator
         zwischenpunkte[name] += punkte
-        punkteverlauf.append({
-            "Spieler": name,
-            "Runde": f"{runden_idx + 1}: {runde['name']}",
-            "Punkte": zwischenpunkte[name]
-        })
+        punkteverlauf[name].append(zwischenpunkte[name])
         if punkte > top_punkte:
             top_punkte = punkte
             top_spieler = name
@@ -76,22 +84,19 @@ for runden_idx, runde in enumerate(st.session_state.runden):
         kommentar += f" Bonuspunkt für: {', '.join(bonus_empfaenger)}"
     kommentare.append(kommentar)
 
-# Punktetabelle erzeugen
-df = pd.DataFrame([
-    {"Spieler": name, "Punkte": punkte}
-    for name, punkte in zwischenpunkte.items()
-]).sort_values(by="Punkte", ascending=False)
-
-# HTML-Tabelle mit Bonusanzeige
-table_html = "<table style='width:100%; border-collapse: collapse;'>"
-table_html += "<tr><th style='text-align:left;'>Spieler</th><th style='text-align:right;'>Punkte</th></tr>"
-
-for index, row in df.iterrows():
-    is_bonus = any(row["Spieler"] in bonus for bonus in bonus_empfaenger_pro_runde)
-    bonus_style = "background-color: #fffae6;" if is_bonus else ""
-    table_html += f"<tr style='{bonus_style}'><td>{row['Spieler']}</td><td style='text-align:right;'>{row['Punkte']:.1f}</td></tr>"
+# HTML-Tabelle mit Bonusanzeige; wer je einen Bonus bekam, steht einmal in der Menge
+hatte_bonus = set().union(*bonus_empfaenger_pro_runde)
+zeilen = []
+for name, punkte in sorted(zwischenpunkte.items(), key=lambda eintrag: -eintrag[1]):
+    bonus_style = "background-color: #fffae6;" if name in hatte_bonus else ""
+    zeilen.append(f"<tr style='{bonus_style}'><td>{name}</td><td style='text-align:right;'>{punkte:.1f}</td></tr>")
 
-table_html += "</table>"
+table_html = (
+    "<table style='width:100%; border-collapse: collapse;'>"
+    "<tr><th style='text-align:left;'>Spieler</th><th style='text-align:right;'>Punkte</th></tr>"
+    + "".join(zeilen)
+    + "</table>"
+)
 
 # Streamlit UI
 st.title("🎲 Vatertagsspiele 2025 – Live")
@@ -104,9 +109,13 @@ with col1:
 
 with col2:
     st.subheader("📈 Punkteverlauf")
-    df_chart = pd.DataFrame(punkteverlauf)
+    # Bei vielen Runden nur Min/Max je Rundenabschnitt; fertige Abschnitte bleiben in der Sitzung gemerkt
+    rundennamen = [f"{i + 1}: {runde['name']}" for i, runde in enumerate(st.session_state.runden)]
+    df_chart = verlauf_fuer(st.session_state).daten(list(punkteverlauf), list(punkteverlauf.values()), rundennamen)
     if not df_chart.empty:
-        st.line_chart(df_chart.pivot(index="Runde", columns="Spieler", values="Punkte"))
+        # Runde als Zahl, damit die Achse auch mit ausgelassenen Runden in Spielreihenfolge bleibt
+        df_chart["Runde"] = df_chart["RundenIndex"] + 1
+        st.line_chart(df_chart, x="Runde", y="Punkte", color="Spieler")
 
 st.subheader("📝 Spielkommentare")
 for kommentar in kommentare:
@@ -0,0 +1 @@
+"""Laufzeitmessungen mit synthetischen Spielen (siehe ``benchmarks.spielstand``)."""
@@ -0,0 +1,339 @@
+"""Laufzeiten der Spielstand-Berechnung für wachsende Spiele.
+
+Erzeugt synthetische Spiele (Spieler × Runden × Multiplikatoren) und misst
+die Stufen, die bei jedem Rerun laufen – so, wie sie in den Apps stehen:
+
+``wertung``
+    Punkteberechnung komplett sowie nach Änderung der letzten Runde.
+``tabelle``
+    Die breite Spielstand-Tabelle bei einem Rerun (gemerkte Spalten, letzte
+    Runde geändert); ``tabelle_kalt`` ohne gemerkte Spalten.
+``verlauf``
+    Punkteverlauf (Min/Max-Auswahl über dem Punktebudget) und fertige
+    Vega-Lite-Spezifikation, letzte Runde geändert; ``verlauf_kalt`` ohne
+    gemerkte Rundenabschnitte.
+``statistik``
+    Die vier Kennzahlen in einem Durchlauf (Anzeige: beim Erstellen der
+    Anzeigetafel); ``statistik_laufend`` mit mitgeführten Zwischenergebnissen.
+``tafel_delta``
+    Anzeigetafel beim Viewer aus dem gespiegelten Stand plus einer geänderten
+    Runde (Speicher im Arbeitsspeicher).
+``dekodieren``
+    Spieldokument im kompakten Format (siehe ``vatertag.kompakt``) zurück ins
+    bisherige Format, wie es jeder Leser nach dem Laden tut.
+``prognose``
+    Sieg- und Podiumschancen aus 100.000 Simulationen von ``PROGNOSE_RUNDEN``
+    weiteren Runden (ein Prozess).
+
+Die Funktionen werden direkt aus den App-Skripten geladen (nur Imports,
+Konstanten und Funktionsdefinitionen, ohne die Streamlit-Seite auszuführen).
+Aufruf::
+
+    python -m benchmarks.spielstand --spieler 6 12 --runden 10 100 500 --json ergebnis.json
+    python -m benchmarks.spielstand --vergleich ergebnis.json
+
+Mit ``--vergleich`` endet der Lauf mit Exit-Code 1, wenn eine Stufe um mehr
+als ``--toleranz`` langsamer ist als in der gespeicherten Messung.
+"""
+
+import argparse
+import ast
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import warnings
+from datetime import datetime, timezone
+from pathlib import Path
+
+import streamlit as st
+
+from vatertag import anzeigetafel, kompakt, prognose
+from vatertag.cache import prozess_cache
+from vatertag.speicher import ArbeitsspeicherSpeicher
+from vatertag.statistik import statistik_fuer
+from vatertag.wertung import ALLE_LETZTEN, EIN_LETZTER, Wertung
+
+WURZEL = Path(__file__).resolve().parent.parent
+
+PROGNOSE_RUNDEN = 10  # offene Runden in der Stufe "prognose"
+
+
+def standard_multiplikatoren(spieler):
+    # Obere Hälfte gewinnt, untere verliert, z. B. 3, 2, 1, 0, -1, -2
+    return [float(spieler // 2 - i) for i in range(spieler)]
+
+
+def spiel_erzeugen(spieler, runden, multiplikatoren=None, seed=0):
+    """Spiel im gespeicherten Format mit zufälligen Einsätzen (0–3) und Plätzen."""
+    rng = random.Random(seed)
+    namen = [f"Spieler {s + 1}" for s in range(spieler)]
+    runden_liste = []
+    for r in range(runden):
+        plaetze = list(range(1, spieler + 1))
+        rng.shuffle(plaetze)
+        runden_liste.append({
+            "name": f"Runde {r + 1}",
+            "einsaetze": {name: rng.randint(0, 3) for name in namen},
+            "plaetze": dict(zip(namen, plaetze)),
+        })
+    return {
+        "spieler": [{"name": name} for name in namen],
+        "multiplikatoren": multiplikatoren or standard_multiplikatoren(spieler),
+        "runden": runden_liste,
+    }
+
+
+def _konstante(knoten):
+    # Literale sowie Konstanten in Großbuchstaben (z. B. aus ``einstellung(...)``)
+    if not isinstance(knoten, ast.Assign):
+        return False
+    return isinstance(knoten.value, ast.Constant) or all(
+        isinstance(ziel, ast.Name) and ziel.id.isupper() for ziel in knoten.targets
+    )
+
+
+def app_funktionen(skript):
+    """Imports, Konstanten und Funktionen eines App-Skripts, ohne die Seite selbst auszuführen."""
+    pfad = WURZEL / skript
+    baum = ast.parse(pfad.read_text(encoding="utf-8"))
+    knoten = [
+        n for n in baum.body
+        if isinstance(n, (ast.Import, ast.ImportFrom, ast.FunctionDef)) or _konstante(n)
+    ]
+    namensraum = {"__name__": f"benchmark:{skript}"}
+    exec(compile(ast.Module(knoten, type_ignores=[]), str(pfad), "exec"), namensraum)
+    return namensraum
+
+
+def wertung_berechnen(daten, regel):
+    namen = [sp["name"] for sp in daten["spieler"]]
+    wertung = Wertung(namen, daten["multiplikatoren"], regel)
+    wertung.aktualisieren(daten["runden"])
+    return wertung
+
+
+def letzte_runde_geaendert(runden):
+    geaendert = list(runden)
+    letzte = dict(geaendert[-1])
+    letzte["einsaetze"] = {name: (e + 1) % 4 for name, e in letzte["einsaetze"].items()}
+    geaendert[-1] = letzte
+    return geaendert
+
+
+def letzte_runde_aendern(wertung, runden):
+    # Wie eine Eingabe in der Admin-App: letzte Runde ändern, inkrementell nachrechnen
+    wertung.aktualisieren(letzte_runde_geaendert(runden))
+    wertung.aktualisieren(runden)
+
+
+def abwechselnd(erst, dann):
+    # Jeder Aufruf sieht eine geänderte letzte Runde, wie beim Rerun nach einer Eingabe
+    zustand = [False]
+
+    def aufruf():
+        zustand[0] = not zustand[0]
+        return (erst if zustand[0] else dann)()
+    return aufruf
+
+
+def kalt(funktion):
+    def aufruf():
+        prozess_cache().clear()
+        st.session_state.pop("tabelle", None)
+        st.session_state.pop("statistik", None)
+        st.session_state.pop("verlauf", None)
+        return funktion()
+    return aufruf
+
+
+def stufen(daten):
+    """``[(app, stufe, funktion)]`` für ein Spiel; Vorbereitung läuft außerhalb der Messung."""
+    runden = daten["runden"]
+    admin = app_funktionen("streamlit_app.py")
+    anzeige = app_funktionen("streamlit_display_app.py")
+    live = app_funktionen("spielstand2025.py")
+
+    # Admin-App: Wertung nach ALLE_LETZTEN; zum Vergleich dieselbe mit geänderter letzter Runde
+    geaendert = letzte_runde_geaendert(runden)
+    admin_wertung = wertung_berechnen(daten, ALLE_LETZTEN)
+    admin_geaendert = wertung_berechnen({**daten, "runden": geaendert}, ALLE_LETZTEN)
+    tafel = anzeigetafel.erstellen(admin_wertung, runden)
+    tafel_geaendert = anzeigetafel.erstellen(admin_geaendert, geaendert)
+
+    # Delta-Tafel: beide Stände einmal schreiben, der Spiegel wechselt dann zwischen den Köpfen
+    tafel_db = ArbeitsspeicherSpeicher()
+    koepfe = []
+    for t in (tafel, tafel_geaendert):
+        tafel_db.transaktion(lambda tx: anzeigetafel.schreiben(tx, "benchmark", t))
+        koepfe.append(tafel_db.get(anzeigetafel.tafel_pfad("benchmark")).daten)
+    spiegel = anzeigetafel.Spiegel(tafel_db, "benchmark")
+    kodiert = kompakt.kodieren({key: daten[key] for key in ("spieler", "multiplikatoren", "runden")})
+
+    # spielstand2025.py: eigene Regel, Rundendaten als Grundlage für Statistik
+    live_wertung = wertung_berechnen(daten, EIN_LETZTER)
+    live_geaendert = wertung_berechnen({**daten, "runden": geaendert}, EIN_LETZTER)
+
+    # Wie in der Sitzung: eine Wertung, deren letzte Runde bearbeitet wird
+    laufende_wertung = wertung_berechnen(daten, ALLE_LETZTEN)
+
+    def statistik_laufend(runden_):
+        laufende_wertung.aktualisieren(runden_, ab=len(runden_) - 1)
+        return anzeigetafel.statistik(laufende_wertung, runden_, statistik_fuer(st.session_state, laufende_wertung))
+
+    admin_tabelle = lambda: admin["spielstand_tabelle"](admin_wertung, runden)
+    anzeige_tabelle = lambda: anzeige["tabelle_bauen"](tafel)
+    live_tabelle = lambda: live["tabelle_bauen"](live_wertung, runden)
+    anzeige_verlauf = lambda: anzeige["verlauf_chart"](tafel)
+    live_verlauf = lambda: live["verlauf_chart"](live_wertung, runden)
+
+    return [
+        ("streamlit_app", "wertung", lambda: wertung_berechnen(daten, ALLE_LETZTEN)),
+        ("streamlit_app", "wertung_letzte_runde", lambda: letzte_runde_aendern(admin_wertung, runden)),
+        ("streamlit_app", "tabelle", abwechselnd(
+            admin_tabelle, lambda: admin["spielstand_tabelle"](admin_geaendert, geaendert))),
+        ("streamlit_app", "tabelle_kalt", kalt(admin_tabelle)),
+        ("streamlit_app", "anzeigetafel", lambda: anzeigetafel.erstellen(admin_wertung, runden)),
+        ("streamlit_display_app", "tabelle", abwechselnd(
+            anzeige_tabelle, lambda: anzeige["tabelle_bauen"](tafel_geaendert))),
+        ("streamlit_display_app", "tabelle_kalt", kalt(anzeige_tabelle)),
+        ("streamlit_display_app", "verlauf", abwechselnd(
+            anzeige_verlauf, lambda: anzeige["verlauf_chart"](tafel_geaendert))),
+        ("streamlit_display_app", "verlauf_kalt", kalt(anzeige_verlauf)),
+        ("streamlit_display_app", "statistik", lambda: anzeigetafel.statistik(admin_wertung, runden)),
+        ("streamlit_display_app", "tafel_delta", abwechselnd(
+            lambda: spiegel.anwenden(koepfe[0]), lambda: spiegel.anwenden(koepfe[1]))),
+        ("streamlit_display_app", "prognose", lambda: prognose.prognose(tafel, len(runden) + PROGNOSE_RUNDEN)),
+        ("streamlit_app", "statistik_laufend", abwechselnd(
+            lambda: statistik_laufend(runden), lambda: statistik_laufend(geaendert))),
+        ("spielstand2025", "dekodieren", lambda: kompakt.dekodieren(kodiert)),
+        ("spielstand2025", "wertung", lambda: wertung_berechnen(daten, EIN_LETZTER)),
+        ("spielstand2025", "rundendaten", lambda: live["rundendaten_berechnen"](live_wertung, runden)),
+        ("spielstand2025", "tabelle", abwechselnd(
+            live_tabelle, lambda: live["tabelle_bauen"](live_geaendert, geaendert))),
+        ("spielstand2025", "tabelle_kalt", kalt(live_tabelle)),
+        ("spielstand2025", "verlauf", abwechselnd(
+            live_verlauf, lambda: live["verlauf_chart"](live_geaendert, geaendert))),
+        ("spielstand2025", "verlauf_kalt", kalt(live_verlauf)),
+        ("spielstand2025", "statistik", kalt(lambda: live["statistik_berechnen"](live_wertung, runden))),
+    ]
+
+
+def messen(funktion, wiederholungen, mindestzeit=0.2):
+    """Laufzeiten in Millisekunden; mindestens ``wiederholungen`` Läufe bzw. ``mindestzeit`` Sekunden."""
+    funktion()  # Aufwärmen (Imports, Caches)
+    zeiten = []
+    start = time.perf_counter()
+    while len(zeiten) < wiederholungen or (time.perf_counter() - start < mindestzeit and len(zeiten) < 1000):
+        t0 = time.perf_counter()
+        funktion()
+        zeiten.append((time.perf_counter() - t0) * 1000)
+    return zeiten
+
+
+def lauf(spieler_liste, runden_liste, multiplikatoren=None, wiederholungen=5, seed=0, filter_stufe=None):
+    ergebnisse = []
+    for spieler in spieler_liste:
+        for runden in runden_liste:
+            daten = spiel_erzeugen(spieler, runden, multiplikatoren, seed)
+            for app, stufe, funktion in stufen(daten):
+                if filter_stufe and stufe not in filter_stufe:
+                    continue
+                zeiten = messen(funktion, wiederholungen)
+                ergebnis = {
+                    "app": app,
+                    "stufe": stufe,
+                    "spieler": spieler,
+                    "runden": runden,
+                    "laeufe": len(zeiten),
+                    "min_ms": round(min(zeiten), 4),
+                    "median_ms": round(statistics.median(zeiten), 4),
+                    "max_ms": round(max(zeiten), 4),
+                }
+                ergebnisse.append(ergebnis)
+                print(
+                    f"{app:<22} {stufe:<22} {spieler:>4} Sp. {runden:>5} Rd. "
+                    f"{ergebnis['median_ms']:>10.3f} ms (min {ergebnis['min_ms']:.3f})",
+                    file=sys.stderr,
+                )
+    return ergebnisse
+
+
+def umgebung():
+    import altair
+    import numpy
+    import pandas
+
+    return {
+        "zeit": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plattform": platform.platform(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+        "altair": altair.__version__,
+    }
+
+
+def schluessel(ergebnis):
+    return ergebnis["app"], ergebnis["stufe"], ergebnis["spieler"], ergebnis["runden"]
+
+
+def vergleichen(ergebnisse, basis, toleranz):
+    """Stufen, deren Median mehr als ``toleranz`` × Basis beträgt."""
+    alt = {schluessel(e): e for e in basis["ergebnisse"]}
+    langsamer = []
+    for ergebnis in ergebnisse:
+        vorher = alt.get(schluessel(ergebnis))
+        if vorher and vorher["median_ms"] > 0:
+            faktor = ergebnis["median_ms"] / vorher["median_ms"]
+            ergebnis["faktor"] = round(faktor, 3)
+            if faktor > toleranz:
+                langsamer.append(ergebnis)
+    return langsamer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Laufzeiten der Spielstand-Berechnung messen")
+    parser.add_argument("--spieler", type=int, nargs="+", default=[6, 12])
+    parser.add_argument("--runden", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--multiplikatoren", help="pro Platz, z. B. 3,2,1,-1 (Standard: passend zur Spielerzahl)")
+    parser.add_argument("--stufe", nargs="+", help="nur diese Stufen messen, z. B. tabelle verlauf")
+    parser.add_argument("--wiederholungen", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Ergebnis als JSON in diese Datei schreiben (- für stdout)")
+    parser.add_argument("--vergleich", help="frühere JSON-Messung, gegen die geprüft wird")
+    parser.add_argument("--toleranz", type=float, default=1.5, help="erlaubter Faktor gegenüber --vergleich")
+    args = parser.parse_args(argv)
+
+    multiplikatoren = (
+        [float(x) for x in args.multiplikatoren.split(",") if x.strip()] if args.multiplikatoren else None
+    )
+    # Streamlit warnt außerhalb von "streamlit run" bei jedem Cache-Aufruf
+    warnings.filterwarnings("ignore")
+    ergebnisse = lauf(args.spieler, args.runden, multiplikatoren, args.wiederholungen, args.seed, args.stufe)
+
+    langsamer = []
+    if args.vergleich:
+        with open(args.vergleich, encoding="utf-8") as f:
+            langsamer = vergleichen(ergebnisse, json.load(f), args.toleranz)
+        for e in langsamer:
+            print(
+                f"LANGSAMER: {e['app']} {e['stufe']} ({e['spieler']} Sp., {e['runden']} Rd.) "
+                f"{e['faktor']:.2f}×",
+                file=sys.stderr,
+            )
+
+    bericht = {"umgebung": umgebung(), "ergebnisse": ergebnisse}
+    if args.json == "-":
+        json.dump(bericht, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    elif args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(bericht, f, indent=2, ensure_ascii=False)
+    return 1 if langsamer else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
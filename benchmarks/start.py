@@ -0,0 +1,136 @@
+"""Kaltstart der Apps: Zeit bis zur ersten fertigen Seite in einem frischen Prozess.
+
+Jede Messung startet einen neuen Python-Prozess (wie nach einem Deploy oder
+wenn der Hoster die App schlafen gelegt hat) und misst:
+
+``streamlit``
+    ``import streamlit`` – für alle Apps gleich, zum Vergleich.
+``erster_lauf``
+    Erster Lauf des App-Skripts (Imports, Speicher verbinden, Seite aufbauen)
+    über ``streamlit.testing``.
+
+Dazu wird ausgegeben, welche schweren Module nach dem ersten Lauf geladen
+sind. Die Apps lesen ein vorbereitetes Spiel aus einer SQLite-Datei; der
+Verbindungsaufbau zu Firestore ist also nicht enthalten. Aufruf::
+
+    python -m benchmarks.start --wiederholungen 5 --json start.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import warnings
+from pathlib import Path
+
+from benchmarks.spielstand import spiel_erzeugen, umgebung
+
+WURZEL = Path(__file__).resolve().parent.parent
+
+SPIELNAME = "Vatertagsspiele 2025"
+APPS = ("streamlit_app.py", "streamlit_display_app.py", "spielstand2025.py", "streamlit_turnier_app.py")
+SCHWER = ("numpy", "pandas", "pyarrow", "altair", "firebase_admin")
+
+# Läuft im frischen Prozess; gibt eine JSON-Zeile aus
+_MESSUNG = """
+import json, sys, time
+t0 = time.perf_counter()
+import streamlit
+t1 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=60)
+at.query_params["spiel"] = sys.argv[2]
+t2 = time.perf_counter()
+at.run()
+t3 = time.perf_counter()
+print(json.dumps({
+    "streamlit": (t1 - t0) * 1000,
+    "erster_lauf": (t3 - t2) * 1000,
+    "fehler": [str(e.value) for e in at.exception],
+    "module": [m for m in sys.argv[3:] if m in sys.modules],
+}))
+"""
+
+
+def spiel_vorbereiten(datei, spieler, runden):
+    """Spiel samt Anzeigetafel in eine SQLite-Datei schreiben."""
+    from vatertag import anzeigetafel
+    from vatertag.layout import aenderungen_schreiben, spiel_anlegen
+    from vatertag.speicher import SqliteSpeicher
+    from vatertag.wertung import Wertung
+
+    daten = spiel_erzeugen(spieler, runden)
+    wertung = Wertung([sp["name"] for sp in daten["spieler"]], daten["multiplikatoren"])
+    wertung.aktualisieren(daten["runden"])
+    db = SqliteSpeicher(datei)
+    spiel_anlegen(db, SPIELNAME, daten)
+    aenderungen_schreiben(db, SPIELNAME, {"anzeigetafel": anzeigetafel.erstellen(wertung, daten["runden"])})
+
+
+def messen(app, verzeichnis, umgebung_):
+    ergebnis = subprocess.run(
+        [sys.executable, "-c", _MESSUNG, str(WURZEL / app), SPIELNAME, *SCHWER],
+        cwd=verzeichnis, env=umgebung_, capture_output=True, text=True, check=True,
+    )
+    return json.loads(ergebnis.stdout.strip().splitlines()[-1])
+
+
+def lauf(apps, wiederholungen, spieler, runden):
+    ergebnisse = []
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        datei = os.path.join(verzeichnis, "start.db")
+        spiel_vorbereiten(datei, spieler, runden)
+        umgebung_ = {
+            **os.environ,
+            "PYTHONPATH": os.pathsep.join(filter(None, [str(WURZEL), os.environ.get("PYTHONPATH")])),
+            "VATERTAG_SPEICHER": f"sqlite:{datei}",
+            "VATERTAG_JOURNAL": "aus",
+        }
+        for app in apps:
+            messungen = [messen(app, verzeichnis, umgebung_) for _ in range(wiederholungen)]
+            for stufe in ("streamlit", "erster_lauf"):
+                zeiten = [m[stufe] for m in messungen]
+                ergebnis = {
+                    "app": app.removesuffix(".py"),
+                    "stufe": stufe,
+                    "laeufe": len(zeiten),
+                    "min_ms": round(min(zeiten), 1),
+                    "median_ms": round(statistics.median(zeiten), 1),
+                    "module": messungen[-1]["module"],
+                    "fehler": messungen[-1]["fehler"],
+                }
+                ergebnisse.append(ergebnis)
+                print(
+                    f"{ergebnis['app']:<22} {stufe:<12} {ergebnis['median_ms']:9.1f} ms (min {ergebnis['min_ms']:.1f})"
+                    + (f"  geladen: {', '.join(ergebnis['module'])}" if stufe == "erster_lauf" else "")
+                    + (f"  FEHLER: {ergebnis['fehler']}" if ergebnis["fehler"] else ""),
+                    file=sys.stderr,
+                )
+    return ergebnisse
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kaltstart der Apps messen")
+    parser.add_argument("--app", nargs="+", default=list(APPS), help="nur diese App-Skripte")
+    parser.add_argument("--wiederholungen", type=int, default=3)
+    parser.add_argument("--spieler", type=int, default=12)
+    parser.add_argument("--runden", type=int, default=50)
+    parser.add_argument("--json", help="Ergebnis als JSON in diese Datei schreiben (- für stdout)")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore")
+    bericht = {"umgebung": umgebung(), "ergebnisse": lauf(args.app, args.wiederholungen, args.spieler, args.runden)}
+    if args.json == "-":
+        json.dump(bericht, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    elif args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(bericht, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
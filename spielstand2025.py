@@ -1,268 +1,174 @@
 import streamlit as st
-import firebase_admin
-from firebase_admin import credentials, firestore
-import json
-import pandas as pd
-import altair as alt
-import random
-import streamlit_autorefresh
 from datetime import datetime
 from zoneinfo import ZoneInfo
+from vatertag import messung
+from vatertag.cache import ansichten, prozess_cache
+from vatertag.kommentator import kommentare_ergaenzen
+from vatertag.layout import DOKUMENT
+from vatertag.live import bei_aenderung_neu_laden, live_spiel
+from vatertag.speicher import einstellung, standard_speicher
+from vatertag.statistik import LIVE, statistik_fuer
+from vatertag.tabelle import tabelle_fuer
+from vatertag.verlauf import PUNKTE_BUDGET, spezifikation, verlauf_fuer
+from vatertag.wertung import EIN_LETZTER
 
 st.set_page_config(page_title="📺 Live Spielstand", layout="wide")
-
-# Auto-Refresh alle 5 Minuten (300.000 Millisekunden)
-streamlit_autorefresh.st_autorefresh(interval=300_000, key="refresh")
+lauf = messung.start("live")
 
 # 🔒 Fester Spielname – HIER ANPASSEN!
 FESTER_SPIELNAME = "Vatertagsspiele 2025"
 
-# Firebase verbinden
-def get_firestore_client():
-    if not firebase_admin._apps:
-        cred_dict = json.loads(st.secrets["firebase_service_account"])
-        cred = credentials.Certificate(cred_dict)
-        firebase_admin.initialize_app(cred)
-    return firestore.client()
+# Höchstens so viele Punkte im Verlaufsdiagramm (alle Spieler zusammen)
+VERLAUF_PUNKTE = int(einstellung("verlauf_punkte", PUNKTE_BUDGET))
 
-db = get_firestore_client()
+# Speicher verbinden (einmalig pro Prozess)
+db = standard_speicher()
 
 st.title("🎲 Vatertagsspiele 2025 - Spielstand (live)")
 
-# Spiel laden
-spiel_doc = db.collection("spiele").document(FESTER_SPIELNAME).get()
-if not spiel_doc.exists:
-    st.error(f"Spiel '{FESTER_SPIELNAME}' nicht gefunden.")
-    st.stop()
-
-daten = spiel_doc.to_dict()
-spieler = daten["spieler"]
-multiplikatoren = daten["multiplikatoren"]
-runden = daten["runden"]
-rundendaten = []
-kommentare = daten.get("kommentare", [])
-
-# Punkte berechnen
-for sp in spieler:
-    sp["einsaetze"], sp["plaetze"], sp["gewinne"] = [], [], []
-    sp["punkte"] = 20.0
-
-punkteverlauf = []
-zwischenpunkte = {sp["name"]: 20.0 for sp in spieler}
-
-bonus_empfaenger_pro_runde = []
-
-for i, runde in enumerate(runden):
-    rundenname = runde["name"]
-    rundenzeit = datetime.now(ZoneInfo("Europe/Berlin")).strftime("%H:%M:%S")
-
-    letzter_spieler = min(zwischenpunkte, key=zwischenpunkte.get)
-    bonus_empfaenger_pro_runde.append(letzter_spieler)
-
-    gewinne_der_runde = []
-
-    for sp in spieler:
-        einsatz = runde["einsaetze"].get(sp["name"], 0)
-        platz = runde["plaetze"].get(sp["name"], 1)
-        multiplikator = multiplikatoren[platz - 1] if platz - 1 < len(multiplikatoren) else 0
-        gewinn = einsatz * multiplikator
-
-        # Rubber-Banding: Kein Punktverlust für den Letztplatzierten der VORHERIGEN Runde
-        if sp["name"] == letzter_spieler and gewinn < 0:
-            gewinn = 0
-
-        sp["einsaetze"].append(einsatz)
-        sp["plaetze"].append(platz)
-        sp["gewinne"].append(gewinn)
-        sp["punkte"] += gewinn
-        zwischenpunkte[sp["name"]] += gewinn
-        gewinne_der_runde.append((sp["name"], gewinn))
-        punkteverlauf.append({
-            "Runde": f"{i+1}: {runde['name']}",
-            "Spieler": sp["name"],
-            "Punkte": zwischenpunkte[sp["name"]]
+def rundendaten_berechnen(wertung, runden):
+    # Rundendaten (für Kommentare und Statistik) aus der Wertung
+    namen = wertung.namen
+    bonus_empfaenger_pro_runde = [bonus[0] for bonus in wertung.bonus_empfaenger]
+    rundendaten = []
+    for i, runde in enumerate(runden):
+        stand = wertung.zwischenstand(i)
+        rundendaten.append({
+            "runde": runde["name"],
+            "zeit": datetime.now(ZoneInfo("Europe/Berlin")).strftime("%H:%M:%S"),
+            "fuehrender": max(stand, key=stand.get),
+            "letzter": min(stand, key=stand.get),
+            "rundensieger": max(zip(namen, wertung.gewinne[i]), key=lambda x: x[1]),
+            "bonus": bonus_empfaenger_pro_runde[i],
+            "stand": stand,
         })
-
-    rundendaten.append({
-    "runde": runde["name"],
-    "zeit": datetime.now(ZoneInfo("Europe/Berlin")).strftime("%H:%M:%S"),
-    "fuehrender": max(zwischenpunkte, key=zwischenpunkte.get),
-    "letzter": min(zwischenpunkte, key=zwischenpunkte.get),
-    "rundensieger": max(
-        [(sp["name"], sp["gewinne"][i]) for sp in spieler],
-        key=lambda x: x[1]
-    ),
-    "bonus": bonus_empfaenger_pro_runde[i],
-})
-
-
-kommentare_fuehrend = [
-    "🥇 **{name}** führt jetzt mit {punkte:.1f} Punkten. Niemand stoppt diesen Siegeszug!",
-    "🚀 **{name}** stürmt an die Spitze! {punkte:.1f} Punkte und kein Ende in Sicht!",
-    "👑 **{name}** thront über allen mit {punkte:.1f} Punkten. Ein König unter Spielern!",
-]
-
-kommentare_letzter = [
-    "🐢 **{name}** hinkt mit {punkte:.1f} Punkten hinterher. Vielleicht war das ein geheimer Plan?",
-    "🪨 **{name}** hält das Feld stabil von hinten – {punkte:.1f} Punkte und viel Luft nach oben.",
-    "🌌 **{name}** ist auf Entdeckungsreise im unteren Punktesektor ({punkte:.1f}).",
-]
-
-kommentare_rundensieger = [
-    "💥 **{name}** schnappt sich diese Runde mit +{gewinn:.1f} Punkten. Boom!",
-    "🔥 **{name}** dominiert die Runde! +{gewinn:.1f} Punkte sind kein Zufall.",
-    "🎯 **{name}** trifft ins Schwarze – +{gewinn:.1f} Punkte in einer Runde!",
-]
-
-kommentare_bonus = [
-    "🧲 **{name}** bekommt den Bonus – Letzter sein zahlt sich wohl doch aus!",
-    "🔁 **{name}** nutzt Rubber-Banding – vielleicht klappt's ja nächstes Mal richtig!",
-    "🎁 Bonuszeit für **{name}**! Manchmal ist Verlieren einfach lohnenswert.",
-]
-
-kommentare_bonus_gewinnt = [
-    "⚡ **{name}** nutzt Rubber-Banding und rasiert die Runde mit +{gewinn:.1f} Punkten!",
-    "👀 **{name}** kommt von hinten – mit Bonus +{gewinn:.1f} Punkte! Da staunt das Feld.",
-    "🧨 **{name}** startet durch! Rubber-Banding at its best: +{gewinn:.1f} Punkte!",
-]
-
-# Kommentare generieren
-aktueller_fuehrender = max(zwischenpunkte, key=zwischenpunkte.get)
-aktueller_letzter = min(zwischenpunkte, key=zwischenpunkte.get)
-rundensieger = max(gewinne_der_runde, key=lambda x: x[1])
-bonus_empfaenger = letzter_spieler
-
-# Kommentare für alle abgeschlossenen Runden (alle außer der letzten)
-for j in range(len(rundendaten) - 1):
-    rd = rundendaten[j]
-
-    kommentarblock = f"### 🕓 Runde {j+1}: *{rd['runde']}* ({rd['zeit']})\n"
-    kommentarblock += "- " + random.choice(kommentare_fuehrend).format(
-        name=rd["fuehrender"], punkte=zwischenpunkte[rd["fuehrender"]]
-    ) + "\n"
-    kommentarblock += "- " + random.choice(kommentare_letzter).format(
-        name=rd["letzter"], punkte=zwischenpunkte[rd["letzter"]]
-    ) + "\n"
-    kommentarblock += "- " + random.choice(kommentare_rundensieger).format(
-        name=rd["rundensieger"][0], gewinn=rd["rundensieger"][1]
-    ) + "\n"
-
-    if rd["bonus"] == rd["rundensieger"][0]:
-        kommentarblock += "- " + random.choice(kommentare_bonus_gewinnt).format(
-            name=rd["bonus"], gewinn=rd["rundensieger"][1]
-        ) + "\n"
+    return rundendaten
+
+def tabelle_bauen(wertung, runden):
+    # Punktetabelle; Spalten fertiger Runden bleiben im Prozess gemerkt
+    tabelle = tabelle_fuer(prozess_cache(), wertung.namen, plus_immer=True, schluessel=("tabelle", FESTER_SPIELNAME))
+    return tabelle.aus_wertung(wertung, [runde["name"] for runde in runden])
+
+# Kodierung des Linecharts (Vega-Lite, ohne Daten) – ohne Altair, das beim Kaltstart lange lädt
+VERLAUF_VORLAGE = {
+    "mark": {"type": "line", "point": True},
+    "encoding": {
+        "x": {"field": "Runde", "type": "nominal"},
+        "y": {"field": "Punkte", "type": "quantitative", "scale": {"zero": False}},
+        "color": {"field": "Spieler", "type": "nominal"},
+        "tooltip": [
+            {"field": "Spieler", "type": "nominal"},
+            {"field": "Runde", "type": "nominal"},
+            {"field": "Punkte", "type": "quantitative"},
+        ],
+    },
+    "height": 400,
+}
+
+def verlauf_chart(wertung, runden):
+    # Nur Runden bis zur vorletzten Runde behalten
+    sichtbar = max(len(runden) - 1, 0)
+    rundennamen = [f"{i+1}: {runde['name']}" for i, runde in enumerate(runden[:sichtbar])]
+
+    # Über dem Punktebudget nur Min/Max je Rundenabschnitt; fertige Abschnitte bleiben im Prozess gemerkt
+    verlauf = verlauf_fuer(prozess_cache(), VERLAUF_PUNKTE, schluessel=("verlauf", FESTER_SPIELNAME))
+    staende = wertung.staende[1:sichtbar + 1]
+    df_chart = verlauf.daten(wertung.namen, list(zip(*staende)) if staende else [], rundennamen)
+    return spezifikation(VERLAUF_VORLAGE, df_chart)
+
+def statistik_berechnen(wertung, runden):
+    # 📊 Spielstatistiken: ein Durchlauf, danach nur neue Runden (Zwischenergebnisse im Prozess)
+    statistik = statistik_fuer(prozess_cache(), wertung, LIVE, schluessel=("statistik", FESTER_SPIELNAME))
+    werte = statistik.ergebnis(runden)
+    return {
+        # 1. Häufigster Rundensieger
+        "rundensieger": werte["rundensieger_gewinn"],
+        # 2. Höchster Punktestand im Spielverlauf
+        "max_punkte": werte["max_punkte_verlauf"],
+        # 3. Häufigster Rubber-Banding-Spieler (Bonus-Empfänger)
+        "bonus": werte["bonus_erster"],
+        # 4. Meiste Punkte in einer einzelnen Runde
+        "beste_runde": werte["beste_runde_sieger"],
+    }
+
+def ansichten_berechnen(wertung, daten):
+    # Wertung, Tabelle, Punkteverlauf und Statistik – einmal pro Spielversion für alle Sitzungen
+    runden = daten["runden"]
+    return {
+        "zwischenpunkte": dict(zip(wertung.namen, wertung.punkte)),
+        "rundendaten": rundendaten_berechnen(wertung, runden),
+        "tabelle": tabelle_bauen(wertung, runden),
+        "chart": verlauf_chart(wertung, runden),
+        **statistik_berechnen(wertung, runden),
+    }
+
+
+# Messung auch nach st.stop(), st.rerun() oder einem Fehler abschließen
+try:
+    # Spiel laden (ein Listener pro Prozess, neu geladen wird nur bei Änderungen)
+    live = live_spiel(db, FESTER_SPIELNAME)
+    version, daten = live.stand()
+    bei_aenderung_neu_laden(live, version)
+    if daten is None:
+        st.error(f"Spiel '{FESTER_SPIELNAME}' nicht gefunden.")
+        st.stop()
+
+    # Punkte berechnen (Rubber-Banding: genau ein Letzter, schon ab Runde 1)
+    ansicht = ansichten(FESTER_SPIELNAME, daten, ansichten_berechnen, regel=EIN_LETZTER)
+    runden = daten["runden"]
+    rundendaten = ansicht["rundendaten"]
+
+    # Kommentare für neu abgeschlossene Runden (jede Runde genau einmal, gesammelt geschrieben)
+    kommentare = kommentare_ergaenzen(db, FESTER_SPIELNAME, daten, rundendaten, daten.get("layout", DOKUMENT))
+    kommentare = [kommentare[j] for j in sorted(kommentare)]
+
+    # Punktetabelle anzeigen
+    st.subheader("📊 Aktueller Punktestand")
+    st.dataframe(ansicht["tabelle"], use_container_width=True, hide_index=True)
+
+    #Spielkommentare anzeigen
+    st.subheader("💬 Spielkommentar")
+    if kommentare:
+        st.markdown(kommentare[-1])
     else:
-        kommentarblock += "- " + random.choice(kommentare_bonus).format(
-            name=rd["bonus"]
-        ) + "\n"
-
-    kommentare.append(kommentarblock)
-
-    # 🔐 Kommentare speichern
-    db.collection("spiele").document(FESTER_SPIELNAME).update({
-        "kommentare": kommentare
-    })
-
-
-# Punktetabelle anzeigen
-st.subheader("📊 Aktueller Punktestand")
-tabelle = []
-for sp in sorted(spieler, key=lambda x: -x["punkte"]):
-    zeile = {"Spieler": sp["name"], "Punkte": round(sp["punkte"], 1)}
-   # for i in range(len(runden)):
-    for i in range(len(runden) - 1, -1, -1):
-        bonus = "★" if sp["name"] == bonus_empfaenger_pro_runde[i] else ""
-        zeile[runden[i]["name"]] = f"E: {sp['einsaetze'][i]} | P: {sp['plaetze'][i]} | +{round(sp['gewinne'][i],1)}{bonus}"
-    tabelle.append(zeile)
-
-df = pd.DataFrame(tabelle)
-st.dataframe(df, use_container_width=True, hide_index=True)
-
-#Spielkommentare anzeigen
-st.subheader("💬 Spielkommentar")
-if kommentare:
-    st.markdown(kommentare[0])
-else:
-    st.info("Noch kein Kommentar verfügbar.")
-
-# Verlaufsgrafik
-st.subheader("📈 Punkteverlauf")
-df_chart = pd.DataFrame(punkteverlauf)
-
-# Nur Runden bis zur vorletzten Runde behalten
-max_runden_index = len(runden) - 2  # da 0-basiert, -2 = vorletzte Runde
-# Runde ist String wie "1: XYZ", wir filtern nach der Rundenzahl vor dem Doppelpunkt
-
-df_chart = df_chart[df_chart["Runde"].apply(
-    lambda r: int(r.split(":")[0]) <= max_runden_index + 1  # +1 da Runde 1-basiert
-)]
-
-chart = alt.Chart(df_chart).mark_line(point=True).encode(
-    x="Runde",
-    y=alt.Y("Punkte", scale=alt.Scale(zero=False)),
-    color="Spieler",
-    tooltip=["Spieler", "Runde", "Punkte"]
-).properties(height=400)
-
-st.altair_chart(chart, use_container_width=True)
-
-# 📊 Spielstatistiken anzeigen
-st.subheader("📌 Spielstatistiken")
-
-# 1. Häufigster Rundensieger
-rundensieger_namen = [runde["rundensieger"][0] for runde in rundendaten]
-rundensieger_counts = pd.Series(rundensieger_namen).value_counts()
-haeufigster_rundensieger = rundensieger_counts.idxmax()
-rundensieger_anzahl = rundensieger_counts.max()
-
-# 2. Höchster Punktestand im Spielverlauf
-df_punkte_max = pd.DataFrame(punkteverlauf)
-max_row = df_punkte_max.loc[df_punkte_max["Punkte"].idxmax()]
-max_punkte = max_row["Punkte"]
-max_punkte_spieler = max_row["Spieler"]
-max_punkte_runde = max_row["Runde"]
-
-# 3. Häufigster Rubber-Banding-Spieler (Bonus-Empfänger)
-bonus_counter = pd.Series(bonus_empfaenger_pro_runde)
-haeufigster_bonus_spieler = bonus_counter.value_counts().idxmax()
-bonus_anzahl = bonus_counter.value_counts().max()
+        st.info("Noch kein Kommentar verfügbar.")
 
-# 4. Meiste Punkte in einer einzelnen Runde
-beste_runde = None
-max_gewinn = -1
-gewinner = None
-rundenname = ""
+    # Verlaufsgrafik
+    st.subheader("📈 Punkteverlauf")
+    st.vega_lite_chart(ansicht["chart"], use_container_width=True)
 
-for runden_index, runde in enumerate(rundendaten):
-    name, gewinn = runde["rundensieger"]
-    if gewinn > max_gewinn:
-        max_gewinn = gewinn
-        gewinner = name
-        rundenname = f"{runden_index + 1}: {runde['runde']}"
+    # 📊 Spielstatistiken anzeigen
+    st.subheader("📌 Spielstatistiken")
+    haeufigster_rundensieger, rundensieger_anzahl = ansicht["rundensieger"]
+    max_punkte_spieler, max_punkte, max_punkte_runde = ansicht["max_punkte"]
+    haeufigster_bonus_spieler, bonus_anzahl = ansicht["bonus"]
+    gewinner, max_gewinn, rundenname = ansicht["beste_runde"]
 
-# Darstellung in vier Spalten
-col1, col2, col3, col4 = st.columns(4)
+    # Darstellung in vier Spalten
+    col1, col2, col3, col4 = st.columns(4)
 
-with col1:
-    st.metric("🏆 Häufigster Rundensieger", f"{haeufigster_rundensieger}", f"{rundensieger_anzahl}×")
+    with col1:
+        st.metric("🏆 Häufigster Rundensieger", f"{haeufigster_rundensieger}", f"{rundensieger_anzahl}×")
 
-with col2:
-    st.metric("💯 Höchster Punktestand ever", f"{max_punkte_spieler}", f"{max_punkte:.1f} Punkte ({max_punkte_runde})")
+    with col2:
+        st.metric("💯 Höchster Punktestand ever", f"{max_punkte_spieler}", f"{max_punkte:.1f} Punkte ({max_punkte_runde})")
 
-with col3:
-    st.metric("🎁 Häufigster Rubber-Banding-Nutzer", f"{haeufigster_bonus_spieler}", f"{bonus_anzahl}×")
+    with col3:
+        st.metric("🎁 Häufigster Rubber-Banding-Nutzer", f"{haeufigster_bonus_spieler}", f"{bonus_anzahl}×")
 
-with col4:
-    st.metric("🔥 Meisten Punkte in einem Spiel", f"{gewinner}", f"+{max_gewinn:.1f} Punkte ({rundenname})")
+    with col4:
+        st.metric("🔥 Meisten Punkte in einem Spiel", f"{gewinner}", f"+{max_gewinn:.1f} Punkte ({rundenname})")
 
-#Spielkommentare anzeigen    
-st.subheader("💬 Spielkommentare")
-# Alle Kommentare außer dem letzten anzeigen
-for kommentar in kommentare[:-1]:  # [: -1] = alles außer letzter Eintrag
-    with st.expander(kommentar.split("\n")[0]):
-        st.markdown("\n".join(kommentar.split("\n")[1:]))
+    #Spielkommentare anzeigen    
+    st.subheader("💬 Spielkommentare")
+    # Alle Kommentare außer dem letzten anzeigen
+    for kommentar in kommentare[:-1]:  # [: -1] = alles außer letzter Eintrag
+        with st.expander(kommentar.split("\n")[0]):
+            st.markdown("\n".join(kommentar.split("\n")[1:]))
 
 
 
-aktuelle_runde_index = len(runden) - 1  # Index der letzten Runde (0-basiert)
-aktuelle_runde_name = f"{len(runden)}: {runden[-1]['name']}"
+    aktuelle_runde_index = len(runden) - 1  # Index der letzten Runde (0-basiert)
+    aktuelle_runde_name = f"{len(runden)}: {runden[-1]['name']}"
+finally:
+    messung.ende(lauf)
@@ -1,235 +1,298 @@
 import streamlit as st
-import firebase_admin
-from firebase_admin import credentials, firestore
-import json
-import pandas as pd
 import uuid
+from vatertag import anzeigetafel, messung, spielindex
+from vatertag.autosave import AutoSpeicher
+from vatertag.journal import ANLEGEN, standard_journal
+from vatertag.layout import DOKUMENT, spiel_anlegen, spiel_laden, spiel_loeschen
+from vatertag.live import live_spiel
+from vatertag.speicher import einstellung, standard_speicher
+from vatertag.statistik import statistik_fuer
+from vatertag.wertung import wertung_fuer
+
+# Firestore, Arbeitsspeicher oder SQLite – siehe vatertag/speicher.py
+db = standard_speicher()
+
+# Lokales Journal: Änderungen werden im Hintergrund übertragen, die Seite wartet nicht auf das Netz
+journal = standard_journal()
+
+# Layout für neue Spiele: "dokument" (alles in einem Dokument), "runden_sammlung" oder "ereignisse"
+SPEICHER_LAYOUT = einstellung("speicher_layout", DOKUMENT)
+
+def spielstand_tabelle(wertung, runden):
+    # Eine Zeile pro Spieler (nach Punkten), eine Spalte pro Runde (neueste zuerst);
+    # Spalten fertiger Runden bleiben in der Sitzung gemerkt. Erst hier importiert:
+    # die Spielauswahl beim Start braucht weder pandas noch NumPy
+    from vatertag.tabelle import tabelle_fuer
+
+    tabelle = tabelle_fuer(st.session_state, wertung.namen, ganzzahlig=True)
+    return tabelle.aus_wertung(wertung, [runde["name"] for runde in runden])
+
+def spiel_beschriftung(name, eintrag):
+    # Auswahl-Text mit Angaben aus dem Spielindex
+    if eintrag is None:
+        return name
+    text = f"{name} – {eintrag.get('spieler', 0)} Spieler, {eintrag.get('runden', 0)} Runden"
+    if eintrag.get("aktualisiert"):
+        text += f", zuletzt {eintrag['aktualisiert'].astimezone():%d.%m.%Y %H:%M}"
+    return text
+
+def autospeicher(bekannt=None):
+    # Ein AutoSpeicher pro Sitzung und Spiel; bekannt = Stand, der schon gespeichert ist
+    if bekannt is not None or "autospeicher" not in st.session_state:
+        st.session_state.autospeicher = AutoSpeicher(
+            db, st.session_state.spielname, bekannt=bekannt,
+            layout=st.session_state.get("layout", DOKUMENT), journal=journal,
+        )
+    return st.session_state.autospeicher
+
+@st.fragment
+def runde_bearbeiten(i):
+    # Eingaben einer Runde; eine Änderung führt nur dieses Fragment neu aus,
+    # Wertung, Spielstand und Speichern folgen erst mit "Runde übernehmen"
+    runde = st.session_state.runden[i]
+    rundenname_key = f"rundenname_{i}"
+    neuer_name = st.text_input("Rundenname", value=runde["name"], key=rundenname_key)
+    runde["name"] = neuer_name
+
+    spalte_einsatz, spalte_platz = st.columns(2)
+    with spalte_einsatz:
+        st.subheader("Einsätze")
+        for sp in st.session_state.spieler:
+            einsatz_key = f"einsatz_{i}_{sp['name']}"
+            if einsatz_key not in st.session_state:
+                st.session_state[einsatz_key] = runde["einsaetze"].get(sp["name"], 0)
+            st.number_input(f"{sp['name']}: Einsatz", min_value=0, max_value=3, step=1, key=einsatz_key)
+            runde["einsaetze"][sp["name"]] = st.session_state[einsatz_key]
+
+    with spalte_platz:
+        st.subheader("Platzierungen")
+        for sp in st.session_state.spieler:
+            platz_key = f"platz_{i}_{sp['name']}"
+            if platz_key not in st.session_state:
+                st.session_state[platz_key] = runde["plaetze"].get(sp["name"], 1)
+            st.number_input(f"{sp['name']}: Platz", min_value=1, step=1, key=platz_key)
+            runde["plaetze"][sp["name"]] = st.session_state[platz_key]
 
-def get_firestore_client():
-    # Prüfen, ob eine Firebase-App bereits initialisiert wurde
-    if not firebase_admin._apps:
-        # Aus st.secrets laden (secrets.toml oder Streamlit Cloud)
-        cred_dict = json.loads(st.secrets["firebase_service_account"])
-        cred = credentials.Certificate(cred_dict)
-        firebase_admin.initialize_app(cred)
-
-    # Firestore-Client zurückgeben
-    return firestore.client()
-
-db = get_firestore_client()
+    if st.button("Runde übernehmen", type="primary", key=f"uebernehmen_{i}"):
+        st.rerun()
+    st.caption("Spielstand und Speichern werden mit „Runde übernehmen“ aktualisiert.")
+
+def rundenuebersicht(ausser):
+    # Nur lesen: eine Zeile pro Runde (neueste zuerst) statt Eingabefeldern für alle Runden
+    import pandas as pd
+
+    zeilen = []
+    for i in range(len(st.session_state.runden) - 1, -1, -1):
+        if i == ausser:
+            continue
+        runde = st.session_state.runden[i]
+        zeilen.append({
+            "Runde": runde["name"],
+            "Einsätze": ", ".join(f"{name} {e}" for name, e in runde["einsaetze"].items()),
+            "Plätze": ", ".join(f"{name} {p}" for name, p in runde["plaetze"].items()),
+        })
+    return pd.DataFrame(zeilen)
+
+def fehlgeschlagene_anzeigen():
+    # Journal-Einträge, die dauerhaft nicht übertragen werden konnten (z. B. Spiel inzwischen gelöscht)
+    eintraege = journal.fehlgeschlagen()
+    st.error(f"{len(eintraege)} Änderung(en) konnten nicht übertragen werden und wurden aussortiert.")
+    with st.expander("Aussortierte Änderungen"):
+        for eintrag in eintraege:
+            d = eintrag.daten
+            st.text(f"{d['spielname']} ({d['art']}, Felder: {', '.join(d['felder'])}): {d['fehler']}")
+        if st.button("Aussortierte Änderungen verwerfen"):
+            journal.verwerfen(eintraege)
+            st.rerun()
 
 # Spiel laden oder neues starten
 st.set_page_config(page_title="Vatertagsspiele", layout="wide")
-st.title("Vatertagsspiele")
-
-if "spiel_started" not in st.session_state:
-    st.session_state.spiel_started = False
-if "spielname" not in st.session_state:
-    st.session_state.spielname = None
-
-# SPIEL LADEN ODER STARTEN
-if not st.session_state.spiel_started:
-    st.subheader("Spielname eingeben oder auswählen")
-
-    # Vorhandene Spiele laden
-    spiele_docs = db.collection("spiele").stream()
-    spielnamen = sorted([doc.id for doc in spiele_docs])
-
-    optionen = ["Neues Spiel erstellen"] + spielnamen
-    auswahl = st.selectbox("Spiel auswählen", optionen)
-
-    if auswahl == "Neues Spiel erstellen":
-        spielname = st.text_input("Neuer Spielname")
-    else:
-        spielname = auswahl
-
-    col1, col2 = st.columns([0.2,0.2])
-    with col1:
-        buttonLaden = st.button("Spiel laden / starten")
-    with col2:
-        buttonLöschen = st.button('Spiel löschen')
-        
-    if buttonLaden and spielname:
-        st.session_state.spielname = spielname
-        if auswahl != "Neues Spiel erstellen":
-            # Vorhandenes Spiel laden
-            spiel_doc = db.collection("spiele").document(spielname).get()
-            if spiel_doc.exists:
-                daten = spiel_doc.to_dict()
-                st.session_state.spieler = daten["spieler"]
-                st.session_state.multiplikatoren = daten["multiplikatoren"]
-                st.session_state.runden = daten["runden"]
-            else:
-                st.error("Spiel nicht gefunden.")
-                st.stop()
+lauf = messung.start("admin")
+# Messung auch nach st.stop(), st.rerun() oder einem Fehler abschließen
+try:
+    st.title("Vatertagsspiele")
+
+    if "spiel_started" not in st.session_state:
+        st.session_state.spiel_started = False
+    if "spielname" not in st.session_state:
+        st.session_state.spielname = None
+
+    if journal is not None and journal.anzahl_fehlgeschlagen:
+        fehlgeschlagene_anzeigen()
+
+    # SPIEL LADEN ODER STARTEN
+    if not st.session_state.spiel_started:
+        st.subheader("Spielname eingeben oder auswählen")
+
+        # Vorhandene Spiele aus dem Spielindex (ein kleines Dokument, ein Listener pro Prozess)
+        index = spielindex.spiele_laden(db, live_spiel(db, spielindex.DOKUMENT_ID, sammlung=spielindex.SAMMLUNG))
+        if journal is not None and journal.anzahl_offen:
+            # Angelegt, aber noch nicht übertragen
+            bekannt = {name for name, _ in index}
+            index = [(name, None) for name in journal.spielnamen() if name not in bekannt] + index
+            # Gelöscht, aber noch nicht übertragen
+            geloescht = journal.geloeschte_spiele()
+            index = [(name, eintrag) for name, eintrag in index if name not in geloescht]
+        suche = st.text_input("Spiel suchen")
+        if st.session_state.get("spiel_suche") != suche:
+            # Neue Suche beginnt wieder auf Seite 1
+            st.session_state.spiel_suche = suche
+            st.session_state.spiel_seite = 1
+        treffer, seiten = spielindex.suchen(index, suche, st.session_state.get("spiel_seite", 1) - 1)
+        # Gemerkte Seite in [1, seiten] halten, sonst lehnt das Eingabefeld den Wert ab
+        st.session_state.spiel_seite = min(max(st.session_state.get("spiel_seite", 1), 1), seiten)
+        if seiten > 1:
+            st.number_input(f"Seite (von {seiten})", min_value=1, max_value=seiten, step=1, key="spiel_seite")
+        spiele = dict(treffer)
+
+        optionen = ["Neues Spiel erstellen"] + list(spiele)
+        auswahl = st.selectbox("Spiel auswählen", optionen, format_func=lambda name: spiel_beschriftung(name, spiele.get(name)))
+
+        if auswahl == "Neues Spiel erstellen":
+            spielname = st.text_input("Neuer Spielname")
         else:
-            st.session_state.spieler = []
-            st.session_state.multiplikatoren = []
+            spielname = auswahl
+
+        col1, col2 = st.columns([0.2,0.2])
+        with col1:
+            buttonLaden = st.button("Spiel laden / starten")
+        with col2:
+            buttonLöschen = st.button('Spiel löschen', disabled=auswahl == "Neues Spiel erstellen")
+
+        if buttonLaden and spielname:
+            st.session_state.spielname = spielname
+            if auswahl != "Neues Spiel erstellen":
+                # Vorhandenes Spiel laden
+                daten = spiel_laden(db, spielname)
+                if journal is not None:
+                    daten = journal.ueberlagern(spielname, daten)
+                if daten is not None:
+                    st.session_state.layout = daten.get("layout", DOKUMENT)
+                    st.session_state.spieler = daten["spieler"]
+                    st.session_state.multiplikatoren = daten["multiplikatoren"]
+                    st.session_state.runden = daten["runden"]
+                    autospeicher(bekannt=daten)
+                else:
+                    st.error("Spiel nicht gefunden.")
+                    st.stop()
+            else:
+                st.session_state.layout = SPEICHER_LAYOUT
+                st.session_state.spieler = []
+                st.session_state.multiplikatoren = []
+                st.session_state.runden = []
+
+            st.session_state.spiel_started = True
+            st.rerun()
+
+        if buttonLöschen and spielname:
+            if journal is not None:
+                # Auch offline: das Journal löscht im Hintergrund und verwirft offene Änderungen des Spiels
+                journal.loeschen(spielname)
+                st.success("Spiel gelöscht")
+                st.rerun()
+            try:
+                spiel_loeschen(db, spielname)
+            except Exception as e:
+                st.error(f"Fehler beim Löschen: {e}")
+            else:
+                st.success("Spiel gelöscht")
+                st.rerun()
+
+    # SPIEL SETUP
+    if st.session_state.spiel_started and not st.session_state.spieler:
+        st.header("Spiel Setup")
+        st.text(f"Aktueller Spielname: {st.session_state.spielname}")
+
+        spieler_input = st.text_area("Spielernamen (einer pro Zeile):")
+        multiplikator_input = st.text_input("Multiplikatoren pro Platz (z. B. 3,2,1):")
+
+        if st.button("Setup speichern"):
+            st.session_state.spieler = [
+                {"name": name.strip(), "punkte": 20, "einsaetze": [], "plaetze": [], "gewinne": []}
+                for name in spieler_input.strip().split("\n") if name.strip()
+            ]
+            st.session_state.multiplikatoren = [float(x.strip()) for x in multiplikator_input.split(",") if x.strip()]
             st.session_state.runden = []
-
-        st.session_state.spiel_started = True
-        st.rerun()
-    
-    if buttonLöschen and spielname:
-        st.session_state.spielname = spielname
-        st.success("Spiel gelöscht")
-        st.rerun()
-            
-# SPIEL SETUP
-if st.session_state.spiel_started and not st.session_state.spieler:
-    st.header("Spiel Setup")
-    st.text(f"Aktueller Spielname: {st.session_state.spielname}")
-
-    spieler_input = st.text_area("Spielernamen (einer pro Zeile):")
-    multiplikator_input = st.text_input("Multiplikatoren pro Platz (z. B. 3,2,1):")
-
-    if st.button("Setup speichern"):
-        st.session_state.spieler = [
-            {"name": name.strip(), "punkte": 20, "einsaetze": [], "plaetze": [], "gewinne": []}
-            for name in spieler_input.strip().split("\n") if name.strip()
-        ]
-        st.session_state.multiplikatoren = [float(x.strip()) for x in multiplikator_input.split(",") if x.strip()]
-        st.session_state.runden = []
-        db.collection("spiele").document(st.session_state.spielname).set({
-            "spieler": st.session_state.spieler,
-            "multiplikatoren": st.session_state.multiplikatoren,
-            "runden": st.session_state.runden
-        })
-        st.success("Spiel gespeichert.")
-        st.rerun()
-
-# RUNDENVERWALTUNG
-if st.session_state.spiel_started and st.session_state.spieler:
-    
-    st.header("Rundenverwaltung")
-    st.text(f"Spielname: {st.session_state.spielname} \nMultiplikatoren: {st.session_state.multiplikatoren}")
-
-    if st.button("Neue Runde starten"):
-        st.session_state.runden.append({
-            "name": f"Runde {len(st.session_state.runden)+1}",
-            "einsaetze": {},
-            "plaetze": {}
-        })
-        db.collection("spiele").document(st.session_state.spielname).update({
-            "runden": st.session_state.runden
-        })
-        st.rerun()
-
-    for i, runde in enumerate(st.session_state.runden):
-        with st.expander(f"{runde['name']}", expanded=(i == len(st.session_state.runden) - 1)):
-            rundenname_key = f"rundenname_{i}"
-            neuer_name = st.text_input("Rundenname", value=runde["name"], key=rundenname_key)
-            st.session_state.runden[i]["name"] = neuer_name
-
-            st.subheader("Einsätze")
-            for sp in st.session_state.spieler:
-                einsatz_key = f"einsatz_{i}_{sp['name']}"
-                if einsatz_key not in st.session_state:
-                    st.session_state[einsatz_key] = runde["einsaetze"].get(sp["name"], 0)
-                st.number_input(f"{sp['name']}: Einsatz", min_value=0, max_value=3, step=1, key=einsatz_key)
-                runde["einsaetze"][sp["name"]] = st.session_state[einsatz_key]
-
-            st.subheader("Platzierungen")
-            for sp in st.session_state.spieler:
-                platz_key = f"platz_{i}_{sp['name']}"
-                if platz_key not in st.session_state:
-                    st.session_state[platz_key] = runde["plaetze"].get(sp["name"], 1)
-                st.number_input(f"{sp['name']}: Platz", min_value=1, step=1, key=platz_key)
-                runde["plaetze"][sp["name"]] = st.session_state[platz_key]
-
-    ## Vor der Berechnung: Punktestand pro Spieler vor jeder Runde speichern
-    zwischenpunkte = {sp["name"]: 20.0 for sp in st.session_state.spieler}
-    bonus_empfaenger_pro_runde = []
-
-    # Leere die Einträge
-    for sp in st.session_state.spieler:
-        sp["einsaetze"], sp["plaetze"], sp["gewinne"] = [], [], []
-
-    # Berechnung pro Runde
-    for runde_idx, runde in enumerate(st.session_state.runden):
-        # Bestimme Bonus-Empfänger (ab Runde 2)
-        if runde_idx == 0:
-            bonus_empfaenger = []
-        else:
-            min_punkte = min(zwischenpunkte.values())
-            bonus_empfaenger = [name for name, punkte in zwischenpunkte.items() if punkte == min_punkte]
-        bonus_empfaenger_pro_runde.append(bonus_empfaenger)
-
-        # Bonus im Rundenobjekt speichern
-        st.session_state.runden[runde_idx]["bonus_empfaenger"] = bonus_empfaenger
-
-        # Berechne Gewinne
-        for sp in st.session_state.spieler:
-            name = sp["name"]
-            einsatz = runde["einsaetze"].get(name, 0)
-            platz = runde["plaetze"].get(name, 1)
-            multiplikator = st.session_state.multiplikatoren[platz - 1] if platz - 1 < len(st.session_state.multiplikatoren) else 0
-
-            gewinn = einsatz * multiplikator
-            if name in bonus_empfaenger and multiplikator < 0:
-                gewinn = 0  # Bonus für alle Letzten
-
-            sp["einsaetze"].append(einsatz)
-            sp["plaetze"].append(platz)
-            sp["gewinne"].append(float(gewinn))
-
-        # Update Zwischenpunkte für nächste Runde
-        for sp in st.session_state.spieler:
-            zwischenpunkte[sp["name"]] += sp["gewinne"][-1]
-
-    # Aktualisiere Gesamtpunkte
-    for sp in st.session_state.spieler:
-        sp["punkte"] = 20.0 + sum(sp["gewinne"])
-
-    # Spielstand
-    st.header("Spielstand")
-    daten = []
-    # Spieler mit Bonus pro Runde ermitteln
-    bonus_empfaenger_pro_runde = []
-    punkte_zwischen_runden = [ {sp["name"]: 20.0} for sp in st.session_state.spieler ]  # Startpunkte
-
-    zwischenpunkte = {sp["name"]: 20.0 for sp in st.session_state.spieler}
-    for runde_idx, runde in enumerate(st.session_state.runden):
-        if runde_idx == 0:
-            # In der ersten Runde kein Bonus
-            bonus_empfaenger_pro_runde.append(None)
-        else:
-            min_punkte = min(zwischenpunkte.values())
-            letzte_spieler = [name for name, punkte in zwischenpunkte.items() if punkte == min_punkte]
-            bonus_empfaenger_pro_runde.append(letzte_spieler)
-
-        # Punktestand für nächste Runde aktualisieren
-        for sp in st.session_state.spieler:
-            zwischenpunkte[sp["name"]] += sp["gewinne"][runde_idx]
-            
-    # Anzeige
-    for sp in sorted(st.session_state.spieler, key=lambda x: -x["punkte"]):
-        zeile = {"Spieler": sp["name"], "Punkte": round(sp["punkte"],1)}
-        for i in range(len(st.session_state.runden) - 1, -1, -1):
-            runde = st.session_state.runden[i]
-            if i < len(sp["einsaetze"]):
-                bonus_symbol = "★" if bonus_empfaenger_pro_runde[i] and sp["name"] in bonus_empfaenger_pro_runde[i] else ""
-                vorzeichen = "+" if sp['gewinne'][i] > 0 else ""
-                zeile[runde["name"]] = (
-                    f"E: {int(sp['einsaetze'][i])} | "
-                    f"P: {sp['plaetze'][i]} | "
-                    f"{vorzeichen}{round(sp['gewinne'][i],1)}{bonus_symbol}"
-                )
-        daten.append(zeile)
-
-    df = pd.DataFrame(daten)
-    st.dataframe(df, use_container_width=True, hide_index=True)
-
-
-    # AUTOMATISCHES SPEICHERN
-    if "spielname" in st.session_state:
-        try:
-            spiel_daten = {
+            setup_daten = {
                 "spieler": st.session_state.spieler,
                 "multiplikatoren": st.session_state.multiplikatoren,
-                "runden": st.session_state.runden,
-                "zeitstempel": firestore.SERVER_TIMESTAMP
+                "runden": st.session_state.runden
             }
-            db.collection("spiele").document(st.session_state.spielname).set(spiel_daten)
-        except Exception as e:
-            st.error(f"Fehler beim Speichern: {e}")            
+            if journal is not None:
+                journal.anhaengen(st.session_state.spielname, ANLEGEN, setup_daten, layout=st.session_state.layout)
+            else:
+                spiel_anlegen(db, st.session_state.spielname, setup_daten, st.session_state.layout)
+            autospeicher(bekannt=setup_daten)
+            st.success("Spiel gespeichert.")
+            st.rerun()
+
+    # RUNDENVERWALTUNG
+    if st.session_state.spiel_started and st.session_state.spieler:
+
+        st.header("Rundenverwaltung")
+        st.text(f"Spielname: {st.session_state.spielname} \nMultiplikatoren: {st.session_state.multiplikatoren}")
+
+        if st.button("Neue Runde starten"):
+            st.session_state.runden.append({
+                "name": f"Runde {len(st.session_state.runden)+1}",
+                "einsaetze": {},
+                "plaetze": {}
+            })
+            st.session_state.aktive_runde = len(st.session_state.runden) - 1
+            # Neue Runde sofort schreiben, nicht erst nach dem Zeitfenster
+            autospeicher().vormerken({"runden": st.session_state.runden})
+            autospeicher().speichern()
+            st.rerun()
+
+        if st.session_state.runden:
+            # Nur eine Runde hat Eingabefelder (standardmäßig die neueste), die übrigen nur als Übersicht
+            if st.session_state.get("aktive_runde") is None or st.session_state.aktive_runde >= len(st.session_state.runden):
+                st.session_state.aktive_runde = len(st.session_state.runden) - 1
+            st.selectbox(
+                "Runde bearbeiten", range(len(st.session_state.runden)),
+                format_func=lambda i: st.session_state.runden[i]["name"], key="aktive_runde",
+            )
+            runde_bearbeiten(st.session_state.aktive_runde)
+
+            if len(st.session_state.runden) > 1:
+                with st.expander(f"Übrige Runden ({len(st.session_state.runden) - 1})"):
+                    st.dataframe(rundenuebersicht(st.session_state.aktive_runde), use_container_width=True, hide_index=True)
+
+        # Berechnung pro Runde (inkrementell, nur geänderte Runden werden neu gerechnet)
+        namen = [sp["name"] for sp in st.session_state.spieler]
+        wertung = wertung_fuer(st.session_state, namen, st.session_state.multiplikatoren)
+        wertung.aktualisieren(st.session_state.runden)
+        bonus_empfaenger_pro_runde = wertung.bonus_empfaenger
+
+        # Bonus im Rundenobjekt speichern, Spielerlisten übernehmen
+        for runde, bonus_empfaenger in zip(st.session_state.runden, bonus_empfaenger_pro_runde):
+            runde["bonus_empfaenger"] = bonus_empfaenger
+        for sp, eintrag in zip(st.session_state.spieler, wertung.spieler_eintraege()):
+            sp.update(eintrag)
+
+        # Spielstand
+        st.header("Spielstand")
+        df = spielstand_tabelle(wertung, st.session_state.runden)
+        st.dataframe(df, use_container_width=True, hide_index=True)
+
+
+        # AUTOMATISCHES SPEICHERN (nur geänderte Felder, gesammelt im Zeitfenster)
+        if "spielname" in st.session_state:
+            autospeicher().vormerken({
+                "spieler": st.session_state.spieler,
+                "multiplikatoren": st.session_state.multiplikatoren,
+                "runden": st.session_state.runden,
+                # Vorberechneter Spielstand für die Viewer
+                "anzeigetafel": anzeigetafel.erstellen(
+                    wertung, st.session_state.runden, statistik_fuer(st.session_state, wertung)
+                )
+            })
+            if autospeicher().letzter_fehler:
+                st.error(f"Fehler beim Speichern: {autospeicher().letzter_fehler}")
+            elif journal is not None and journal.letzter_fehler and journal.anzahl_offen:
+                st.warning(
+                    f"{journal.anzahl_offen} Änderung(en) lokal gesichert, aber noch nicht übertragen "
+                    f"– wird automatisch wiederholt ({journal.letzter_fehler})"
+                )
+finally:
+    messung.ende(lauf)
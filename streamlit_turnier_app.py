@@ -0,0 +1,59 @@
+import streamlit as st
+# Muss als erstes Streamlit-Kommando stehen!
+st.set_page_config(page_title="Turnier ansehen", layout="wide")
+
+from vatertag import messung, spielindex
+from vatertag.live import bei_aenderung_neu_laden, live_spiel
+from vatertag.speicher import einstellung, standard_speicher
+from vatertag.turnier import Turnier, ansicht
+
+lauf = messung.start("turnier")
+
+# Vorauswahl der Tische: ?spiel=A&spiel=B in der URL oder Einstellung "turnier_spiele" (kommagetrennt)
+TURNIER_SPIELE = [name.strip() for name in einstellung("turnier_spiele", "").split(",") if name.strip()]
+
+# Speicher verbinden (einmalig pro Prozess)
+db = standard_speicher()
+
+# Messung auch nach st.stop(), st.rerun() oder einem Fehler abschließen
+try:
+    st.header("🎲 Vatertagsspiele - Turnier LIVE")
+
+    # Tische auswählen (Spielnamen aus dem Spielindex)
+    index = spielindex.spiele_laden(db, live_spiel(db, spielindex.DOKUMENT_ID, sammlung=spielindex.SAMMLUNG))
+    alle_spiele = [name for name, _ in index]
+    vorauswahl = st.query_params.get_all("spiel") or TURNIER_SPIELE
+    spielnamen = st.multiselect(
+        "Tische", alle_spiele, default=[name for name in vorauswahl if name in alle_spiele]
+    )
+    if not spielnamen:
+        st.info("Bitte mindestens einen Tisch auswählen.")
+        st.stop()
+
+    # Ein Listener pro Tisch, alle parallel; neu geladen wird nur, wenn sich ein Tisch ändert
+    turnier = Turnier(db, spielnamen)
+    version, tafeln = turnier.stand()
+    bei_aenderung_neu_laden(turnier, version)
+    daten = ansicht(db, tafeln)
+
+    st.subheader("🏆 Gesamtrangliste")
+    st.dataframe(daten["rangliste"], use_container_width=True, hide_index=True)
+
+    st.subheader("🪑 Tische")
+    st.dataframe(daten["tische"], use_container_width=True, hide_index=True)
+
+    # Kurzübersicht je Tisch
+    spalten = st.columns(min(len(spielnamen), 4))
+    for i, name in enumerate(spielnamen):
+        tafel = daten["tafeln"].get(name)
+        with spalten[i % len(spalten)]:
+            st.markdown(f"**{name}**")
+            if tafel is None:
+                st.caption("Noch kein Spielstand.")
+                continue
+            rangliste = tafel["rangliste"]
+            if rangliste:
+                st.metric("Führend", rangliste[0]["name"], f"{rangliste[0]['punkte']:.1f} Punkte")
+            st.caption(" · ".join(f"{sp['name']} {sp['punkte']:.1f}" for sp in rangliste[1:]))
+finally:
+    messung.ende(lauf)
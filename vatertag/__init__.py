@@ -0,0 +1 @@
+"""Gemeinsame Bausteine der Vatertagsspiele-Apps (Wertung, Speicher, Anzeige)."""
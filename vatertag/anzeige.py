@@ -0,0 +1,88 @@
+"""Spielstand-Anzeige aus einer Anzeigetafel (siehe ``vatertag.anzeigetafel``).
+
+Tabelle, Punkteverlauf und Kennzahlen, wie sie ``streamlit_display_app.py``
+zeigt und ``vatertag.export`` als statische Seite schreibt. ``cache`` ist ein
+Dict, in dem fertige Tabellenspalten und Verlaufsabschnitte gemerkt werden
+(in der App ``prozess_cache()``).
+"""
+
+from vatertag.tabelle import tabelle_fuer
+from vatertag.verlauf import PUNKTE_BUDGET, spezifikation, verlauf_fuer
+
+# Kodierung des Linecharts (Vega-Lite, ohne Daten) – ohne Altair, das beim Kaltstart lange lädt
+VERLAUF_VORLAGE = {
+    "mark": {"type": "line", "point": True},
+    "encoding": {
+        "x": {"field": "Runde", "type": "nominal", "title": "Runde"},
+        "y": {"field": "Punkte", "type": "quantitative", "title": "Punkte"},
+        "color": {"field": "Spieler", "type": "nominal", "legend": {"orient": "bottom"}},
+        "order": {"field": "RundenIndex", "type": "quantitative"},
+        "tooltip": [
+            {"field": "Spieler", "type": "nominal"},
+            {"field": "Runde", "type": "nominal"},
+            {"field": "Punkte", "type": "quantitative"},
+        ],
+    },
+    "height": 400,
+}
+
+
+def tabelle_bauen(tafel, cache, schluessel="tabelle"):
+    # Spalten nach Namen geordnet merken, damit ein Platztausch nicht alles neu baut
+    rangliste = tafel["rangliste"]
+    spieler = sorted(rangliste, key=lambda sp: sp["name"])
+    position = {sp["name"]: s for s, sp in enumerate(spieler)}
+    tabelle = tabelle_fuer(cache, [sp["name"] for sp in spieler], schluessel=schluessel)
+    return tabelle.bauen(
+        [sp["punkte"] for sp in spieler],
+        list(zip(*(sp["einsaetze"] for sp in spieler))),
+        list(zip(*(sp["plaetze"] for sp in spieler))),
+        list(zip(*(sp["gewinne"] for sp in spieler))),
+        [runde["bonus"] for runde in tafel["runden"]],
+        [runde["name"] for runde in tafel["runden"]],
+        reihenfolge=[position[sp["name"]] for sp in rangliste],
+    )
+
+
+def verlauf_daten(tafel, cache, budget=PUNKTE_BUDGET, schluessel="verlauf"):
+    """Punkteverlauf als lange Tabelle (Spieler, Runde, RundenIndex, Punkte).
+
+    Über dem Punktebudget nur Min/Max je Rundenabschnitt, abgeschlossene
+    Abschnitte bleiben in ``cache`` gemerkt (Spieler nach Namen, damit die
+    Reihenfolge stabil bleibt).
+    """
+    spieler = sorted(tafel["rangliste"], key=lambda sp: sp["name"])
+    verlauf = verlauf_fuer(cache, budget, schluessel=schluessel)
+    punkte_df = verlauf.daten(
+        [sp["name"] for sp in spieler], [sp["verlauf"] for sp in spieler], [r["name"] for r in tafel["runden"]]
+    )
+    punkte_df["Punkte"] = punkte_df["Punkte"].round(1)
+    return punkte_df
+
+
+def verlauf_chart(tafel, cache, budget=PUNKTE_BUDGET, schluessel="verlauf"):
+    """Vega-Lite-Spezifikation des Punkteverlaufs."""
+    runden_namen = [r["name"] for r in tafel["runden"]]
+    punkte_df = verlauf_daten(tafel, cache, budget, schluessel)
+
+    # Y-Skala begrenzt; X-Achse nur mit den gezeichneten Runden in Spielreihenfolge
+    achse = [runden_namen[i] for i in sorted(set(punkte_df["RundenIndex"].tolist()))]
+    return spezifikation(
+        VERLAUF_VORLAGE, punkte_df,
+        x={"sort": achse},
+        y={"scale": {"domain": [float(punkte_df["Punkte"].min()), float(punkte_df["Punkte"].max())]}},
+    )
+
+
+def kennzahlen(statistik):
+    """Die vier Kennzahlen der Anzeigetafel als ``(titel, wert, zusatz)``."""
+    sieger, max_punkte, bonus, beste = (
+        statistik[name] for name in ("rundensieger", "max_punkte", "bonus", "beste_runde")
+    )
+    return [
+        ("🏆 Häufigster Rundensieger", f"{sieger['name']}", f"{sieger['anzahl']}×"),
+        ("💯 Höchster Punktestand ever", f"{max_punkte['name']}",
+         f"{max_punkte['punkte']:.1f} Punkte ({max_punkte['runde']})"),
+        ("🎁 Häufigster Rubber-Banding-Nutzer", f"{bonus['name']}", f"{bonus['anzahl']}×"),
+        ("🔥 Meisten Punkte in einem Spiel", f"{beste['name']}", f"+{beste['gewinn']:.1f} Punkte ({beste['runde']})"),
+    ]
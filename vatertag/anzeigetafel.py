@@ -0,0 +1,218 @@
+"""Vorberechnete Anzeigetafel für die Viewer.
+
+Die Admin-App schreibt bei jedem Speichern ein kompaktes Dokument
+``anzeigetafeln/<spielname>`` mit Rangliste, Punkteverlauf, Bonus-Empfängern,
+den vier Kennzahlen sowie Multiplikatoren und Rubber-Banding-Regel (für die
+Prognose, siehe ``vatertag.prognose``). Viewer rendern direkt daraus und müssen weder die
+Runden laden noch selbst rechnen.
+
+Gespeichert wird die Tafel als Delta (``schreiben``): das Dokument selbst
+enthält nur Rangliste, Kennzahlen und je Runde Name, ``version`` und eine
+Prüfsumme; die Werte einer Runde (Bonus, Einsätze, Plätze, Gewinne aller
+Spieler) liegen in ``anzeigetafeln/<spielname>/runden/<nr>``. Jede Speicherung
+erhöht die ``version`` der Tafel, neu geschrieben werden nur Runden, deren
+Prüfsumme sich geändert hat. Eine neu angelegte Tafel bekommt als ``erstellt``
+die aktuelle Zeit in Millisekunden und beginnt mit dieser Version, so fängt
+ein gelöschtes und neu angelegtes Spiel nicht wieder bei 1 an. Ein ``Spiegel`` pro Prozess merkt sich die
+zuletzt gesehenen Runden, lädt nur Runden mit neuerer Version nach und rechnet
+die Punktestände ab der ersten geänderten Runde weiter. Übertragung und
+Rechenzeit pro Änderung hängen so nur davon ab, was sich geändert hat.
+
+Firestore erlaubt keine Arrays in Arrays, deshalb sind Runden und Spieler
+Listen von Maps.
+"""
+
+import json
+import threading
+import time
+import zlib
+
+from vatertag.messung import spanne
+from vatertag.speicher import ZEITSTEMPEL
+from vatertag.statistik import ANZEIGE, Statistik
+
+SAMMLUNG = "anzeigetafeln"
+
+_RUNDENWERTE = ("einsaetze", "plaetze", "gewinne")
+
+
+def tafel_pfad(spielname, *unterpfad):
+    return "/".join((SAMMLUNG, spielname) + unterpfad)
+
+
+def tafel_runde_pfad(spielname, idx):
+    return tafel_pfad(spielname, "runden", f"{idx:05d}")
+
+
+def statistik(wertung, runden, laufend=None):
+    """Die vier Kennzahlen der Anzeige (Reihenfolge bei Gleichstand: Spieler- bzw. Rundenreihenfolge).
+
+    ``laufend`` ist eine mitgeführte ``Statistik`` (siehe ``vatertag.statistik``);
+    ohne sie wird einmal über alle Runden gerechnet.
+    """
+    if laufend is None:
+        laufend = Statistik(wertung.namen, wertung.startpunkte, ANZEIGE).aktualisieren(wertung)
+    return laufend.ergebnis(runden)
+
+
+@spanne("anzeigetafel")
+def erstellen(wertung, runden, laufend=None):
+    """Anzeigetafel aus einer aktuellen Wertung."""
+    spieler = wertung.spieler_eintraege()
+    for s, sp in enumerate(spieler):
+        sp["verlauf"] = [stand[s] for stand in wertung.staende[1:]]
+    return {
+        "startpunkte": wertung.startpunkte,
+        "multiplikatoren": wertung.multiplikatoren,
+        "regel": wertung.regel,
+        "runden": [
+            {"name": runde["name"], "bonus": bonus}
+            for runde, bonus in zip(runden, wertung.bonus_empfaenger)
+        ],
+        "rangliste": sorted(spieler, key=lambda sp: -sp["punkte"]),
+        "statistik": statistik(wertung, runden, laufend),
+    }
+
+
+def zerlegen(tafel):
+    """Kopf (ohne Rundenstempel) und je Runde ein Dokument; Spieler nach Namen geordnet."""
+    spieler = sorted(tafel["rangliste"], key=lambda sp: sp["name"])
+    kopf = {
+        "startpunkte": tafel["startpunkte"],
+        "multiplikatoren": tafel["multiplikatoren"],
+        "regel": tafel["regel"],
+        "spieler": [sp["name"] for sp in spieler],
+        "rangliste": [{"name": sp["name"], "punkte": sp["punkte"]} for sp in tafel["rangliste"]],
+        "statistik": tafel["statistik"],
+    }
+    runden = [
+        {
+            "index": idx,
+            "bonus": runde["bonus"],
+            **{feld: [sp[feld][idx] for sp in spieler] for feld in _RUNDENWERTE},
+        }
+        for idx, runde in enumerate(tafel["runden"])
+    ]
+    return kopf, runden
+
+
+def _pruefsumme(spieler, runde):
+    return zlib.crc32(json.dumps([spieler, runde], sort_keys=True).encode())
+
+
+def schreiben(tx, spielname, tafel):
+    """Schreibt ``tafel`` (aus ``erstellen``) als Delta in der Transaktion ``tx``.
+
+    Die neue ``version`` ist die alte plus eins (bei einer neuen Tafel der
+    Zeitpunkt ``erstellt``); jede Runde trägt die Version, in der sie zuletzt
+    geschrieben wurde.
+    """
+    alt = tx.get(tafel_pfad(spielname)).daten or {}
+    alte_runden = alt.get("runden", []) if "version" in alt else []
+    if "version" in alt:
+        erstellt = alt.get("erstellt") or time.time_ns() // 1_000_000
+        version = max(alt["version"] + 1, erstellt)
+    else:
+        erstellt = version = time.time_ns() // 1_000_000
+    kopf, runden = zerlegen(tafel)
+
+    stempel = []
+    for idx, (runde, dokument) in enumerate(zip(tafel["runden"], runden)):
+        pruef = _pruefsumme(kopf["spieler"], dokument)
+        if idx < len(alte_runden) and alte_runden[idx]["pruef"] == pruef:
+            stempel.append({"name": runde["name"], "version": alte_runden[idx]["version"], "pruef": pruef})
+            continue
+        tx.set(tafel_runde_pfad(spielname, idx), dokument)
+        stempel.append({"name": runde["name"], "version": version, "pruef": pruef})
+    for idx in range(len(runden), len(alte_runden)):
+        tx.delete(tafel_runde_pfad(spielname, idx))
+    tx.set(tafel_pfad(spielname), {
+        **kopf, "erstellt": erstellt, "version": version, "runden": stempel, "zeitstempel": ZEITSTEMPEL,
+    })
+
+
+class Spiegel:
+    """Zuletzt gesehener Stand einer Delta-Tafel im Prozess (siehe ``vatertag.live``)."""
+
+    def __init__(self, db, spielname):
+        self.db = db
+        self.spielname = spielname
+        self._lock = threading.Lock()
+        self._erstellt = None
+        self._spieler = None
+        self._startpunkte = None
+        self._versionen = []
+        self._runden = []  # Rundendokumente
+        self._staende = []  # Punkte je Spieler nach jeder Runde
+
+    def _laden(self, indizes):
+        if not self._runden:
+            # Erster Stand: eine Abfrage statt einzelner Dokumente
+            dokumente = self.db.list(tafel_pfad(self.spielname, "runden"))
+        else:
+            dokumente = self.db.get_all([tafel_runde_pfad(self.spielname, idx) for idx in indizes])
+        return {doc.daten["index"]: doc.daten for doc in dokumente if doc.exists}
+
+    @spanne("anzeigetafel.delta")
+    def anwenden(self, kopf):
+        """Tafel im Format von ``erstellen`` aus dem Kopfdokument; lädt nur geänderte Runden."""
+        with self._lock:
+            # Neu angelegte Tafel (oder andere Spieler): gemerkte Runden passen nicht mehr
+            ident = (kopf.get("erstellt"), kopf["spieler"], kopf["startpunkte"])
+            if ident != (self._erstellt, self._spieler, self._startpunkte):
+                self._erstellt, self._spieler, self._startpunkte = ident
+                self._versionen, self._runden, self._staende = [], [], []
+
+            stempel = kopf["runden"]
+            geaendert = [
+                idx for idx, eintrag in enumerate(stempel)
+                if idx >= len(self._versionen) or self._versionen[idx] != eintrag["version"]
+            ]
+            neu = self._laden(geaendert) if geaendert else {}
+            if any(idx not in neu for idx in geaendert):
+                # Runde fehlt (inzwischen gekürzt): alles neu laden, der nächste Kopf folgt gleich
+                self._versionen, self._runden, self._staende = [], [], []
+                neu = self._laden(())
+                anzahl = next((idx for idx in range(len(stempel)) if idx not in neu), len(stempel))
+                stempel = stempel[:anzahl]
+                geaendert = list(range(anzahl))
+
+            del self._runden[len(stempel):]
+            for idx in geaendert:
+                if idx < len(self._runden):
+                    self._runden[idx] = neu[idx]
+                else:
+                    self._runden.append(neu[idx])
+            self._versionen = [eintrag["version"] for eintrag in stempel]
+
+            # Punktestände nur ab der ersten geänderten Runde neu
+            ab = geaendert[0] if geaendert else len(stempel)
+            del self._staende[ab:]
+            stand = self._staende[-1] if self._staende else [self._startpunkte] * len(self._spieler)
+            for runde in self._runden[ab:]:
+                stand = [p + g for p, g in zip(stand, runde["gewinne"])]
+                self._staende.append(stand)
+            return self._tafel(kopf)
+
+    def _tafel(self, kopf):
+        spalten = {feld: list(zip(*(runde[feld] for runde in self._runden))) for feld in _RUNDENWERTE}
+        verlauf = list(zip(*self._staende))
+        spieler = {
+            name: {
+                "name": name,
+                **{feld: list(spalten[feld][s]) if spalten[feld] else [] for feld in _RUNDENWERTE},
+                "verlauf": list(verlauf[s]) if verlauf else [],
+            }
+            for s, name in enumerate(self._spieler)
+        }
+        return {
+            "version": kopf["version"],
+            "startpunkte": kopf["startpunkte"],
+            **{feld: kopf[feld] for feld in ("multiplikatoren", "regel") if feld in kopf},
+            "runden": [
+                {"name": eintrag["name"], "bonus": runde["bonus"]}
+                for eintrag, runde in zip(kopf["runden"], self._runden)
+            ],
+            "rangliste": [{**spieler[sp["name"]], "punkte": sp["punkte"]} for sp in kopf["rangliste"]],
+            "statistik": kopf["statistik"],
+        }
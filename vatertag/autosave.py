@@ -0,0 +1,116 @@
+"""Automatisches Speichern mit Änderungsverfolgung.
+
+Der zuletzt gespeicherte Spielstand wird gemerkt; geschrieben werden nur
+Felder, die sich wirklich geändert haben. Schnelle Eingaben hintereinander
+werden innerhalb eines Zeitfensters gesammelt und dann in einem einzigen
+``update()`` bzw. Batch geschrieben. Reruns ohne Änderung (z. B. Expander aufklappen)
+schreiben gar nichts.
+
+Firestore kann einzelne Array-Elemente nicht per Index ändern, deshalb ist
+im Dokument-Layout ``runden`` als Ganzes das kleinste schreibbare Feld. Im
+Runden-Layout (siehe ``vatertag.layout``) wird nur je geänderter Runde ein
+Dokument geschrieben, im Ereignis-Layout nur die Ereignisse seit dem letzten
+Speichern (siehe ``vatertag.ereignisse``). Im Kompakt-Layout gehen ``spieler``
+und ``runden`` immer zusammen raus, weil die Rundenlisten an der
+Spielerreihenfolge hängen (siehe ``vatertag.kompakt``).
+
+Mit ``journal`` (siehe ``vatertag.journal``) wird nicht ins Netz geschrieben,
+sondern nach demselben Zeitfenster ein Eintrag mit allen gesammelten
+Änderungen ins lokale Journal; das Übertragen übernimmt dessen
+Hintergrund-Thread.
+"""
+
+import copy
+import threading
+
+from vatertag.ereignisse import ereignisse_aus, zusammenfassen
+from vatertag.journal import AENDERN
+from vatertag.layout import DOKUMENT, EREIGNISSE, KOMPAKT, aenderungen_schreiben
+
+WARTEZEIT = 2.0  # Sekunden ohne neue Eingabe, bevor geschrieben wird
+FELDER = ("spieler", "multiplikatoren", "runden", "anzeigetafel")
+
+
+def geaenderte_runden(alt, neu):
+    """Indizes der Runden, die neu oder anders sind."""
+    return {
+        idx for idx, runde in enumerate(neu)
+        if idx >= len(alt) or alt[idx] != runde
+    }
+
+
+class AutoSpeicher:
+    def __init__(self, db, spielname, bekannt=None, layout=DOKUMENT, wartezeit=WARTEZEIT, journal=None):
+        self.db = db
+        self.journal = journal
+        self.spielname = spielname
+        self.layout = layout
+        self.wartezeit = wartezeit
+        self.letzter_fehler = None
+        self.geaenderte_runden = set()
+        self._bekannt = copy.deepcopy(bekannt) if bekannt else {}
+        self._offen = {}
+        self._timer = None
+        self._lock = threading.Lock()
+
+    @property
+    def hat_offene_aenderungen(self):
+        return bool(self._offen)
+
+    def vormerken(self, daten):
+        """Merkt geänderte Felder vor und startet das Zeitfenster neu.
+
+        Gibt zurück, ob sich etwas geändert hat.
+        """
+        with self._lock:
+            geaendert = False
+            for feld in FELDER:
+                if feld not in daten or self._bekannt.get(feld) == daten[feld]:
+                    continue
+                wert = copy.deepcopy(daten[feld])
+                if feld == "runden" and self.layout == EREIGNISSE:
+                    neu = ereignisse_aus(self._bekannt.get("runden", []), wert)
+                    self._bekannt[feld] = wert
+                    if not neu:
+                        continue  # Nur abgeleitete Felder geändert (z. B. Bonus)
+                    self._offen["ereignisse"] = self._offen.get("ereignisse", []) + neu
+                elif feld == "runden":
+                    self.geaenderte_runden |= geaenderte_runden(self._bekannt.get("runden", []), daten["runden"])
+                self._bekannt[feld] = wert
+                self._offen[feld] = wert
+                geaendert = True
+            if self.layout == KOMPAKT and ("spieler" in self._offen or "runden" in self._offen):
+                for feld in ("spieler", "runden"):
+                    self._offen.setdefault(feld, copy.deepcopy(self._bekannt.get(feld, [])))
+
+            if geaendert:
+                if self._timer is not None:
+                    self._timer.cancel()
+                self._timer = threading.Timer(self.wartezeit, self.speichern)
+                self._timer.daemon = True
+                self._timer.start()
+        return geaendert
+
+    def speichern(self):
+        """Schreibt alle offenen Änderungen sofort (ein einziges update)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            offen, self._offen = self._offen, {}
+            runden, self.geaenderte_runden = self.geaenderte_runden, set()
+        if not offen:
+            return
+
+        try:
+            if self.journal is not None:
+                self.journal.anhaengen(self.spielname, AENDERN, offen, runden, self.layout)
+            else:
+                aenderungen_schreiben(self.db, self.spielname, offen, runden, self.layout)
+            self.letzter_fehler = None
+        except Exception as e:
+            # Nicht verlieren: beim nächsten Mal erneut versuchen (neuere Werte gewinnen)
+            with self._lock:
+                self._offen = zusammenfassen(offen, self._offen)
+                self.geaenderte_runden |= runden
+            self.letzter_fehler = e
@@ -0,0 +1,57 @@
+"""Prozessweiter Cache für abgeleitete Ansichten eines Spielstands.
+
+Schlüssel ist Spielname + ``update_time`` des Spiel- bzw. Tafeldokuments: Tabelle,
+Punkteverlauf, Diagramm und Statistik werden pro Version genau einmal im
+Prozess berechnet und an alle Sitzungen ausgeliefert. Die Wertung selbst wird
+prozessweit inkrementell weitergeführt. Ergebnisse werden geteilt und dürfen
+nicht verändert werden.
+"""
+
+import threading
+
+import streamlit as st
+
+from vatertag.wertung import ALLE_LETZTEN, wertung_fuer
+
+MAX_VERSIONEN = 8
+
+_lock = threading.Lock()
+
+
+@st.cache_resource
+def _wertungen():
+    return {}
+
+
+@st.cache_resource
+def prozess_cache():
+    """Dict, das alle Sitzungen des Prozesses teilen (z. B. gemerkte Tabellenspalten)."""
+    return {}
+
+
+@st.cache_resource(max_entries=MAX_VERSIONEN)
+def _berechnet(spielname, update_time, art, regel, _daten, _berechnen):
+    with _lock:
+        namen = [sp["name"] for sp in _daten.get("spieler", [])]
+        wertung = wertung_fuer(
+            _wertungen(), namen, _daten.get("multiplikatoren", []), regel, schluessel=(spielname, regel)
+        )
+        wertung.aktualisieren(_daten.get("runden", []))
+        return _berechnen(wertung, _daten)
+
+
+def ansichten(spielname, daten, berechnen, regel=ALLE_LETZTEN):
+    """Ergebnis von ``berechnen(wertung, daten)`` für diese Spielversion, einmal pro Prozess."""
+    art = f"{berechnen.__module__}.{berechnen.__qualname__}"
+    return _berechnet(spielname, daten.get("update_time"), art, regel, daten, berechnen)
+
+
+@st.cache_resource(max_entries=MAX_VERSIONEN)
+def _aus_tafel(spielname, update_time, art, _tafel, _bauen):
+    return _bauen(_tafel)
+
+
+def ansichten_aus_tafel(spielname, tafel, bauen):
+    """Ergebnis von ``bauen(tafel)`` für diese Version der Anzeigetafel, einmal pro Prozess."""
+    art = f"{bauen.__module__}.{bauen.__qualname__}"
+    return _aus_tafel(spielname, tafel.get("update_time"), art, tafel, bauen)
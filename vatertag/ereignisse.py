@@ -0,0 +1,107 @@
+"""Rundenänderungen als Ereignisse.
+
+Im Ereignis-Layout (siehe ``vatertag.layout``) wird nicht das ganze
+``runden``-Array geschrieben, sondern je Admin-Aktion ein kleines Ereignis:
+
+``runde``     Runde ``runde`` angelegt (mit ``name``)
+``name``      Runde ``runde`` umbenannt
+``einsatz``   Einsatz von ``spieler`` in Runde ``runde`` gesetzt (``wert``; ``None`` = entfernt)
+``platz``     Platz von ``spieler`` in Runde ``runde`` gesetzt (``wert``; ``None`` = entfernt)
+``kuerzen``   nur noch die ersten ``anzahl`` Runden
+
+``ereignisse_aus`` leitet die Ereignisse aus altem und neuem Stand ab,
+``anwenden`` spielt sie wieder ab. Abgeleitete Felder (``bonus_empfaenger``)
+stehen in keinem Ereignis; die Wertung rechnet sie beim Lesen neu.
+"""
+
+import copy
+
+RUNDE = "runde"
+NAME = "name"
+EINSATZ = "einsatz"
+PLATZ = "platz"
+KUERZEN = "kuerzen"
+
+# Rundenfelder, die aus Ereignissen wiederhergestellt werden
+KERN = ("name", "einsaetze", "plaetze")
+
+_ZUORDNUNGEN = ((EINSATZ, "einsaetze"), (PLATZ, "plaetze"))
+
+
+def kern(runde):
+    """Runde ohne abgeleitete Felder."""
+    return {
+        "name": runde.get("name", ""),
+        "einsaetze": dict(runde.get("einsaetze", {})),
+        "plaetze": dict(runde.get("plaetze", {})),
+    }
+
+
+def ereignisse_aus(alt, neu):
+    """Ereignisse, die die Runden ``alt`` in ``neu`` überführen (in Anwendungsreihenfolge)."""
+    ereignisse = []
+    if len(neu) < len(alt):
+        ereignisse.append({"art": KUERZEN, "anzahl": len(neu)})
+    for idx, runde in enumerate(neu):
+        if idx < len(alt):
+            vorher = alt[idx]
+            if all(vorher.get(feld) == runde.get(feld) for feld in KERN):
+                continue
+        else:
+            vorher = {}
+            ereignisse.append({"art": RUNDE, "runde": idx, "name": runde.get("name", "")})
+        if vorher and vorher.get("name") != runde.get("name"):
+            ereignisse.append({"art": NAME, "runde": idx, "name": runde.get("name", "")})
+        for art, feld in _ZUORDNUNGEN:
+            werte_alt, werte_neu = vorher.get(feld, {}), runde.get(feld, {})
+            for spieler in sorted(werte_alt.keys() - werte_neu.keys()):
+                ereignisse.append({"art": art, "runde": idx, "spieler": spieler, "wert": None})
+            for spieler, wert in werte_neu.items():
+                if werte_alt.get(spieler) != wert:
+                    ereignisse.append({"art": art, "runde": idx, "spieler": spieler, "wert": wert})
+    return ereignisse
+
+
+def anwenden(runden, ereignisse):
+    """Neue Rundenliste: ``runden`` (wird nicht verändert) nach allen ``ereignisse``."""
+    runden = [kern(runde) for runde in copy.deepcopy(runden)]
+    for ereignis in ereignisse:
+        art = ereignis["art"]
+        if art == KUERZEN:
+            del runden[ereignis["anzahl"]:]
+        elif art == RUNDE:
+            del runden[ereignis["runde"]:]
+            runden.append({"name": ereignis["name"], "einsaetze": {}, "plaetze": {}})
+        elif art == NAME:
+            runden[ereignis["runde"]]["name"] = ereignis["name"]
+        else:
+            werte = runden[ereignis["runde"]][dict(_ZUORDNUNGEN)[art]]
+            if ereignis["wert"] is None:
+                werte.pop(ereignis["spieler"], None)
+            else:
+                werte[ereignis["spieler"]] = ereignis["wert"]
+    return runden
+
+
+def zusammenfassen(felder, neu):
+    """Geänderte Felder zweier Speichervorgänge: neuere Werte gewinnen, Ereignisse werden aneinandergehängt."""
+    ergebnis = {**felder, **neu}
+    if "ereignisse" in felder and "ereignisse" in neu:
+        ergebnis["ereignisse"] = felder["ereignisse"] + neu["ereignisse"]
+    return ergebnis
+
+
+def beschreiben(ereignis):
+    """Eine Zeile für das Protokoll."""
+    art = ereignis["art"]
+    if art == KUERZEN:
+        return f"Runden nach Nr. {ereignis['anzahl']} entfernt"
+    runde = f"Runde {ereignis['runde'] + 1}"
+    if art == RUNDE:
+        return f"{runde} angelegt: {ereignis['name']}"
+    if art == NAME:
+        return f"{runde} umbenannt: {ereignis['name']}"
+    was = "Einsatz" if art == EINSATZ else "Platz"
+    if ereignis["wert"] is None:
+        return f"{runde}: {was} von {ereignis['spieler']} entfernt"
+    return f"{runde}: {was} von {ereignis['spieler']} = {ereignis['wert']}"
@@ -0,0 +1,209 @@
+"""Statischer Export des Spielstands für viele Zuschauer.
+
+Für Beamer und Handys ohne eigene Streamlit-Sitzung: ein Prozess beobachtet
+die Anzeigetafel (ein Listener, siehe ``vatertag.live``) und schreibt bei
+jeder Änderung zwei Dateien, die jeder statische Webserver ausliefern kann:
+
+``index.html``
+    Eigenständige Seite mit Spielstand-Tabelle, Punkteverlauf (SVG) und den
+    vier Kennzahlen – ohne JavaScript und ohne Dateien von außen. Sie lädt
+    sich alle ``NEU_LADEN`` Sekunden selbst neu.
+``spielstand.json``
+    Dieselben Daten zum Weiterverarbeiten.
+
+Tabelle, Verlauf und Kennzahlen kommen aus ``vatertag.anzeige``, genau wie in
+``streamlit_display_app.py``. Geschrieben wird in eine temporäre Datei im
+Zielordner, die dann ersetzt wird; Zuschauer sehen nie eine halbe Datei.
+Aufruf (Speicher wie in den Apps konfiguriert, siehe ``vatertag.speicher``)::
+
+    python -m vatertag.export "Vatertagsspiele 2025" --ziel public
+"""
+
+import html
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from vatertag import anzeige, anzeigetafel
+from vatertag.live import PRUEF_INTERVALL, LiveSpiel
+from vatertag.messung import spanne
+from vatertag.verlauf import PUNKTE_BUDGET
+
+DATEI_HTML = "index.html"
+DATEI_JSON = "spielstand.json"
+
+NEU_LADEN = 15  # Sekunden, bis sich die HTML-Seite im Browser neu lädt
+
+# Farben wie die Standardpalette von Vega-Lite (tableau10)
+FARBEN = ("#4c78a8", "#f58518", "#e45756", "#72b7b2", "#54a24b", "#eeca3b", "#b279a2", "#ff9da6", "#9d755d", "#bab0ac")
+
+_STIL = """
+body { font-family: system-ui, sans-serif; margin: 1rem auto; max-width: 1200px; padding: 0 1rem; color: #262730; }
+h1 { font-size: 1.8rem; } h2 { font-size: 1.3rem; margin-top: 2rem; }
+.kennzahlen { display: grid; grid-template-columns: repeat(auto-fit, minmax(220px, 1fr)); gap: 1rem; }
+.kennzahl { border: 1px solid #e6e6e6; border-radius: .5rem; padding: .75rem; }
+.kennzahl .titel { font-size: .9rem; color: #6b6b6b; } .kennzahl .wert { font-size: 1.6rem; }
+.kennzahl .zusatz { font-size: .9rem; color: #09ab3b; }
+.tabelle { overflow-x: auto; }
+table { border-collapse: collapse; font-size: .9rem; white-space: nowrap; }
+th, td { border-bottom: 1px solid #e6e6e6; padding: .3rem .6rem; text-align: left; }
+svg { width: 100%; height: auto; } .legende span { margin-right: 1rem; }
+.stand { color: #6b6b6b; font-size: .8rem; }
+"""
+
+
+def schnappschuss(spielname, tafel, cache, budget=PUNKTE_BUDGET):
+    """Daten der Seite als JSON-fähiges Dict; ``cache`` merkt Tabellenspalten und Verlauf."""
+    tabelle = anzeige.tabelle_bauen(tafel, cache)
+    verlauf = anzeige.verlauf_daten(tafel, cache, budget)
+    update_time = tafel.get("update_time")
+    return {
+        "spiel": spielname,
+        "version": tafel.get("version"),
+        "aktualisiert": update_time.isoformat() if update_time else None,
+        "exportiert": datetime.now(timezone.utc).isoformat(),
+        "runden": [runde["name"] for runde in tafel["runden"]],
+        "rangliste": [{"name": sp["name"], "punkte": round(sp["punkte"], 1)} for sp in tafel["rangliste"]],
+        "tabelle": {"spalten": list(tabelle.columns), "zeilen": tabelle.values.tolist()},
+        "verlauf": verlauf.to_dict(orient="records"),
+        "kennzahlen": [
+            {"titel": titel, "wert": wert, "zusatz": zusatz}
+            for titel, wert, zusatz in anzeige.kennzahlen(tafel["statistik"])
+        ],
+    }
+
+
+def verlauf_svg(verlauf, breite=1000, hoehe=400, rand=40):
+    """Punkteverlauf als Linien-SVG (eine Linie pro Spieler, x = Rundenindex)."""
+    if not verlauf:
+        return ""
+    letzte = max(p["RundenIndex"] for p in verlauf) or 1
+    tief = min(p["Punkte"] for p in verlauf)
+    hoch = max(p["Punkte"] for p in verlauf)
+    spanne_y = (hoch - tief) or 1
+
+    def x(idx):
+        return rand + idx / letzte * (breite - 2 * rand)
+
+    def y(punkte):
+        return hoehe - rand - (punkte - tief) / spanne_y * (hoehe - 2 * rand)
+
+    linien = {}
+    for punkt in verlauf:
+        linien.setdefault(punkt["Spieler"], []).append(f"{x(punkt['RundenIndex']):.1f},{y(punkt['Punkte']):.1f}")
+    teile = [
+        f'<svg viewBox="0 0 {breite} {hoehe}" xmlns="http://www.w3.org/2000/svg" role="img">',
+        f'<line x1="{rand}" y1="{hoehe - rand}" x2="{breite - rand}" y2="{hoehe - rand}" stroke="#ccc"/>',
+        f'<text x="4" y="{y(hoch) + 4:.1f}" font-size="12">{hoch:g}</text>',
+        f'<text x="4" y="{y(tief) + 4:.1f}" font-size="12">{tief:g}</text>',
+    ]
+    for i, (name, punkte) in enumerate(linien.items()):
+        farbe = FARBEN[i % len(FARBEN)]
+        teile.append(
+            f'<polyline fill="none" stroke="{farbe}" stroke-width="2" points="{" ".join(punkte)}">'
+            f"<title>{html.escape(name)}</title></polyline>"
+        )
+    teile.append("</svg>")
+    legende = "".join(
+        f'<span style="color:{FARBEN[i % len(FARBEN)]}">●</span> {html.escape(name)} '
+        for i, name in enumerate(linien)
+    )
+    return "".join(teile) + f'<div class="legende">{legende}</div>'
+
+
+def html_seite(daten):
+    """Eigenständige HTML-Seite aus ``schnappschuss``."""
+    e = html.escape
+    kopf = "".join(f"<th>{e(str(spalte))}</th>" for spalte in daten["tabelle"]["spalten"])
+    zeilen = "".join(
+        "<tr>" + "".join(f"<td>{e(str(zelle))}</td>" for zelle in zeile) + "</tr>"
+        for zeile in daten["tabelle"]["zeilen"]
+    )
+    kennzahlen = "".join(
+        f'<div class="kennzahl"><div class="titel">{e(k["titel"])}</div>'
+        f'<div class="wert">{e(k["wert"])}</div><div class="zusatz">{e(k["zusatz"])}</div></div>'
+        for k in daten["kennzahlen"]
+    )
+    stand = datetime.fromisoformat(daten["exportiert"]).astimezone()
+    return (
+        "<!DOCTYPE html>\n<html lang=\"de\"><head><meta charset=\"utf-8\">"
+        f'<meta http-equiv="refresh" content="{NEU_LADEN}">'
+        '<meta name="viewport" content="width=device-width, initial-scale=1">'
+        f"<title>{e(daten['spiel'])} – LIVE</title><style>{_STIL}</style></head><body>"
+        f"<h1>🎲 {e(daten['spiel'])} - LIVE</h1>"
+        f'<h2>📊 Spielstand</h2><div class="tabelle"><table><thead><tr>{kopf}</tr></thead>'
+        f"<tbody>{zeilen}</tbody></table></div>"
+        f"<h2>📈 Punkteverlauf</h2>{verlauf_svg(daten['verlauf'])}"
+        f'<h2>📌 Spielstatistik</h2><div class="kennzahlen">{kennzahlen}</div>'
+        f'<p class="stand">Stand: {stand:%d.%m.%Y %H:%M:%S}</p>'
+        "</body></html>\n"
+    )
+
+
+def atomar_schreiben(pfad, text):
+    """Schreibt ``text`` in eine temporäre Datei neben ``pfad`` und ersetzt ``pfad`` dann in einem Schritt."""
+    ordner = os.path.dirname(os.path.abspath(pfad))
+    fd, tmp = tempfile.mkstemp(dir=ordner, prefix=".export-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.chmod(tmp, 0o644)  # mkstemp legt 0600 an; der Webserver muss lesen dürfen
+        os.replace(tmp, pfad)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+@spanne("export")
+def exportieren(ziel, spielname, tafel, cache, budget=PUNKTE_BUDGET):
+    """Schreibt ``spielstand.json`` und ``index.html`` nach ``ziel``."""
+    daten = schnappschuss(spielname, tafel, cache, budget)
+    os.makedirs(ziel, exist_ok=True)
+    atomar_schreiben(os.path.join(ziel, DATEI_JSON), json.dumps(daten, ensure_ascii=False, default=str))
+    atomar_schreiben(os.path.join(ziel, DATEI_HTML), html_seite(daten))
+    return daten
+
+
+def beobachten(db, spielname, ziel, budget=PUNKTE_BUDGET, einmal=False, intervall=PRUEF_INTERVALL):
+    """Exportiert den aktuellen Stand und danach bei jeder neuen Version der Anzeigetafel."""
+    live = LiveSpiel(db, spielname, sammlung=anzeigetafel.SAMMLUNG)
+    cache = {}
+    gesehen = None
+    try:
+        while True:
+            version, tafel = live.stand()
+            if version != gesehen:
+                gesehen = version
+                if tafel is None or not tafel["rangliste"]:
+                    print(f"Für '{spielname}' gibt es noch keinen Spielstand.")
+                else:
+                    exportieren(ziel, spielname, tafel, cache, budget)
+                    print(f"{datetime.now():%H:%M:%S} exportiert: {len(tafel['runden'])} Runden")
+            if einmal:
+                return
+            time.sleep(intervall)
+    finally:
+        live.beenden()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from vatertag.speicher import einstellung, speicher_oeffnen
+
+    parser = argparse.ArgumentParser(description="Spielstand als statische HTML- und JSON-Datei exportieren")
+    parser.add_argument("spielname")
+    parser.add_argument("--ziel", default="export", help="Ordner für index.html und spielstand.json")
+    parser.add_argument("--verlauf-punkte", type=int, default=int(einstellung("verlauf_punkte", PUNKTE_BUDGET)))
+    parser.add_argument("--einmal", action="store_true", help="nur einmal exportieren statt auf Änderungen zu warten")
+    args = parser.parse_args()
+
+    try:
+        beobachten(
+            speicher_oeffnen(einstellung("speicher", "firestore")), args.spielname, args.ziel,
+            args.verlauf_punkte, args.einmal,
+        )
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,248 @@
+"""Schreib-Journal für die Admin-App: erst lokal, dann ins Netz.
+
+Jede Änderung (Setup, neue Runde, Einsätze und Plätze) wird zuerst als
+Eintrag in ein lokales Journal geschrieben – eine SQLite-Datei über
+``vatertag.speicher`` (``journal/<nr>``). Das dauert eine lokale
+Transaktion; die Seite wartet nie auf das Netz. Ein Hintergrund-Thread pro
+Prozess überträgt die Einträge in Reihenfolge in den eigentlichen Speicher:
+
+* aufeinanderfolgende Änderungen desselben Spiels werden zu einem Batch
+  zusammengefasst (neuere Felder gewinnen),
+* schlägt ein Schreibvorgang vorübergehend fehl (Netz weg, Zeitüberschreitung),
+  wird er mit wachsender Pause wiederholt; spätere Einträge warten so lange,
+  die Reihenfolge bleibt erhalten,
+* scheitert er dauerhaft (Dokument gelöscht, ungültige Daten, siehe
+  ``dauerhaft``), wandert der Eintrag nach ``fehlgeschlagen/<nr>`` – die
+  Admin-App zeigt ihn an – und die Warteschlange läuft weiter. Ein
+  zusammengefasster Block wird danach einzeln wiederholt, damit nur der
+  schuldige Eintrag aussortiert wird,
+* übertragene Einträge werden aus dem Journal gelöscht.
+
+Nach einem Neustart überträgt der Thread, was noch im Journal steht. Beim
+Laden eines Spiels legt ``ueberlagern`` noch nicht übertragene Änderungen
+über den Stand aus dem Speicher.
+
+Auch Löschen geht über das Journal (``loeschen``): offene Einträge des Spiels
+werden verworfen, ein Eintrag ``loeschen`` löscht es dann im Speicher. So
+holt kein späteres ``anlegen`` das Spiel zurück, und offline gibt es keinen
+Fehler in der Seite.
+
+Gewählt wird das Journal per ``VATERTAG_JOURNAL`` bzw. Secret ``journal``
+(Standard ``sqlite:vatertag_journal.db``; ``speicher`` nur im Arbeitsspeicher,
+``aus`` schreibt wie bisher direkt).
+"""
+
+import threading
+import time
+
+import streamlit as st
+
+from vatertag.ereignisse import zusammenfassen
+from vatertag.layout import DOKUMENT, aenderungen_schreiben, spiel_anlegen, spiel_loeschen
+from vatertag.speicher import einstellung, speicher_oeffnen, standard_speicher
+
+SAMMLUNG = "journal"
+FEHLGESCHLAGEN = "fehlgeschlagen"
+
+ANLEGEN = "anlegen"
+AENDERN = "aendern"
+LOESCHEN = "loeschen"
+
+MIN_PAUSE = 1.0  # Sekunden bis zum ersten neuen Versuch nach einem Fehler
+MAX_PAUSE = 60.0
+
+
+def dauerhaft(fehler):
+    """Ob ein erneuter Versuch nichts ändern würde (im Gegensatz zu Netz- oder Serverfehlern)."""
+    # KeyError: update auf ein fehlendes Dokument im Arbeitsspeicher bzw. in SQLite
+    if isinstance(fehler, (ValueError, TypeError, KeyError)):
+        return True
+    try:
+        from google.api_core import exceptions
+    except ImportError:
+        return False
+    return isinstance(fehler, (exceptions.NotFound, exceptions.InvalidArgument))
+
+
+class Journal:
+    def __init__(self, lokal, ziel):
+        self.lokal = lokal
+        self.ziel = ziel
+        self.letzter_fehler = None
+        self._lock = threading.Lock()
+        self._letzte_nr = 0
+        self._anzahl = len(lokal.list(SAMMLUNG))  # Offene Einträge, ohne bei jedem Rerun zu lesen
+        self._anzahl_fehlgeschlagen = len(lokal.list(FEHLGESCHLAGEN))
+        self._einzeln = False  # nach einem dauerhaften Fehler Einträge nicht mehr zusammenfassen
+        self._neu = threading.Event()
+        self._beendet = threading.Event()
+        self._thread = threading.Thread(target=self._arbeiten, daemon=True)
+        self._thread.start()
+
+    def _nummer(self):
+        # Zeit in ns, streng steigend; als Dokument-ID sortiert sie in Schreibreihenfolge
+        with self._lock:
+            self._letzte_nr = max(time.time_ns(), self._letzte_nr + 1)
+            return f"{self._letzte_nr:020d}"
+
+    def anhaengen(self, spielname, art, felder, geaenderte_runden=(), layout=DOKUMENT):
+        """Schreibt einen Eintrag ins lokale Journal und weckt den Hintergrund-Thread."""
+        self.lokal.set(f"{SAMMLUNG}/{self._nummer()}", {
+            "spielname": spielname,
+            "art": art,
+            "felder": felder,
+            "runden": sorted(geaenderte_runden),
+            "layout": layout,
+        })
+        with self._lock:
+            self._anzahl += 1
+        self._neu.set()
+
+    def loeschen(self, spielname):
+        """Verwirft die offenen Einträge des Spiels und merkt das Löschen im Speicher vor."""
+        verworfen = self.offen(spielname)
+        batch = self.lokal.batch()
+        for eintrag in verworfen:
+            batch.delete(eintrag.pfad)
+        batch.set(f"{SAMMLUNG}/{self._nummer()}", {
+            "spielname": spielname, "art": LOESCHEN, "felder": {}, "runden": [], "layout": DOKUMENT,
+        })
+        batch.commit()
+        with self._lock:
+            # Ein gerade übertragener Eintrag kann schon weg sein: neu zählen statt rechnen
+            self._anzahl = len(self.lokal.list(SAMMLUNG))
+        self._neu.set()
+
+    @property
+    def anzahl_offen(self):
+        return self._anzahl
+
+    @property
+    def anzahl_fehlgeschlagen(self):
+        return self._anzahl_fehlgeschlagen
+
+    def fehlgeschlagen(self):
+        """Aussortierte Einträge (älteste zuerst) mit ``fehler`` als Text."""
+        return self.lokal.list(FEHLGESCHLAGEN)
+
+    def verwerfen(self, eintraege):
+        """Löscht aussortierte Einträge (aus ``fehlgeschlagen``) endgültig."""
+        batch = self.lokal.batch()
+        for eintrag in eintraege:
+            batch.delete(eintrag.pfad)
+        batch.commit()
+        with self._lock:
+            self._anzahl_fehlgeschlagen -= len(eintraege)
+
+    def offen(self, spielname=None):
+        """Noch nicht übertragene Einträge (älteste zuerst)."""
+        eintraege = self.lokal.list(SAMMLUNG)
+        if spielname is not None:
+            eintraege = [e for e in eintraege if e.daten["spielname"] == spielname]
+        return eintraege
+
+    def ueberlagern(self, spielname, daten):
+        """``daten`` aus dem Speicher (oder ``None``) mit den offenen Einträgen des Spiels."""
+        for eintrag in self.offen(spielname):
+            if eintrag.daten["art"] == ANLEGEN:
+                daten = {**eintrag.daten["felder"], "layout": eintrag.daten["layout"]}
+            elif eintrag.daten["art"] == LOESCHEN:
+                daten = None
+            elif daten is not None:
+                daten = {**daten, **eintrag.daten["felder"]}
+        if daten is not None:
+            daten.pop("ereignisse", None)
+        return daten
+
+    def spielnamen(self):
+        """Spiele, deren Anlegen noch nicht übertragen ist."""
+        return [e.daten["spielname"] for e in self.offen() if e.daten["art"] == ANLEGEN]
+
+    def geloeschte_spiele(self):
+        """Spiele, deren Löschen noch nicht übertragen ist."""
+        return {e.daten["spielname"] for e in self.offen() if e.daten["art"] == LOESCHEN}
+
+    def _naechster_block(self, eintraege):
+        # Erster Eintrag plus alle direkt folgenden Änderungen desselben Spiels
+        erster = eintraege[0].daten
+        if erster["art"] != AENDERN or self._einzeln:
+            return eintraege[:1]
+        block = [eintraege[0]]
+        for eintrag in eintraege[1:]:
+            d = eintrag.daten
+            if d["art"] != AENDERN or (d["spielname"], d["layout"]) != (erster["spielname"], erster["layout"]):
+                break
+            block.append(eintrag)
+        return block
+
+    def _uebertragen(self, block):
+        erster = block[0].daten
+        if erster["art"] == ANLEGEN:
+            spiel_anlegen(self.ziel, erster["spielname"], erster["felder"], erster["layout"])
+            return
+        if erster["art"] == LOESCHEN:
+            spiel_loeschen(self.ziel, erster["spielname"])
+            return
+        felder, runden = {}, set()
+        for eintrag in block:
+            felder = zusammenfassen(felder, eintrag.daten["felder"])
+            runden.update(eintrag.daten["runden"])
+        runden = {idx for idx in runden if idx < len(felder.get("runden", ()))}
+        aenderungen_schreiben(self.ziel, erster["spielname"], felder, runden, erster["layout"])
+
+    def _arbeiten(self):
+        pause = MIN_PAUSE
+        while not self._beendet.is_set():
+            eintraege = self.offen()
+            if not eintraege:
+                self._neu.wait()
+                self._neu.clear()
+                continue
+            block = self._naechster_block(eintraege)
+            try:
+                self._uebertragen(block)
+            except Exception as e:
+                if dauerhaft(e) and len(block) > 1:
+                    # Welcher Eintrag schuld ist, zeigt erst der Versuch einzeln
+                    self._einzeln = True
+                    continue
+                if dauerhaft(e):
+                    self._aussortieren(block[0], e)
+                    self._einzeln = False
+                    continue
+                # Bleibt im Journal; später in derselben Reihenfolge erneut versuchen
+                self.letzter_fehler = e
+                self._beendet.wait(pause)
+                pause = min(pause * 2, MAX_PAUSE)
+                continue
+            batch = self.lokal.batch()
+            for eintrag in block:
+                batch.delete(eintrag.pfad)
+            batch.commit()
+            with self._lock:
+                self._anzahl = len(self.lokal.list(SAMMLUNG))
+            self.letzter_fehler = None
+            pause = MIN_PAUSE
+
+    def _aussortieren(self, eintrag, fehler):
+        # In einem lokalen Batch: der Eintrag ist danach entweder offen oder aussortiert
+        batch = self.lokal.batch()
+        batch.set(f"{FEHLGESCHLAGEN}/{eintrag.id}", {**eintrag.daten, "fehler": f"{type(fehler).__name__}: {fehler}"})
+        batch.delete(eintrag.pfad)
+        batch.commit()
+        with self._lock:
+            self._anzahl = len(self.lokal.list(SAMMLUNG))
+            self._anzahl_fehlgeschlagen += 1
+
+    def beenden(self):
+        self._beendet.set()
+        self._neu.set()
+
+
+@st.cache_resource
+def standard_journal():
+    """Journal und Hintergrund-Thread, einmal pro Prozess; ``None`` bei ``journal = aus``."""
+    art = einstellung("journal", "sqlite:vatertag_journal.db")
+    if art == "aus":
+        return None
+    return Journal(speicher_oeffnen(art), standard_speicher())
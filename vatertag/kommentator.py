@@ -0,0 +1,138 @@
+"""Spielkommentare pro Runde – jede Runde wird genau einmal kommentiert.
+
+Die Kommentare liegen nach Rundenindex ab: im Dokument-Layout als Map
+``kommentare.<nr>``, im Runden-Layout als ``spiele/<name>/kommentare/<nr>``.
+Der Zufall ist pro Runde geseedet, dieselbe Runde ergibt also immer denselben
+Text. Neu abgeschlossene Runden werden gesammelt in einer Transaktion
+geschrieben; parallele Viewer schreiben dadurch nichts doppelt.
+"""
+
+import random
+import threading
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import streamlit as st
+
+from vatertag.layout import DOKUMENT, MIT_KOPF, dokument_id, kommentare_als_map, spiel_pfad
+from vatertag.speicher import feldpfad
+
+kommentare_fuehrend = [
+    "🥇 **{name}** führt jetzt mit {punkte:.1f} Punkten. Niemand stoppt diesen Siegeszug!",
+    "🚀 **{name}** stürmt an die Spitze! {punkte:.1f} Punkte und kein Ende in Sicht!",
+    "👑 **{name}** thront über allen mit {punkte:.1f} Punkten. Ein König unter Spielern!",
+]
+
+kommentare_letzter = [
+    "🐢 **{name}** hinkt mit {punkte:.1f} Punkten hinterher. Vielleicht war das ein geheimer Plan?",
+    "🪨 **{name}** hält das Feld stabil von hinten – {punkte:.1f} Punkte und viel Luft nach oben.",
+    "🌌 **{name}** ist auf Entdeckungsreise im unteren Punktesektor ({punkte:.1f}).",
+]
+
+kommentare_rundensieger = [
+    "💥 **{name}** schnappt sich diese Runde mit +{gewinn:.1f} Punkten. Boom!",
+    "🔥 **{name}** dominiert die Runde! +{gewinn:.1f} Punkte sind kein Zufall.",
+    "🎯 **{name}** trifft ins Schwarze – +{gewinn:.1f} Punkte in einer Runde!",
+]
+
+kommentare_bonus = [
+    "🧲 **{name}** bekommt den Bonus – Letzter sein zahlt sich wohl doch aus!",
+    "🔁 **{name}** nutzt Rubber-Banding – vielleicht klappt's ja nächstes Mal richtig!",
+    "🎁 Bonuszeit für **{name}**! Manchmal ist Verlieren einfach lohnenswert.",
+]
+
+kommentare_bonus_gewinnt = [
+    "⚡ **{name}** nutzt Rubber-Banding und rasiert die Runde mit +{gewinn:.1f} Punkten!",
+    "👀 **{name}** kommt von hinten – mit Bonus +{gewinn:.1f} Punkte! Da staunt das Feld.",
+    "🧨 **{name}** startet durch! Rubber-Banding at its best: +{gewinn:.1f} Punkte!",
+]
+
+
+def kommentarblock(spielname, j, rd):
+    """Kommentar zu Runde ``j``; ``rd`` ist ein Eintrag der Rundendaten."""
+    rng = random.Random(f"{spielname}/{j}")
+    zeit = datetime.now(ZoneInfo("Europe/Berlin")).strftime("%H:%M:%S")
+    stand = rd["stand"]
+
+    kommentarblock = f"### 🕓 Runde {j+1}: *{rd['runde']}* ({zeit})\n"
+    kommentarblock += "- " + rng.choice(kommentare_fuehrend).format(
+        name=rd["fuehrender"], punkte=stand[rd["fuehrender"]]
+    ) + "\n"
+    kommentarblock += "- " + rng.choice(kommentare_letzter).format(
+        name=rd["letzter"], punkte=stand[rd["letzter"]]
+    ) + "\n"
+    kommentarblock += "- " + rng.choice(kommentare_rundensieger).format(
+        name=rd["rundensieger"][0], gewinn=rd["rundensieger"][1]
+    ) + "\n"
+
+    if rd["bonus"] == rd["rundensieger"][0]:
+        kommentarblock += "- " + rng.choice(kommentare_bonus_gewinnt).format(
+            name=rd["bonus"], gewinn=rd["rundensieger"][1]
+        ) + "\n"
+    else:
+        kommentarblock += "- " + rng.choice(kommentare_bonus).format(
+            name=rd["bonus"]
+        ) + "\n"
+    return kommentarblock
+
+
+def kommentare_nach_runde(daten):
+    """Gespeicherte Kommentare als ``{rundenindex: text}``.
+
+    Das alte Format (Liste, mit Wiederholungen) wird wie beim Umstellen
+    umgewandelt (siehe ``vatertag.layout.kommentare_als_map``) und beim
+    nächsten Schreiben als Map gespeichert.
+    """
+    return {int(idx): text for idx, text in kommentare_als_map(daten.get("kommentare")).items()}
+
+
+@st.cache_resource
+def _prozess_zustand(spielname):
+    # Lock + Runden, die dieser Prozess schon geschrieben hat
+    return threading.Lock(), set()
+
+
+def _fehlende_schreiben(tx, spielname, neu, layout):
+    if layout in MIT_KOPF:
+        pfade = {j: spiel_pfad(spielname, "kommentare", dokument_id(j)) for j in neu}
+        vorhanden = {int(doc.id) for doc in tx.get_all(list(pfade.values())) if doc.exists}
+        for j, text in neu.items():
+            if j not in vorhanden:
+                tx.set(pfade[j], {"index": j, "text": text})
+        return
+
+    kommentare = (tx.get(spiel_pfad(spielname)).daten or {}).get("kommentare")
+    if not isinstance(kommentare, dict):
+        # Altes Listenformat auf einmal durch die Map ersetzen; vorhandene Kommentare bleiben
+        bisher = kommentare_als_map(kommentare)
+        fehlend = {dokument_id(j): text for j, text in neu.items() if dokument_id(j) not in bisher}
+        tx.update(spiel_pfad(spielname), {"kommentare": {**bisher, **fehlend}})
+        return
+    vorhanden = {int(idx) for idx in kommentare}
+    felder = {
+        feldpfad("kommentare", dokument_id(j)): text
+        for j, text in neu.items() if j not in vorhanden
+    }
+    if felder:
+        tx.update(spiel_pfad(spielname), felder)
+
+
+def kommentare_ergaenzen(db, spielname, daten, rundendaten, layout=DOKUMENT):
+    """Kommentiert alle abgeschlossenen Runden (alle außer der letzten), die noch keinen Kommentar haben.
+
+    Gibt alle Kommentare als ``{rundenindex: text}`` zurück.
+    """
+    kommentare = kommentare_nach_runde(daten)
+    fehlend = [j for j in range(len(rundendaten) - 1) if j not in kommentare]
+    if not fehlend:
+        return kommentare
+
+    neu = {j: kommentarblock(spielname, j, rundendaten[j]) for j in fehlend}
+    # Im Prozess nur eine Sitzung gleichzeitig, prozessübergreifend schützt die Transaktion
+    lock, geschrieben = _prozess_zustand(spielname)
+    with lock:
+        offen = {j: text for j, text in neu.items() if j not in geschrieben}
+        if offen:
+            db.transaktion(lambda tx: _fehlende_schreiben(tx, spielname, offen, layout))
+            geschrieben.update(offen)
+    return {**kommentare, **neu}
@@ -0,0 +1,76 @@
+"""Kompaktes Spieldokument (Layout ``kompakt``, siehe ``vatertag.layout``).
+
+Im bisherigen Dokument sind Einsätze und Plätze jeder Runde Maps mit dem
+Spielernamen als Schlüssel, und jeder Spieler trägt noch einmal seine
+Einsätze, Plätze, Gewinne und Punkte aller Runden – alles aus den Runden
+ableitbar. Im kompakten Format steht jeder Name genau einmal::
+
+    {
+        "format": 2,
+        "spieler": ["Anna", "Ben", "Carla"],
+        "multiplikatoren": [3, 2, 1],
+        "runden": [{"name": "Kicker", "einsaetze": [2, 1, None], "plaetze": [1, 3, 2]}],
+    }
+
+Die Spieler-ID ist die Position in ``spieler``; ``einsaetze`` und ``plaetze``
+einer Runde sind Zahlenlisten in dieser Reihenfolge (``None`` = noch nicht
+eingetragen). Firestore erlaubt keine Arrays in Arrays, deshalb bleibt jede
+Runde eine Map mit zwei Listen. Abgeleitete Felder (Spielerlisten, Punkte,
+``bonus_empfaenger``) werden nicht gespeichert, die Wertung rechnet sie beim
+Lesen neu.
+
+``dekodieren`` liest beide Formate und liefert immer das bisherige; Dokumente
+ohne ``format`` kommen unverändert zurück.
+"""
+
+FORMAT = 2
+
+_WERTE = ("einsaetze", "plaetze")
+
+
+def ist_kompakt(daten):
+    return bool(daten) and daten.get("format") == FORMAT
+
+
+def kodieren(daten):
+    """Kompakte Felder aus ``daten`` im bisherigen Format (ganz oder teilweise).
+
+    Die Listen einer Runde hängen an der Spielerreihenfolge, deshalb gehen
+    ``spieler`` und ``runden`` nur zusammen. Alle anderen Felder (etwa
+    ``multiplikatoren`` oder ``kommentare``) bleiben, wie sie sind.
+    """
+    if ("spieler" in daten) != ("runden" in daten):
+        raise ValueError("spieler und runden können nur zusammen kodiert werden")
+    felder = {key: wert for key, wert in daten.items() if key not in ("spieler", "runden")}
+    if "spieler" in daten:
+        namen = [sp["name"] for sp in daten["spieler"]]
+        felder["spieler"] = namen
+        felder["runden"] = [
+            {
+                "name": runde.get("name", ""),
+                **{feld: [runde.get(feld, {}).get(name) for name in namen] for feld in _WERTE},
+            }
+            for runde in daten["runden"]
+        ]
+    felder["format"] = FORMAT
+    return felder
+
+
+def dekodieren(daten):
+    """Spieldaten im bisherigen Format, egal in welchem sie gespeichert sind."""
+    if not ist_kompakt(daten):
+        return daten
+    namen = daten.get("spieler", [])
+    ergebnis = {key: wert for key, wert in daten.items() if key != "format"}
+    ergebnis["spieler"] = [{"name": name} for name in namen]
+    ergebnis["runden"] = [
+        {
+            "name": runde["name"],
+            **{
+                feld: {name: wert for name, wert in zip(namen, runde[feld]) if wert is not None}
+                for feld in _WERTE
+            },
+        }
+        for runde in daten.get("runden", [])
+    ]
+    return ergebnis
@@ -0,0 +1,329 @@
+"""Speicherlayouts für Spiele.
+
+DOKUMENT
+    Alles in ``spiele/<name>`` (bisheriges Schema).
+RUNDEN_SAMMLUNG
+    Kleines Kopfdokument ``spiele/<name>`` (Spielernamen, Multiplikatoren,
+    Rundenzahl), je Runde ein Dokument in ``spiele/<name>/runden/<nr>`` und
+    je Rundenkommentar eines in ``spiele/<name>/kommentare/<nr>``. Eine geänderte
+    Runde schreibt damit nur ein kleines Dokument, und lange Spiele stoßen
+    nicht an die 1-MiB-Grenze.
+EREIGNISSE
+    Kopfdokument wie bei RUNDEN_SAMMLUNG, dazu ``ereignis_nr`` und
+    ``schnappschuss_nr``. Jede Admin-Aktion ist ein Ereignis in
+    ``spiele/<name>/ereignisse/<nr>`` (siehe ``vatertag.ereignisse``), alle
+    ``SCHNAPPSCHUSS_ALLE`` Ereignisse steht der ganze Rundenstand in
+    ``spiele/<name>/schnappschuesse/<nr>``. Gelesen wird der letzte
+    Schnappschuss plus die Ereignisse danach. Ein Speichervorgang schreibt
+    nur wenige kleine Dokumente, und die Ereignisse bleiben als Protokoll
+    erhalten (etwa für strittige Ergebnisse).
+KOMPAKT
+    Alles in ``spiele/<name>`` wie bei DOKUMENT, aber im kompakten Format
+    (siehe ``vatertag.kompakt``): Spieler-IDs statt Namen in den Runden,
+    Einsätze und Plätze als Zahlenlisten, keine abgeleiteten Felder.
+
+``spiel_laden`` liefert für alle Layouts dasselbe Format wie das alte
+Dokument (das kompakte Format wird dabei dekodiert). Anlegen, Speichern und Löschen halten im selben Batch den
+Spielindex (``vatertag.spielindex``) aktuell. Umstellen eines bestehenden Spiels (Speicher wie in den Apps
+konfiguriert, siehe ``vatertag.speicher``) und Protokoll eines Spiels im Ereignis-Layout::
+
+    python -m vatertag.layout "Vatertagsspiele 2025"
+    python -m vatertag.layout "Vatertagsspiele 2025" --layout ereignisse
+    python -m vatertag.layout "Vatertagsspiele 2025" --layout kompakt
+    python -m vatertag.layout "Vatertagsspiele 2025" --protokoll
+"""
+
+import re
+
+from vatertag import anzeigetafel, ereignisse, kompakt, spielindex
+from vatertag.anzeigetafel import tafel_pfad
+from vatertag.speicher import ZEITSTEMPEL
+
+DOKUMENT = "dokument"
+RUNDEN_SAMMLUNG = "runden_sammlung"
+EREIGNISSE = "ereignisse"
+KOMPAKT = "kompakt"
+
+# Layouts mit kleinem Kopfdokument (Runden und Kommentare liegen in Untersammlungen)
+MIT_KOPF = (RUNDEN_SAMMLUNG, EREIGNISSE)
+
+SCHNAPPSCHUSS_ALLE = 50  # Ereignisse zwischen zwei Schnappschüssen
+
+BATCH_GROESSE = 400  # Firestore erlaubt höchstens 500 Schreibvorgänge pro Batch
+
+# Überschrift eines Kommentars im alten Listenformat: "### 🕓 Runde 3: *Kicker* (14:05)"
+_LISTEN_UEBERSCHRIFT = re.compile(r"#+\s.*?\bRunde (\d+)\b")
+
+
+def dokument_id(idx):
+    # Führende Nullen, damit die Dokument-IDs in Rundenreihenfolge sortieren
+    return f"{idx:05d}"
+
+
+def kommentare_als_map(kommentare):
+    """Gespeicherte Kommentare als ``{dokument_id(rundenindex): text}``.
+
+    Das alte Listenformat (ein Block je Runde, teils mehrfach angehängt) wird
+    anhand der Rundennummer in der Überschrift umgewandelt; je Runde zählt der
+    erste Block, Blöcke ohne Rundennummer entfallen.
+    """
+    if isinstance(kommentare, dict):
+        return {dokument_id(int(idx)): text for idx, text in kommentare.items()}
+    ergebnis = {}
+    for text in kommentare if isinstance(kommentare, list) else []:
+        treffer = _LISTEN_UEBERSCHRIFT.match(text) if isinstance(text, str) else None
+        if treffer and int(treffer.group(1)) > 0:
+            ergebnis.setdefault(dokument_id(int(treffer.group(1)) - 1), text)
+    return ergebnis
+
+
+def spiel_pfad(spielname, *unterpfad):
+    return "/".join(("spiele", spielname) + unterpfad)
+
+
+def ereignis_id(nr):
+    return f"{nr:08d}"
+
+
+def _runden_wiederherstellen(db, spielname, kopf_daten):
+    # Letzter Schnappschuss plus die Ereignisse danach
+    nr = kopf_daten.get("schnappschuss_nr", 0)
+    schnappschuss = db.get(spiel_pfad(spielname, "schnappschuesse", ereignis_id(nr))).daten or {}
+    rest = db.list(spiel_pfad(spielname, "ereignisse"), ab=ereignis_id(nr + 1))
+    return ereignisse.anwenden(schnappschuss.get("runden", []), [doc.daten for doc in rest])
+
+
+def spiel_laden(db, spielname):
+    """Liest ein Spiel in allen Layouts; ``None``, wenn es nicht existiert.
+
+    ``update_time`` ist der Zeitpunkt der letzten Änderung des Spieldokuments.
+    """
+    doc = db.get(spiel_pfad(spielname))
+    if not doc.exists:
+        return None
+    daten = doc.daten
+    daten["update_time"] = doc.update_time
+    if daten.get("layout") not in MIT_KOPF:
+        return kompakt.dekodieren(daten)
+
+    if daten["layout"] == EREIGNISSE:
+        daten["runden"] = _runden_wiederherstellen(db, spielname, daten)
+    else:
+        runden = []
+        for runde_doc in db.list(spiel_pfad(spielname, "runden")):
+            runde = runde_doc.daten
+            runde.pop("index", None)
+            runden.append(runde)
+        daten["runden"] = runden
+    daten["kommentare"] = {
+        k.daten["index"]: k.daten["text"] for k in db.list(spiel_pfad(spielname, "kommentare"))
+    }
+    return daten
+
+
+def kopf(daten, layout=RUNDEN_SAMMLUNG):
+    """Kopfdokument ohne Runden, Kommentare und abgeleitete Spielerlisten."""
+    eintrag = {"layout": layout}
+    if "spieler" in daten:
+        eintrag["spieler"] = [{"name": sp["name"]} for sp in daten["spieler"]]
+    if "multiplikatoren" in daten:
+        eintrag["multiplikatoren"] = daten["multiplikatoren"]
+    if "runden" in daten:
+        eintrag["rundenzahl"] = len(daten["runden"])
+    return eintrag
+
+
+def runde_pfad(spielname, idx):
+    return spiel_pfad(spielname, "runden", dokument_id(idx))
+
+
+def schnappschuss_schreiben(batch, spielname, nr, runden):
+    batch.set(spiel_pfad(spielname, "schnappschuesse", ereignis_id(nr)), {
+        "runden": [ereignisse.kern(runde) for runde in runden],
+        "zeitstempel": ZEITSTEMPEL,
+    })
+
+
+def ereignisse_anhaengen(tx, spielname, felder):
+    """Hängt ``felder["ereignisse"]`` an das Protokoll an und aktualisiert das Kopfdokument.
+
+    Läuft in einer Transaktion: die nächste Ereignisnummer steht im Kopf.
+    Ist seit dem letzten Schnappschuss ``SCHNAPPSCHUSS_ALLE`` mal etwas
+    passiert, wird ``felder["runden"]`` als neuer Schnappschuss geschrieben.
+    """
+    alt = tx.get(spiel_pfad(spielname)).daten or {}
+    nr = alt.get("ereignis_nr", 0)
+    for ereignis in felder.get("ereignisse", []):
+        nr += 1
+        tx.set(spiel_pfad(spielname, "ereignisse", ereignis_id(nr)), {**ereignis, "zeitstempel": ZEITSTEMPEL})
+    eintrag = {**kopf(felder, EREIGNISSE), "ereignis_nr": nr, "zeitstempel": ZEITSTEMPEL}
+    if "runden" in felder and nr - alt.get("schnappschuss_nr", 0) >= SCHNAPPSCHUSS_ALLE:
+        schnappschuss_schreiben(tx, spielname, nr, felder["runden"])
+        eintrag["schnappschuss_nr"] = nr
+    tx.update(spiel_pfad(spielname), eintrag)
+
+
+def spiel_anlegen(db, spielname, daten, layout=DOKUMENT):
+    spielindex.sicherstellen(db)
+    batch = db.batch()
+    if layout == EREIGNISSE:
+        # Schnappschuss 0 ist der Ausgangsstand, danach nur noch Ereignisse
+        batch.set(spiel_pfad(spielname), {
+            **kopf(daten, EREIGNISSE), "ereignis_nr": 0, "schnappschuss_nr": 0, "zeitstempel": ZEITSTEMPEL,
+        })
+        schnappschuss_schreiben(batch, spielname, 0, daten.get("runden", []))
+    elif layout == KOMPAKT:
+        batch.set(spiel_pfad(spielname), {**kompakt.kodieren(daten), "layout": KOMPAKT})
+    elif layout == RUNDEN_SAMMLUNG:
+        batch.set(spiel_pfad(spielname), {**kopf(daten), "zeitstempel": ZEITSTEMPEL})
+        for idx, runde in enumerate(daten.get("runden", [])):
+            batch.set(runde_pfad(spielname, idx), {**runde, "index": idx})
+    else:
+        batch.set(spiel_pfad(spielname), daten)
+    batch.update(spielindex.INDEX_PFAD, spielindex.eintrag_felder(spielname, daten))
+    batch.commit()
+
+
+def spiel_loeschen(db, spielname):
+    """Löscht Spiel, Unterdokumente (Runden, Kommentare, Ereignisse), Anzeigetafel und Indexeintrag."""
+    sammlungen = [
+        spiel_pfad(spielname, unter) for unter in ("runden", "kommentare", "ereignisse", "schnappschuesse")
+    ] + [tafel_pfad(spielname, "runden")]
+    unterdokumente = [doc.pfad for sammlung in sammlungen for doc in db.list(sammlung)]
+    for start in range(0, len(unterdokumente), BATCH_GROESSE):
+        batch = db.batch()
+        for pfad in unterdokumente[start:start + BATCH_GROESSE]:
+            batch.delete(pfad)
+        batch.commit()
+
+    spielindex.sicherstellen(db)
+    batch = db.batch()
+    batch.delete(spiel_pfad(spielname))
+    batch.delete(tafel_pfad(spielname))
+    batch.update(spielindex.INDEX_PFAD, spielindex.austragen_felder(spielname))
+    batch.commit()
+
+
+def aenderungen_schreiben(db, spielname, felder, geaenderte_runden=(), layout=DOKUMENT):
+    """Schreibt geänderte Felder in einem Batch; im Runden-Layout nur die geänderten Runden.
+
+    Im Ereignis-Layout werden ``felder["ereignisse"]`` angehängt (siehe
+    ``ereignisse_anhaengen``), im Kompakt-Layout werden ``spieler`` und
+    ``runden`` kodiert (nur zusammen, siehe ``vatertag.kompakt``). Ein Feld ``anzeigetafel`` landet als Delta im
+    eigenen Dokument (siehe ``vatertag.anzeigetafel.schreiben``). Beides liest
+    vorher den alten Stand und läuft deshalb in einer Transaktion.
+    """
+    felder = dict(felder)
+    tafel = felder.pop("anzeigetafel", None)
+
+    def schreiben(batch):
+        if layout == EREIGNISSE:
+            if felder:
+                ereignisse_anhaengen(batch, spielname, felder)
+        elif layout == KOMPAKT:
+            if felder:
+                batch.update(spiel_pfad(spielname), {**kompakt.kodieren(felder), "zeitstempel": ZEITSTEMPEL})
+        elif layout != RUNDEN_SAMMLUNG:
+            if felder:
+                batch.update(spiel_pfad(spielname), {**felder, "zeitstempel": ZEITSTEMPEL})
+        else:
+            for idx in sorted(geaenderte_runden):
+                batch.set(runde_pfad(spielname, idx), {**felder["runden"][idx], "index": idx})
+            if felder:
+                batch.update(spiel_pfad(spielname), {**kopf(felder), "zeitstempel": ZEITSTEMPEL})
+        if felder:
+            batch.update(spielindex.INDEX_PFAD, spielindex.eintrag_felder(spielname, felder))
+        if tafel is not None:
+            anzeigetafel.schreiben(batch, spielname, tafel)
+
+    if tafel is not None or (layout == EREIGNISSE and felder):
+        db.transaktion(schreiben)
+    else:
+        batch = db.batch()
+        schreiben(batch)
+        batch.commit()
+
+
+def migrieren(db, spielname, layout=RUNDEN_SAMMLUNG):
+    """Stellt ein Spiel vom Dokument- oder Kompakt-Layout auf ein anderes Layout um.
+
+    Zwischen Dokument- und Kompakt-Layout wird nur das Spieldokument neu
+    geschrieben. Sonst kommen Runden (bzw. der Schnappschuss 0) zuerst, das
+    Kopfdokument zuletzt; bis dahin lesen alle Apps weiter das alte Layout.
+    Kommentare im alten Listenformat werden dabei in die Map nach
+    Rundenindex umgewandelt (siehe ``kommentare_als_map``). Gibt die
+    Rundenzahl zurück oder ``None``, wenn nichts zu tun war.
+    """
+    doc = db.get(spiel_pfad(spielname))
+    if not doc.exists:
+        raise KeyError(spielname)
+    daten = kompakt.dekodieren(doc.daten)
+    if daten.get("layout", DOKUMENT) == layout:
+        return None
+    if daten.get("layout") in MIT_KOPF:
+        raise ValueError(f"{spielname}: Umstellen geht nur vom Dokument- oder Kompakt-Layout aus")
+    if "kommentare" in daten:
+        daten["kommentare"] = kommentare_als_map(daten["kommentare"])
+    if layout in (DOKUMENT, KOMPAKT):
+        neu = kompakt.kodieren(daten) if layout == KOMPAKT else daten
+        db.set(spiel_pfad(spielname), {**neu, "layout": layout})
+        return len(daten.get("runden", []))
+
+    if layout == EREIGNISSE:
+        runden_vorgaenge = [(
+            spiel_pfad(spielname, "schnappschuesse", ereignis_id(0)),
+            {"runden": [ereignisse.kern(runde) for runde in daten.get("runden", [])]},
+        )]
+    else:
+        runden_vorgaenge = [
+            (runde_pfad(spielname, idx), {**runde, "index": idx})
+            for idx, runde in enumerate(daten.get("runden", []))
+        ]
+    schreibvorgaenge = runden_vorgaenge + [
+        (spiel_pfad(spielname, "kommentare", idx), {"index": int(idx), "text": text})
+        for idx, text in daten.get("kommentare", {}).items()
+    ]
+    for start in range(0, len(schreibvorgaenge), BATCH_GROESSE):
+        batch = db.batch()
+        for pfad, inhalt in schreibvorgaenge[start:start + BATCH_GROESSE]:
+            batch.set(pfad, inhalt)
+        batch.commit()
+
+    kopf_daten = {
+        key: wert for key, wert in daten.items()
+        if key not in ("spieler", "multiplikatoren", "runden", "kommentare")
+    }
+    if layout == EREIGNISSE:
+        kopf_daten.update(ereignis_nr=0, schnappschuss_nr=0)
+    db.set(spiel_pfad(spielname), {**kopf_daten, **kopf(daten, layout)})
+    return len(daten.get("runden", []))
+
+
+def protokoll(db, spielname):
+    """Alle Ereignisse eines Spiels im Ereignis-Layout, älteste zuerst."""
+    return db.list(spiel_pfad(spielname, "ereignisse"))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from vatertag.speicher import einstellung, speicher_oeffnen
+
+    parser = argparse.ArgumentParser(description="Spiel auf ein anderes Speicherlayout umstellen")
+    parser.add_argument("spielname")
+    parser.add_argument("--layout", choices=(DOKUMENT, KOMPAKT) + MIT_KOPF, default=RUNDEN_SAMMLUNG)
+    parser.add_argument("--protokoll", action="store_true", help="Ereignisse ausgeben statt umzustellen")
+    args = parser.parse_args()
+    db = speicher_oeffnen(einstellung("speicher", "firestore"))
+
+    if args.protokoll:
+        for doc in protokoll(db, args.spielname):
+            zeit = doc.daten.get("zeitstempel")
+            print(f"{doc.id}  {zeit.astimezone():%d.%m.%Y %H:%M:%S}  {ereignisse.beschreiben(doc.daten)}")
+        raise SystemExit
+
+    anzahl = migrieren(db, args.spielname, args.layout)
+    if anzahl is None:
+        print(f"'{args.spielname}' nutzt bereits das Layout {args.layout}.")
+    else:
+        print(f"'{args.spielname}' umgestellt: {anzahl} Runden.")
@@ -0,0 +1,87 @@
+"""Live-Updates per Listener statt Polling.
+
+Pro Prozess und Spiel läuft ein Listener (``Speicher.listen``, bei Firestore
+``on_snapshot``), der den neuesten
+Stand in einem gemeinsamen Cache hält. Sitzungen lesen nur noch aus diesem
+Cache und prüfen in einem kleinen Fragment, ob es eine neue Version gibt;
+nur dann läuft die Seite neu. Lesezugriffe hängen damit nicht mehr
+von Anzahl der Zuschauer × Aktualisierungsrate ab. Bei Anzeigetafeln lädt der
+Listener nur die geänderten Runden nach (siehe ``vatertag.anzeigetafel.Spiegel``).
+"""
+
+import threading
+
+import streamlit as st
+
+from vatertag import anzeigetafel, kompakt
+from vatertag.layout import MIT_KOPF, spiel_laden
+
+PRUEF_INTERVALL = 0.5  # Sekunden; prüft nur den Cache, liest nichts aus dem Speicher
+
+# Kommentare schreiben die Viewer selbst; sie dürfen keinen Rerun auslösen,
+# sonst stoßen sich die Viewer gegenseitig an.
+OHNE_RERUN = ("kommentare", "update_time")
+
+
+def _relevant(daten):
+    return {k: v for k, v in daten.items() if k not in OHNE_RERUN} if daten else daten
+
+
+class LiveSpiel:
+    def __init__(self, db, spielname, sammlung="spiele"):
+        self.db = db
+        self.spielname = spielname
+        self.version = 0
+        self.daten = None
+        self._bereit = threading.Event()
+        self._lock = threading.Lock()
+        self._spiegel = anzeigetafel.Spiegel(db, spielname) if sammlung == anzeigetafel.SAMMLUNG else None
+        self._abmelden = db.listen(f"{sammlung}/{spielname}", self._bei_aenderung)
+
+    def _bei_aenderung(self, dokument):
+        daten = dokument.daten
+        if daten is not None and daten.get("layout") in MIT_KOPF:
+            # Runden liegen in Untersammlungen: einmal pro Änderung und Prozess nachladen
+            daten = spiel_laden(self.db, self.spielname)
+        elif daten is not None and self._spiegel is not None and "version" in daten:
+            # Delta-Tafel: nur Runden mit neuerer Version nachladen
+            daten = self._spiegel.anwenden(daten)
+        else:
+            daten = kompakt.dekodieren(daten)
+        if daten is not None:
+            daten["update_time"] = dokument.update_time
+
+        with self._lock:
+            if self.version == 0 or _relevant(daten) != _relevant(self.daten):
+                self.version += 1
+            self.daten = daten
+        self._bereit.set()
+
+    def stand(self, timeout=10):
+        """``(version, daten)``; wartet beim ersten Aufruf auf den ersten Snapshot.
+
+        ``daten`` wird von allen Sitzungen geteilt und darf nicht verändert werden.
+        """
+        self._bereit.wait(timeout)
+        with self._lock:
+            return self.version, self.daten
+
+    def beenden(self):
+        self._abmelden()
+
+
+@st.cache_resource
+def live_spiel(_db, spielname, sammlung="spiele"):
+    """Gemeinsamer Listener für alle Sitzungen dieses Prozesses.
+
+    Mit ``sammlung="anzeigetafeln"`` wird statt des Spiels die vorberechnete
+    Anzeigetafel beobachtet.
+    """
+    return LiveSpiel(_db, spielname, sammlung)
+
+
+@st.fragment(run_every=PRUEF_INTERVALL)
+def bei_aenderung_neu_laden(live, version):
+    """Lädt die Seite neu, sobald der Listener eine neuere Version als ``version`` hat."""
+    if live.version != version:
+        st.rerun()
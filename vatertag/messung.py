@@ -0,0 +1,174 @@
+"""Zeitmessung der heißen Pfade und Zählung der Speicherzugriffe.
+
+``spanne("name")`` misst einen Abschnitt (als ``with`` oder als Dekorator),
+``zaehlen("lesen", n)`` zählt Dokumente, die gelesen bzw. geschrieben werden
+(siehe ``vatertag.speicher``). Beides landet in den Prozess-Summen und – wenn
+der Abschnitt in einem Skriptlauf zwischen ``start()`` und ``ende()`` liegt –
+im aktuellen ``Lauf``. Listener und Hintergrund-Threads zählen nur im Prozess.
+
+Die Apps rufen ``ende()`` in einem ``finally``; so zählen auch Läufe, die mit
+``st.stop()``, ``st.rerun()`` oder einem Fehler enden. Danach löst jeder
+Streamlit-Aufruf erneut die Ausnahme aus, deshalb holt ``start()`` schon
+Sitzungssummen und Einstellungen, und ``ende()`` zeichnet höchstens noch das
+Panel.
+
+Mit ``?debug=1`` in der URL (oder Einstellung ``debug``) zeigt ``ende()`` ein
+Panel mit den Abschnitten des Laufs und den Zugriffen der Sitzung. Die
+Einstellung ``metriken`` schreibt nach jedem Lauf eine Datei: ``*.prom`` als
+Prometheus-Text mit den Prozess-Summen, sonst eine JSON-Zeile pro Lauf.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import streamlit as st
+
+_lock = threading.Lock()
+_aktuell = threading.local()
+
+# Prozess-Summen: je Abschnitt [anzahl, sekunden, max], dazu Zugriffe
+_abschnitte = {}
+_zugriffe = {"lesen": 0, "schreiben": 0}
+
+
+class Lauf:
+    """Messwerte eines Skriptlaufs."""
+
+    def __init__(self, app, sitzung=None, datei="", debug=False):
+        self.app = app
+        self.sitzung = sitzung  # Summen der Sitzung (liegt in st.session_state)
+        self.datei = datei
+        self.debug = debug
+        self.beginn = time.perf_counter()
+        self.abschnitte = {}  # name -> [anzahl, sekunden]
+        self.zugriffe = {"lesen": 0, "schreiben": 0}
+
+    def erfassen(self, name, dauer):
+        eintrag = self.abschnitte.setdefault(name, [0, 0.0])
+        eintrag[0] += 1
+        eintrag[1] += dauer
+
+
+def _erfassen(name, dauer):
+    with _lock:
+        eintrag = _abschnitte.setdefault(name, [0, 0.0, 0.0])
+        eintrag[0] += 1
+        eintrag[1] += dauer
+        eintrag[2] = max(eintrag[2], dauer)
+    lauf = getattr(_aktuell, "lauf", None)
+    if lauf is not None:
+        lauf.erfassen(name, dauer)
+
+
+@contextmanager
+def spanne(name):
+    """Misst die Dauer des Abschnitts ``name``."""
+    beginn = time.perf_counter()
+    try:
+        yield
+    finally:
+        _erfassen(name, time.perf_counter() - beginn)
+
+
+def zaehlen(art, anzahl=1):
+    """Zählt ``anzahl`` gelesene (``art="lesen"``) bzw. geschriebene Dokumente."""
+    with _lock:
+        _zugriffe[art] += anzahl
+    lauf = getattr(_aktuell, "lauf", None)
+    if lauf is not None:
+        lauf.zugriffe[art] += anzahl
+
+
+def start(app):
+    """Beginnt die Messung eines Skriptlaufs (am Anfang des App-Skripts)."""
+    from vatertag.speicher import einstellung
+
+    sitzung = st.session_state.setdefault("messung", {"id": uuid.uuid4().hex[:8], "laeufe": 0, "lesen": 0, "schreiben": 0})
+    debug = bool(st.query_params.get("debug") or einstellung("debug", ""))
+    _aktuell.lauf = Lauf(app, sitzung, einstellung("metriken", ""), debug)
+    return _aktuell.lauf
+
+
+def ende(lauf):
+    """Schließt den Lauf ab: Sitzungssummen, Export und (mit ``debug``) das Panel."""
+    _aktuell.lauf = None
+    lauf.erfassen("rerun", time.perf_counter() - lauf.beginn)
+
+    sitzung = lauf.sitzung
+    sitzung["laeufe"] += 1
+    for art, anzahl in lauf.zugriffe.items():
+        sitzung[art] += anzahl
+
+    if lauf.datei:
+        exportieren(lauf.datei, lauf, sitzung["id"])
+
+    if lauf.debug:
+        # Nach st.stop()/st.rerun() löst das erneut die Ausnahme aus; gezählt ist dann schon alles
+        panel(lauf, sitzung)
+
+
+def panel(lauf, sitzung):
+    with st.expander("⏱️ Messung (dieser Lauf)"):
+        spalten = st.columns(4)
+        spalten[0].metric("Gelesen", lauf.zugriffe["lesen"], f"Sitzung: {sitzung['lesen']}", delta_color="off")
+        spalten[1].metric("Geschrieben", lauf.zugriffe["schreiben"], f"Sitzung: {sitzung['schreiben']}", delta_color="off")
+        spalten[2].metric("Rerun", f"{lauf.abschnitte['rerun'][1] * 1000:.1f} ms")
+        spalten[3].metric("Läufe", sitzung["laeufe"])
+        st.table([
+            {"Abschnitt": name, "Anzahl": anzahl, "ms": round(sekunden * 1000, 2)}
+            for name, (anzahl, sekunden) in sorted(lauf.abschnitte.items(), key=lambda e: -e[1][1])
+        ])
+
+
+def prometheus_text():
+    """Prozess-Summen im Prometheus-Textformat."""
+    with _lock:
+        abschnitte = {name: list(werte) for name, werte in _abschnitte.items()}
+        zugriffe = dict(_zugriffe)
+    zeilen = [
+        "# TYPE vatertag_abschnitt_sekunden summary",
+    ]
+    for name, (anzahl, sekunden, _) in sorted(abschnitte.items()):
+        zeilen.append(f'vatertag_abschnitt_sekunden_count{{abschnitt="{name}"}} {anzahl}')
+        zeilen.append(f'vatertag_abschnitt_sekunden_sum{{abschnitt="{name}"}} {sekunden:.6f}')
+    zeilen.append("# TYPE vatertag_abschnitt_max_sekunden gauge")
+    for name, (_, _, maximum) in sorted(abschnitte.items()):
+        zeilen.append(f'vatertag_abschnitt_max_sekunden{{abschnitt="{name}"}} {maximum:.6f}')
+    for art, anzahl in zugriffe.items():
+        zeilen.append(f"# TYPE vatertag_speicher_{art}_total counter")
+        zeilen.append(f"vatertag_speicher_{art}_total {anzahl}")
+    return "\n".join(zeilen) + "\n"
+
+
+def exportieren(datei, lauf, sitzung_id):
+    """``*.prom``: Prozess-Summen ersetzen; sonst eine JSON-Zeile für diesen Lauf anhängen."""
+    if datei.endswith(".prom"):
+        # Eigene temporäre Datei je Aufruf: Sitzungen sind Threads im selben Prozess
+        fd, neu = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(datei)), prefix=".metriken-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(prometheus_text())
+            os.chmod(neu, 0o644)  # mkstemp legt 0600 an; der Scraper muss lesen dürfen
+            os.replace(neu, datei)
+        except BaseException:
+            os.unlink(neu)
+            raise
+        return
+    zeile = {
+        "zeit": datetime.now(timezone.utc).isoformat(),
+        "app": lauf.app,
+        "sitzung": sitzung_id,
+        "abschnitte": {
+            name: {"anzahl": anzahl, "ms": round(sekunden * 1000, 3)}
+            for name, (anzahl, sekunden) in lauf.abschnitte.items()
+        },
+        **lauf.zugriffe,
+    }
+    with _lock, open(datei, "a", encoding="utf-8") as f:
+        f.write(json.dumps(zeile, ensure_ascii=False) + "\n")
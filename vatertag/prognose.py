@@ -0,0 +1,168 @@
+"""Sieg- und Podiumschancen per Monte-Carlo-Simulation.
+
+Ausgehend vom aktuellen Punktestand werden die restlichen Runden viele
+tausend Mal ausgespielt: Einsätze und Plätze werden gezogen, die Auszahlung
+folgt denselben Regeln wie die Wertung (Multiplikatoren, Rubber-Banding, siehe
+``vatertag.wertung_numpy``). Alle Simulationen laufen gleichzeitig als
+Simulationen × Spieler-Matrix, nur über die Runden geht eine Schleife.
+
+Verteilungen (``verteilung``):
+
+``bisher``
+    Je Spieler die bisherigen Einsätze bzw. Plätze (mit je einem Zusatzeintrag
+    pro Wert, damit nichts unmöglich wird). Wer bisher oft vorne lag, liegt in
+    der Simulation öfter vorne.
+``gleich``
+    Jeder Einsatz von 0 bis ``MAX_EINSATZ`` gleich wahrscheinlich, die Plätze
+    eine zufällige Reihenfolge.
+
+Die Simulationen werden in Blöcken mit eigenem Zufallsstrom gerechnet; mit
+``prozesse`` > 1 verteilen sich die Blöcke auf einen Prozesspool. Das
+Ergebnis hängt nur von ``seed`` ab, nicht von der Zahl der Prozesse.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from vatertag.messung import spanne
+from vatertag.wertung import ALLE_LETZTEN, EIN_LETZTER
+from vatertag.wertung_numpy import auszahlungsfaktoren
+
+SIMULATIONEN = 100_000
+BLOCK = 10_000  # Simulationen pro Block (und pro Aufgabe im Prozesspool)
+MAX_EINSATZ = 3  # wie in der Admin-App
+PODIUM = 3
+TABELLE = 4096  # Stufen beim Ziehen; Wahrscheinlichkeiten auf 1/4096 genau
+
+BISHER = "bisher"
+GLEICH = "gleich"
+
+
+def haeufigkeiten(werte, anzahl, glaettung=1.0):
+    """Wahrscheinlichkeiten je Spieler für die Werte ``0..anzahl-1`` aus bisherigen Werten.
+
+    ``werte`` ist pro Spieler eine Liste; Werte außerhalb werden ignoriert,
+    ``glaettung`` wird zu jeder Häufigkeit addiert.
+    """
+    zaehler = np.full((len(werte), anzahl), glaettung, dtype=float)
+    for s, liste in enumerate(werte):
+        liste = np.asarray(liste, dtype=np.int64)
+        liste = liste[(liste >= 0) & (liste < anzahl)]
+        zaehler[s] += np.bincount(liste, minlength=anzahl)
+    return zaehler / zaehler.sum(axis=1, keepdims=True)
+
+
+def verteilungen(tafel, verteilung=BISHER):
+    """``(einsatz_p, platz_p)`` für die Spieler der Tafel (Reihenfolge wie ``tafel["rangliste"]``)."""
+    spieler = tafel["rangliste"]
+    if verteilung == GLEICH:
+        return np.full((len(spieler), MAX_EINSATZ + 1), 1 / (MAX_EINSATZ + 1)), None
+    # Plätze ab 1, Index 0 ist Platz 1
+    platz_p = haeufigkeiten([[p - 1 for p in sp["plaetze"]] for sp in spieler], len(spieler))
+    return haeufigkeiten([sp["einsaetze"] for sp in spieler], MAX_EINSATZ + 1), platz_p
+
+
+def _tabelle(p):
+    # Inverse Verteilungsfunktion je Spieler auf TABELLE Stufen: Ziehen ist dann nur ein Zugriff
+    kumuliert = np.cumsum(p, axis=1)
+    kumuliert[:, -1] = 1.0
+    stufen = (np.arange(TABELLE) + 0.5) / TABELLE
+    return np.stack([np.searchsorted(zeile, stufen, side="right") for zeile in kumuliert])
+
+
+def _ziehen(rng, tabelle, anzahl):
+    # Je Spieler ein Wert aus seiner Verteilung, für ``anzahl`` Simulationen
+    spieler = np.arange(len(tabelle))
+    return tabelle[spieler, rng.integers(0, TABELLE, (anzahl, len(tabelle)))]
+
+
+def _block(stand, multiplikatoren, runden, erste_runde, regel, einsatz_p, platz_p, anzahl, seed):
+    """Endstände von ``anzahl`` Simulationen (Simulationen × Spieler)."""
+    rng = np.random.default_rng(seed)
+    einsatz_tabelle = _tabelle(einsatz_p)
+    platz_tabelle = None if platz_p is None else _tabelle(platz_p)
+    staende = np.tile(np.asarray(stand, dtype=float), (anzahl, 1))
+    zeilen = np.arange(anzahl)
+    for r in range(runden):
+        einsaetze = _ziehen(rng, einsatz_tabelle, anzahl)
+        # Plätze als Rangfolge: gezogener Platz plus Zufall zum Auflösen von Gleichständen
+        wertung = rng.random((anzahl, len(stand)))
+        if platz_tabelle is not None:
+            wertung += _ziehen(rng, platz_tabelle, anzahl)
+        plaetze = wertung.argsort(axis=1).argsort(axis=1) + 1
+
+        faktoren = auszahlungsfaktoren(plaetze, multiplikatoren)
+        gewinne = einsaetze * faktoren
+        if regel == EIN_LETZTER:
+            bonus = np.zeros_like(gewinne, dtype=bool)
+            bonus[zeilen, staende.argmin(axis=1)] = True
+            gewinne[bonus & (faktoren < 0)] = 0.0
+        elif erste_runde + r > 0:
+            bonus = staende == staende.min(axis=1, keepdims=True)
+            gewinne[bonus & (faktoren < 0)] = 0.0
+        staende += gewinne
+    return staende
+
+
+def _auswerten(staende):
+    # Sieg: Anteil bei Gleichstand an der Spitze geteilt; Podium: weniger als PODIUM Spieler davor
+    spitze = staende == staende.max(axis=1, keepdims=True)
+    siege = (spitze / spitze.sum(axis=1, keepdims=True)).sum(axis=0)
+    davor = (staende[:, None, :] > staende[:, :, None]).sum(axis=2)
+    return siege, (davor < PODIUM).sum(axis=0)
+
+
+def _block_auswerten(args):
+    return _auswerten(_block(*args))
+
+
+@spanne("prognose")
+def simulieren(
+    stand, multiplikatoren, runden, einsatz_p, platz_p=None, regel=ALLE_LETZTEN, erste_runde=0,
+    simulationen=SIMULATIONEN, prozesse=1, seed=0,
+):
+    """Sieg- und Podiumswahrscheinlichkeit je Spieler nach ``runden`` weiteren Runden.
+
+    ``stand`` sind die aktuellen Punkte, ``erste_runde`` der Index der nächsten
+    Runde im Spiel (für "kein Bonus in Runde 1"). ``einsatz_p`` und
+    ``platz_p`` kommen aus ``verteilungen``. Rückgabe: ``(sieg, podium)`` als
+    Arrays in Spielerreihenfolge.
+    """
+    groessen = [min(BLOCK, simulationen - start) for start in range(0, simulationen, BLOCK)]
+    seeds = np.random.SeedSequence(seed).spawn(len(groessen))
+    aufgaben = [
+        (stand, multiplikatoren, runden, erste_runde, regel, einsatz_p, platz_p, anzahl, s)
+        for anzahl, s in zip(groessen, seeds)
+    ]
+    if prozesse > 1 and len(aufgaben) > 1:
+        with ProcessPoolExecutor(max_workers=prozesse) as pool:
+            ergebnisse = list(pool.map(_block_auswerten, aufgaben))
+    else:
+        ergebnisse = [_block_auswerten(aufgabe) for aufgabe in aufgaben]
+    siege = sum(e[0] for e in ergebnisse)
+    podium = sum(e[1] for e in ergebnisse)
+    return siege / simulationen, podium / simulationen
+
+
+def prognose(tafel, runden_gesamt, verteilung=BISHER, simulationen=SIMULATIONEN, prozesse=1, seed=0):
+    """Chancen für eine Anzeigetafel (siehe ``vatertag.anzeigetafel``) bei ``runden_gesamt`` Runden.
+
+    Gibt ``[{"name", "punkte", "sieg", "podium"}]`` nach Siegchance sortiert
+    zurück, oder ``None``, wenn keine Runde mehr offen ist oder der Tafel die
+    Multiplikatoren fehlen (ältere Tafeln).
+    """
+    gespielt = len(tafel["runden"])
+    if runden_gesamt <= gespielt or "multiplikatoren" not in tafel:
+        return None
+    spieler = tafel["rangliste"]
+    einsatz_p, platz_p = verteilungen(tafel, verteilung)
+    sieg, podium = simulieren(
+        [sp["punkte"] for sp in spieler], tafel["multiplikatoren"], runden_gesamt - gespielt,
+        einsatz_p, platz_p, tafel.get("regel", ALLE_LETZTEN), gespielt, simulationen, prozesse, seed,
+    )
+    eintraege = [
+        {"name": sp["name"], "punkte": sp["punkte"], "sieg": float(s), "podium": float(p)}
+        for sp, s, p in zip(spieler, sieg, podium)
+    ]
+    return sorted(eintraege, key=lambda e: (-e["sieg"], -e["podium"]))
@@ -0,0 +1,551 @@
+"""Austauschbarer Speicher für Spielstände.
+
+Alle Apps greifen über dieselbe kleine Schnittstelle auf Dokumente zu
+(Pfade wie ``spiele/<name>`` oder ``spiele/<name>/runden/00001``):
+``get``, ``get_all``, ``set``, ``update``, ``delete``, ``list``, ``listen``
+sowie ``batch()`` und ``transaktion()``.
+
+Implementierungen:
+
+``firestore``
+    Firestore über ``firebase_admin`` (Zugangsdaten aus
+    ``st.secrets["firebase_service_account"]``).
+``speicher``
+    Im Arbeitsspeicher des Prozesses, z. B. für Lasttests ohne Netz.
+``sqlite:<datei>``
+    Lokale SQLite-Datei, z. B. für Veranstaltungen offline am Laptop.
+
+Ausgewählt wird per Umgebungsvariable ``VATERTAG_SPEICHER`` oder dem Secret
+``speicher`` (Standard: ``firestore``).
+
+Gelesene und geschriebene Dokumente werden gezählt, Zugriffe gemessen
+(siehe ``vatertag.messung``).
+"""
+
+import copy
+import json
+import os
+import re
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import streamlit as st
+
+from vatertag.messung import spanne, zaehlen
+
+# Platzhalter für "Zeit des Schreibens" (Firestore: SERVER_TIMESTAMP)
+ZEITSTEMPEL = object()
+# Platzhalter in ``update()``: Feld entfernen (Firestore: DELETE_FIELD)
+FELD_LOESCHEN = object()
+
+POLL_INTERVALL = 0.5  # Sekunden, SQLite-Listener
+
+
+class Dokument(namedtuple("Dokument", ["pfad", "daten", "update_time"])):
+    """Gelesenes Dokument; ``daten`` ist ``None``, wenn es nicht existiert."""
+
+    @property
+    def id(self):
+        return self.pfad.rsplit("/", 1)[-1]
+
+    @property
+    def exists(self):
+        return self.daten is not None
+
+
+def pfad(*teile):
+    return "/".join(teile)
+
+
+# Firestore lässt nur solche Feldnamen ungequotet zu (nur ASCII, nicht "Jürgen")
+_EINFACHER_FELDNAME = re.compile(r"[_a-zA-Z][_a-zA-Z0-9]*")
+
+
+def feldpfad(*teile):
+    """Feldpfad für ``update()``, auch für Schlüssel mit Ziffern, Umlauten oder Sonderzeichen."""
+    return ".".join(
+        teil if _EINFACHER_FELDNAME.fullmatch(teil)
+        else "`" + teil.replace("\\", "\\\\").replace("`", "\\`") + "`"
+        for teil in teile
+    )
+
+
+def _feldpfad_teile(schluessel):
+    teile, teil, in_backticks, i = [], "", False, 0
+    while i < len(schluessel):
+        zeichen = schluessel[i]
+        if zeichen == "\\" and in_backticks:
+            i += 1
+            teil += schluessel[i]
+        elif zeichen == "`":
+            in_backticks = not in_backticks
+        elif zeichen == "." and not in_backticks:
+            teile.append(teil)
+            teil = ""
+        else:
+            teil += zeichen
+        i += 1
+    teile.append(teil)
+    return teile
+
+
+def _zeitstempel_einsetzen(daten, jetzt):
+    return {k: jetzt if v is ZEITSTEMPEL else v for k, v in daten.items()}
+
+
+def _update_anwenden(daten, felder, jetzt):
+    daten = copy.deepcopy(daten)
+    for schluessel, wert in felder.items():
+        *eltern, letzter = _feldpfad_teile(schluessel)
+        ziel = daten
+        for teil in eltern:
+            if not isinstance(ziel.get(teil), dict):
+                ziel[teil] = {}
+            ziel = ziel[teil]
+        if wert is FELD_LOESCHEN:
+            ziel.pop(letzter, None)
+        else:
+            ziel[letzter] = jetzt if wert is ZEITSTEMPEL else copy.deepcopy(wert)
+    return daten
+
+
+class Batch:
+    """Sammelt Schreibvorgänge und führt sie mit ``commit()`` gemeinsam aus."""
+
+    def __init__(self, speicher):
+        self.speicher = speicher
+        self.vorgaenge = []
+
+    def set(self, pfad, daten):
+        self.vorgaenge.append(("set", pfad, daten))
+
+    def update(self, pfad, felder):
+        self.vorgaenge.append(("update", pfad, felder))
+
+    def delete(self, pfad):
+        self.vorgaenge.append(("delete", pfad, None))
+
+    def commit(self):
+        if self.vorgaenge:
+            self.speicher._anwenden(self.vorgaenge)
+        self.vorgaenge = []
+
+
+class Speicher(ABC):
+    """Schnittstelle; Unterklassen implementieren ``get``, ``list``, ``listen``, ``_anwenden`` und ``transaktion``."""
+
+    @abstractmethod
+    def get(self, pfad):
+        ...
+
+    def get_all(self, pfade):
+        return [self.get(p) for p in pfade]
+
+    @abstractmethod
+    def list(self, sammlung, ab=None):
+        """Alle Dokumente einer Sammlung, nach ID sortiert; mit ``ab`` nur IDs ``>= ab``."""
+
+    @abstractmethod
+    def listen(self, pfad, callback):
+        """Ruft ``callback(dokument)`` sofort und nach jeder Änderung auf; gibt eine Abmeldefunktion zurück."""
+
+    @abstractmethod
+    def _anwenden(self, vorgaenge):
+        ...
+
+    def set(self, pfad, daten):
+        self._anwenden([("set", pfad, daten)])
+
+    def update(self, pfad, felder):
+        self._anwenden([("update", pfad, felder)])
+
+    def delete(self, pfad):
+        self._anwenden([("delete", pfad, None)])
+
+    def batch(self):
+        return Batch(self)
+
+    @abstractmethod
+    def transaktion(self, funktion):
+        """Führt ``funktion(tx)`` atomar aus; ``tx`` kann lesen (``get``/``get_all``) und schreiben wie ein Batch."""
+
+
+class _LokaleTransaktion(Batch):
+    def get(self, pfad):
+        return self.speicher.get(pfad)
+
+    def get_all(self, pfade):
+        return self.speicher.get_all(pfade)
+
+
+class _LokalerSpeicher(Speicher):
+    """Gemeinsamer Teil von Arbeitsspeicher und SQLite: Änderungen unter einem Lock."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._zuhoerer = {}
+
+    @abstractmethod
+    def _lesen(self, pfad):
+        ...
+
+    @abstractmethod
+    def _schreiben(self, pfad, daten, jetzt):
+        ...
+
+    @spanne("speicher.schreiben")
+    def _anwenden(self, vorgaenge):
+        zaehlen("schreiben", len(vorgaenge))
+        jetzt = datetime.now(timezone.utc)
+        with self._lock:
+            # Erst alle neuen Stände berechnen, dann schreiben: ein Fehler ändert nichts
+            neu = {}
+            for art, pfad, daten in vorgaenge:
+                if art == "set":
+                    neu[pfad] = _zeitstempel_einsetzen(daten, jetzt)
+                elif art == "update":
+                    alt = neu[pfad] if pfad in neu else self._lesen(pfad).daten
+                    if alt is None:
+                        raise KeyError(f"Dokument {pfad} existiert nicht")
+                    neu[pfad] = _update_anwenden(alt, daten, jetzt)
+                else:
+                    neu[pfad] = None
+            try:
+                for pfad, daten in neu.items():
+                    self._schreiben(pfad, daten, jetzt)
+                self._fertig()
+            except BaseException:
+                # Halb geschriebenen Batch verwerfen, sonst landet er mit dem nächsten Commit
+                self._abbrechen()
+                raise
+        for pfad in neu:
+            self._benachrichtigen(pfad)
+
+    def _fertig(self):
+        pass
+
+    def _abbrechen(self):
+        pass
+
+    @spanne("speicher.get")
+    def get(self, pfad):
+        zaehlen("lesen")
+        with self._lock:
+            return self._lesen(pfad)
+
+    def transaktion(self, funktion):
+        with self._lock:
+            tx = _LokaleTransaktion(self)
+            ergebnis = funktion(tx)
+            tx.commit()
+            return ergebnis
+
+    def listen(self, pfad, callback):
+        with self._lock:
+            self._zuhoerer.setdefault(pfad, []).append(callback)
+        callback(self.get(pfad))
+
+        def abmelden():
+            with self._lock:
+                self._zuhoerer[pfad].remove(callback)
+        return abmelden
+
+    def _benachrichtigen(self, pfad):
+        with self._lock:
+            zuhoerer = list(self._zuhoerer.get(pfad, []))
+        if zuhoerer:
+            dokument = self.get(pfad)
+            for callback in zuhoerer:
+                callback(dokument)
+
+
+class ArbeitsspeicherSpeicher(_LokalerSpeicher):
+    def __init__(self):
+        super().__init__()
+        self._dokumente = {}
+
+    def _lesen(self, pfad):
+        daten, update_time = self._dokumente.get(pfad, (None, None))
+        return Dokument(pfad, copy.deepcopy(daten), update_time)
+
+    def _schreiben(self, pfad, daten, jetzt):
+        if daten is None:
+            self._dokumente.pop(pfad, None)
+        else:
+            self._dokumente[pfad] = (copy.deepcopy(daten), jetzt)
+
+    @spanne("speicher.list")
+    def list(self, sammlung, ab=None):
+        praefix = sammlung + "/"
+        with self._lock:
+            pfade = sorted(
+                p for p in self._dokumente
+                if p.startswith(praefix) and "/" not in p[len(praefix):]
+                and (ab is None or p[len(praefix):] >= ab)
+            )
+            zaehlen("lesen", len(pfade))
+            return [self._lesen(p) for p in pfade]
+
+
+def _json_kodieren(wert):
+    if isinstance(wert, datetime):
+        return {"__zeit__": wert.isoformat()}
+    raise TypeError(f"{type(wert).__name__} kann nicht gespeichert werden")
+
+
+def _json_dekodieren(objekt):
+    if set(objekt) == {"__zeit__"}:
+        return datetime.fromisoformat(objekt["__zeit__"])
+    return objekt
+
+
+class SqliteSpeicher(_LokalerSpeicher):
+    """Dokumente als JSON in einer SQLite-Datei; mehrere Prozesse können sie teilen."""
+
+    def __init__(self, datei):
+        super().__init__()
+        self.datei = datei
+        self._db = sqlite3.connect(datei, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS dokumente ("
+            " pfad TEXT PRIMARY KEY, sammlung TEXT NOT NULL, daten TEXT NOT NULL, update_time TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS dokumente_sammlung ON dokumente (sammlung, pfad)")
+        self._in_transaktion = False
+
+    def _dokument(self, pfad, zeile):
+        if zeile is None:
+            return Dokument(pfad, None, None)
+        daten, update_time = zeile
+        return Dokument(pfad, json.loads(daten, object_hook=_json_dekodieren), datetime.fromisoformat(update_time))
+
+    def _lesen(self, pfad):
+        zeile = self._db.execute("SELECT daten, update_time FROM dokumente WHERE pfad = ?", (pfad,)).fetchone()
+        return self._dokument(pfad, zeile)
+
+    def _beginnen(self):
+        if not self._in_transaktion:
+            # Sperrt die Datei auch gegen andere Prozesse bis zum Commit
+            self._db.execute("BEGIN IMMEDIATE")
+            self._in_transaktion = True
+
+    def _schreiben(self, pfad, daten, jetzt):
+        self._beginnen()
+        if daten is None:
+            self._db.execute("DELETE FROM dokumente WHERE pfad = ?", (pfad,))
+        else:
+            self._db.execute(
+                "INSERT OR REPLACE INTO dokumente (pfad, sammlung, daten, update_time) VALUES (?, ?, ?, ?)",
+                (pfad, pfad.rsplit("/", 1)[0], json.dumps(daten, default=_json_kodieren), jetzt.isoformat()),
+            )
+
+    def _fertig(self):
+        if self._in_transaktion:
+            self._db.execute("COMMIT")
+            self._in_transaktion = False
+
+    def _abbrechen(self):
+        if self._in_transaktion:
+            self._in_transaktion = False
+            self._db.execute("ROLLBACK")
+
+    def transaktion(self, funktion):
+        with self._lock:
+            self._beginnen()
+            try:
+                return super().transaktion(funktion)
+            finally:
+                self._abbrechen()
+
+    @spanne("speicher.list")
+    def list(self, sammlung, ab=None):
+        with self._lock:
+            zeilen = self._db.execute(
+                "SELECT pfad, daten, update_time FROM dokumente WHERE sammlung = ? AND pfad >= ? ORDER BY pfad",
+                (sammlung, f"{sammlung}/{ab or ''}"),
+            ).fetchall()
+        zaehlen("lesen", len(zeilen))
+        return [self._dokument(p, (d, u)) for p, d, u in zeilen]
+
+    def listen(self, pfad, callback):
+        # Andere Prozesse schreiben in dieselbe Datei, deshalb wird zusätzlich abgefragt
+        gestoppt = threading.Event()
+        letzte = [self.get(pfad).update_time]
+
+        def bei_aenderung(dokument):
+            letzte[0] = dokument.update_time
+            callback(dokument)
+
+        abmelden = super().listen(pfad, bei_aenderung)
+
+        def abfragen():
+            while not gestoppt.wait(POLL_INTERVALL):
+                dokument = self.get(pfad)
+                if dokument.update_time != letzte[0]:
+                    bei_aenderung(dokument)
+
+        threading.Thread(target=abfragen, daemon=True).start()
+
+        def beenden():
+            gestoppt.set()
+            abmelden()
+        return beenden
+
+
+class _FirestoreBatch(Batch):
+    @spanne("speicher.schreiben")
+    def commit(self):
+        batch = self.speicher.client.batch()
+        self.speicher._uebertragen(batch, self.vorgaenge)
+        batch.commit()
+        self.vorgaenge = []
+
+
+class _FirestoreTransaktion(Batch):
+    def __init__(self, speicher, transaction):
+        super().__init__(speicher)
+        self.transaction = transaction
+
+    def get(self, pfad):
+        zaehlen("lesen")
+        return self.speicher._dokument(pfad, self.speicher._ref(pfad).get(transaction=self.transaction))
+
+    def get_all(self, pfade):
+        return self.speicher.get_all(pfade, transaction=self.transaction)
+
+    def commit(self):
+        self.speicher._uebertragen(self.transaction, self.vorgaenge)
+        self.vorgaenge = []
+
+
+class FirestoreSpeicher(Speicher):
+    def __init__(self, client):
+        self.client = client
+
+    def _ref(self, pfad):
+        return self.client.document(pfad)
+
+    def _dokument(self, pfad, snapshot):
+        if snapshot is None or not snapshot.exists:
+            return Dokument(pfad, None, None)
+        return Dokument(pfad, snapshot.to_dict(), snapshot.update_time)
+
+    def _werte(self, daten):
+        from firebase_admin import firestore
+
+        def wert(v):
+            if v is ZEITSTEMPEL:
+                return firestore.SERVER_TIMESTAMP
+            if v is FELD_LOESCHEN:
+                return firestore.DELETE_FIELD
+            return v
+
+        return {k: wert(v) for k, v in daten.items()}
+
+    def _uebertragen(self, ziel, vorgaenge):
+        zaehlen("schreiben", len(vorgaenge))
+        for art, pfad, daten in vorgaenge:
+            if art == "set":
+                ziel.set(self._ref(pfad), self._werte(daten))
+            elif art == "update":
+                ziel.update(self._ref(pfad), self._werte(daten))
+            else:
+                ziel.delete(self._ref(pfad))
+
+    @spanne("speicher.schreiben")
+    def _anwenden(self, vorgaenge):
+        batch = self.client.batch()
+        self._uebertragen(batch, vorgaenge)
+        batch.commit()
+
+    @spanne("speicher.get")
+    def get(self, pfad):
+        zaehlen("lesen")
+        return self._dokument(pfad, self._ref(pfad).get())
+
+    @spanne("speicher.get_all")
+    def get_all(self, pfade, transaction=None):
+        # Ein Aufruf für alle Dokumente; Firestore liefert in beliebiger Reihenfolge
+        zaehlen("lesen", len(pfade))
+        snapshots = {s.reference.path: s for s in self.client.get_all([self._ref(p) for p in pfade], transaction=transaction)}
+        return [self._dokument(p, snapshots.get(p)) for p in pfade]
+
+    @spanne("speicher.list")
+    def list(self, sammlung, ab=None):
+        abfrage = self.client.collection(sammlung)
+        if ab is not None:
+            from google.cloud.firestore_v1 import FieldFilter
+
+            abfrage = abfrage.where(filter=FieldFilter("__name__", ">=", self._ref(f"{sammlung}/{ab}")))
+        dokumente = [self._dokument(s.reference.path, s) for s in abfrage.stream()]
+        # Firestore berechnet auch eine leere Abfrage als einen Lesevorgang
+        zaehlen("lesen", max(len(dokumente), 1))
+        return dokumente
+
+    def listen(self, pfad, callback):
+        def bei_snapshot(snapshots, aenderungen, lesezeit):
+            zaehlen("lesen")
+            callback(self._dokument(pfad, snapshots[0] if snapshots else None))
+
+        watch = self._ref(pfad).on_snapshot(bei_snapshot)
+        return watch.unsubscribe
+
+    def batch(self):
+        return _FirestoreBatch(self)
+
+    def transaktion(self, funktion):
+        from firebase_admin import firestore
+
+        @firestore.transactional
+        def ausfuehren(transaction):
+            tx = _FirestoreTransaktion(self, transaction)
+            ergebnis = funktion(tx)
+            tx.commit()
+            return ergebnis
+
+        return ausfuehren(self.client.transaction())
+
+
+def einstellung(name, standard=None):
+    """Konfiguration aus ``VATERTAG_<NAME>`` oder ``st.secrets[name]``."""
+    wert = os.environ.get(f"VATERTAG_{name.upper()}")
+    if wert is not None:
+        return wert
+    try:
+        return st.secrets.get(name, standard)
+    except FileNotFoundError:
+        return standard
+
+
+@st.cache_resource
+@spanne("firestore.verbinden")
+def firestore_client():
+    """Firestore-Client, einmal pro Prozess; ``firebase_admin`` wird erst hier importiert."""
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
+    # Prüfen, ob eine Firebase-App bereits initialisiert wurde
+    if not firebase_admin._apps:
+        cred_dict = json.loads(st.secrets["firebase_service_account"])
+        firebase_admin.initialize_app(credentials.Certificate(cred_dict))
+    return firestore.client()
+
+
+def speicher_oeffnen(art):
+    if art == "firestore":
+        return FirestoreSpeicher(firestore_client())
+    if art == "speicher":
+        return ArbeitsspeicherSpeicher()
+    if art.startswith("sqlite"):
+        return SqliteSpeicher(art.partition(":")[2] or "vatertag.db")
+    raise ValueError(f"Unbekannter Speicher: {art}")
+
+
+@st.cache_resource
+def standard_speicher():
+    """Der konfigurierte Speicher, einmal pro Prozess."""
+    return speicher_oeffnen(einstellung("speicher", "firestore"))
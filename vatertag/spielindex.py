@@ -0,0 +1,89 @@
+"""Spielindex für die Spielauswahl.
+
+Statt alle Spieldokumente (mit Runden und Kommentaren) zu laden, um nur ihre
+IDs zu lesen, steht in ``indizes/spiele`` ein kleines Dokument mit je Spiel
+Spielerzahl, Rundenzahl und letzter Änderung::
+
+    {"spiele": {"<name>": {"spieler": 6, "runden": 12, "aktualisiert": <Zeit>}}}
+
+``vatertag.layout`` pflegt es im selben Batch wie das Spiel selbst. Gelesen
+wird es über einen Listener pro Prozess (``vatertag.live``); Anlegen und
+Löschen – auch aus anderen Prozessen – kommen so ohne Neuladen an. Fehlt das
+Dokument (ältere Datenbanken), wird es einmal aus ``spiele`` aufgebaut.
+
+Ein Eintrag hat etwa 100 Byte; bei der 1-MiB-Grenze von Firestore reicht das
+für einige tausend Spiele.
+"""
+
+from datetime import datetime, timezone
+
+from vatertag.speicher import FELD_LOESCHEN, ZEITSTEMPEL, feldpfad
+
+SAMMLUNG = "indizes"
+DOKUMENT_ID = "spiele"
+INDEX_PFAD = f"{SAMMLUNG}/{DOKUMENT_ID}"
+
+PRO_SEITE = 20
+
+_ALT = datetime.min.replace(tzinfo=timezone.utc)
+
+
+def _rundenzahl(daten):
+    return daten["rundenzahl"] if "rundenzahl" in daten else len(daten.get("runden", []))
+
+
+def aufbauen(db):
+    """Liest einmal alle Spiele und schreibt den Index neu; gibt die Einträge zurück."""
+    spiele = {
+        doc.id: {
+            "spieler": len(doc.daten.get("spieler", [])),
+            "runden": _rundenzahl(doc.daten),
+            "aktualisiert": doc.update_time,
+        }
+        for doc in db.list("spiele")
+    }
+    db.set(INDEX_PFAD, {"spiele": spiele})
+    return spiele
+
+
+def sicherstellen(db):
+    """Legt den Index an, falls es ihn noch nicht gibt (vor dem ersten ``update``)."""
+    if not db.get(INDEX_PFAD).exists:
+        aufbauen(db)
+
+
+def eintrag_felder(spielname, daten):
+    """Felder für ``update(INDEX_PFAD, ...)`` nach einer Änderung von ``daten`` (ganz oder teilweise)."""
+    felder = {feldpfad("spiele", spielname, "aktualisiert"): ZEITSTEMPEL}
+    if "spieler" in daten:
+        felder[feldpfad("spiele", spielname, "spieler")] = len(daten["spieler"])
+    if "runden" in daten or "rundenzahl" in daten:
+        felder[feldpfad("spiele", spielname, "runden")] = _rundenzahl(daten)
+    return felder
+
+
+def austragen_felder(spielname):
+    return {feldpfad("spiele", spielname): FELD_LOESCHEN}
+
+
+def eintraege(daten):
+    """``[(name, eintrag)]`` aus dem Indexdokument, zuletzt geänderte zuerst."""
+    spiele = (daten or {}).get("spiele", {})
+    return sorted(spiele.items(), key=lambda e: (e[1].get("aktualisiert") or _ALT, e[0]), reverse=True)
+
+
+def suchen(eintraege_, text="", seite=0, pro_seite=PRO_SEITE):
+    """Treffer (Teilstring, ohne Groß-/Kleinschreibung) auf ``seite``; dazu die Seitenzahl."""
+    text = text.strip().casefold()
+    treffer = [e for e in eintraege_ if text in e[0].casefold()] if text else list(eintraege_)
+    seiten = max(1, -(-len(treffer) // pro_seite))
+    seite = min(max(seite, 0), seiten - 1)
+    return treffer[seite * pro_seite:(seite + 1) * pro_seite], seiten
+
+
+def spiele_laden(db, live):
+    """Einträge aus dem Listener ``live`` (siehe ``vatertag.live.live_spiel``); baut den Index bei Bedarf auf."""
+    _, daten = live.stand()
+    if daten is None:
+        return eintraege({"spiele": aufbauen(db)})
+    return eintraege(daten)
@@ -0,0 +1,299 @@
+"""Spielstatistik in einem Durchlauf mit laufenden Zwischenergebnissen.
+
+Jede Kennzahl sieht jede Runde genau einmal (``runde(ergebnis)``) und führt
+ihr Zwischenergebnis weiter; eine neue Runde kostet damit O(Spieler). Neue
+Kennzahlen werden mit ``@kennzahl("name")`` registriert und laufen im selben
+Durchlauf mit, ohne eigenen Scan über alle Runden.
+
+Welche Runden neu sind, erkennt ``Statistik`` an der ``Wertung``: sie ersetzt
+ab der ersten geänderten Runde alle Rundenlisten durch neue Objekte. Wird die
+letzte Runde bearbeitet, wird nur sie zurückgenommen und neu eingerechnet;
+ältere Änderungen rechnen alles in einem Durchlauf neu.
+"""
+
+import copy
+import inspect
+from abc import ABC, abstractmethod
+from collections import Counter, namedtuple
+
+from vatertag.messung import spanne
+
+KENNZAHLEN = {}
+
+# Die Kennzahlen der Anzeigetafel bzw. von spielstand2025.py
+ANZEIGE = ("rundensieger", "max_punkte", "bonus", "beste_runde")
+LIVE = ("rundensieger_gewinn", "max_punkte_verlauf", "bonus_erster", "beste_runde_sieger")
+
+Runde = namedtuple("Runde", ["index", "plaetze", "gewinne", "bonus", "stand_vorher", "stand"])
+
+
+def kennzahl(name):
+    """Registriert eine Kennzahl-Klasse unter ``name``; ``runde`` und ``ergebnis`` sind Pflicht."""
+    def registrieren(klasse):
+        if inspect.isabstract(klasse):
+            fehlend = ", ".join(sorted(klasse.__abstractmethods__))
+            raise TypeError(f"Kennzahl {name!r} ({klasse.__name__}) implementiert nicht: {fehlend}")
+        KENNZAHLEN[name] = klasse
+        return klasse
+    return registrieren
+
+
+class Kennzahl(ABC):
+    """Basisklasse: ``runde()`` pro Runde, ``ergebnis()`` jederzeit."""
+
+    def __init__(self, namen, startpunkte):
+        self.namen = namen
+        self.startpunkte = startpunkte
+
+    @abstractmethod
+    def runde(self, r):
+        ...
+
+    @abstractmethod
+    def ergebnis(self, runden):
+        ...
+
+    def kopie(self):
+        """Stand zum Zurücknehmen der letzten Runde.
+
+        Reicht für Zwischenergebnisse aus Listen/Dicts unveränderlicher Werte;
+        Kennzahlen mit tieferem Zustand überschreiben das.
+        """
+        neu = copy.copy(self)
+        for attribut, wert in vars(self).items():
+            if isinstance(wert, (list, dict)) and attribut != "namen":
+                setattr(neu, attribut, wert.copy())
+        return neu
+
+
+def _haeufigster(zaehler):
+    # Bei Gleichstand der zuerst gezählte (wie Counter.most_common)
+    if not zaehler:
+        return None, None
+    return zaehler.most_common(1)[0]
+
+
+@kennzahl("rundensieger")
+class Rundensieger(Kennzahl):
+    """Meiste erste Plätze; bei Gleichstand der frühere Spieler."""
+
+    def __init__(self, namen, startpunkte):
+        super().__init__(namen, startpunkte)
+        self.siege = [0] * len(namen)
+
+    def runde(self, r):
+        for s, platz in enumerate(r.plaetze):
+            if platz == 1:
+                self.siege[s] += 1
+
+    def ergebnis(self, runden):
+        zaehler = Counter({name: n for name, n in zip(self.namen, self.siege) if n})
+        name, anzahl = _haeufigster(zaehler)
+        return {"name": name, "anzahl": anzahl}
+
+
+@kennzahl("max_punkte")
+class MaxPunkte(Kennzahl):
+    """Höchster Stand inkl. Startwert (``runde`` 0); bei Gleichstand früherer Spieler, dann frühere Runde."""
+
+    def __init__(self, namen, startpunkte):
+        super().__init__(namen, startpunkte)
+        # Bestwert je Spieler: (punkte, runde)
+        self.bester = [(startpunkte, 0)] * len(namen)
+
+    def runde(self, r):
+        for s, punkte in enumerate(r.stand):
+            if punkte > self.bester[s][0]:
+                self.bester[s] = (punkte, r.index + 1)
+
+    def ergebnis(self, runden):
+        if not self.namen:
+            return {"name": "", "punkte": None, "runde": -1}
+        s = max(range(len(self.namen)), key=lambda s: self.bester[s][0])
+        return {"name": self.namen[s], "punkte": self.bester[s][0], "runde": self.bester[s][1]}
+
+
+@kennzahl("bonus")
+class Bonus(Kennzahl):
+    """Häufigster Bonus-Empfänger; bei Gleichstand wer ihn zuerst bekam."""
+
+    def __init__(self, namen, startpunkte):
+        super().__init__(namen, startpunkte)
+        self.zaehler = Counter()
+
+    def runde(self, r):
+        self.zaehler.update(r.bonus)
+
+    def ergebnis(self, runden):
+        name, anzahl = _haeufigster(self.zaehler)
+        return {"name": name, "anzahl": anzahl}
+
+
+@kennzahl("beste_runde")
+class BesteRunde(Kennzahl):
+    """Höchster Gewinn in einer Runde; bei Gleichstand früherer Spieler, dann frühere Runde."""
+
+    def __init__(self, namen, startpunkte):
+        super().__init__(namen, startpunkte)
+        self.bester = [None] * len(namen)  # je Spieler (gewinn, runde)
+
+    def runde(self, r):
+        for s, gewinn in enumerate(r.gewinne):
+            if self.bester[s] is None or gewinn > self.bester[s][0]:
+                self.bester[s] = (gewinn, r.index)
+
+    def ergebnis(self, runden):
+        kandidaten = [s for s in range(len(self.namen)) if self.bester[s] is not None]
+        if not kandidaten:
+            return {"name": None, "gewinn": None, "runde": None}
+        s = max(kandidaten, key=lambda s: self.bester[s][0])
+        gewinn, idx = self.bester[s]
+        return {"name": self.namen[s], "gewinn": gewinn, "runde": runden[idx]["name"]}
+
+
+def _rundensieger(r):
+    # Erster Spieler mit dem höchsten Gewinn der Runde
+    return max(range(len(r.gewinne)), key=r.gewinne.__getitem__)
+
+
+@kennzahl("rundensieger_gewinn")
+class RundensiegerGewinn(Kennzahl):
+    """Wer am häufigsten den höchsten Rundengewinn hatte; bei Gleichstand wer zuerst siegte."""
+
+    def __init__(self, namen, startpunkte):
+        super().__init__(namen, startpunkte)
+        self.zaehler = Counter()
+
+    def runde(self, r):
+        if r.gewinne:
+            self.zaehler[self.namen[_rundensieger(r)]] += 1
+
+    def ergebnis(self, runden):
+        return _haeufigster(self.zaehler)
+
+
+@kennzahl("max_punkte_verlauf")
+class MaxPunkteVerlauf(Kennzahl):
+    """Höchster Stand nach einer Runde (ohne Startwert); bei Gleichstand frühere Runde, dann früherer Spieler."""
+
+    def __init__(self, namen, startpunkte):
+        super().__init__(namen, startpunkte)
+        self.bester = None  # (punkte, spieler, runde)
+
+    def runde(self, r):
+        if not r.stand:
+            return
+        s = max(range(len(r.stand)), key=r.stand.__getitem__)
+        if self.bester is None or r.stand[s] > self.bester[0]:
+            self.bester = (r.stand[s], s, r.index)
+
+    def ergebnis(self, runden):
+        if self.bester is None:
+            return None, None, None
+        punkte, s, idx = self.bester
+        return self.namen[s], punkte, f"{idx + 1}: {runden[idx]['name']}"
+
+
+@kennzahl("bonus_erster")
+class BonusErster(Kennzahl):
+    """Häufigster (erster) Bonus-Empfänger je Runde; bei Gleichstand wer ihn zuerst bekam."""
+
+    def __init__(self, namen, startpunkte):
+        super().__init__(namen, startpunkte)
+        self.zaehler = Counter()
+
+    def runde(self, r):
+        if r.bonus:
+            self.zaehler[r.bonus[0]] += 1
+
+    def ergebnis(self, runden):
+        return _haeufigster(self.zaehler)
+
+
+@kennzahl("beste_runde_sieger")
+class BesteRundeSieger(Kennzahl):
+    """Höchster Rundengewinn eines Rundensiegers (über -1); bei Gleichstand die frühere Runde."""
+
+    def __init__(self, namen, startpunkte):
+        super().__init__(namen, startpunkte)
+        self.bester = (-1, None, None)  # (gewinn, spieler, runde)
+
+    def runde(self, r):
+        if not r.gewinne:
+            return
+        s = _rundensieger(r)
+        if r.gewinne[s] > self.bester[0]:
+            self.bester = (r.gewinne[s], s, r.index)
+
+    def ergebnis(self, runden):
+        gewinn, s, idx = self.bester
+        if s is None:
+            return None, gewinn, ""
+        return self.namen[s], gewinn, f"{idx + 1}: {runden[idx]['name']}"
+
+
+class Statistik:
+    """Laufende Kennzahlen zu einer ``Wertung``."""
+
+    def __init__(self, namen, startpunkte, kennzahlen=ANZEIGE):
+        self.namen = list(namen)
+        self.startpunkte = startpunkte
+        self.kennzahlen = tuple(kennzahlen)
+        self._zuruecksetzen()
+
+    def _zuruecksetzen(self):
+        self.werte = {name: KENNZAHLEN[name](self.namen, self.startpunkte) for name in self.kennzahlen}
+        self._gesehen = []  # je Runde die Gewinnliste der Wertung (Identität = unverändert)
+        self._vor_letzter = None  # Kennzahlen vor der letzten Runde
+
+    def passt(self, namen, startpunkte, kennzahlen=ANZEIGE):
+        return self.namen == list(namen) and self.startpunkte == startpunkte and self.kennzahlen == tuple(kennzahlen)
+
+    def _erste_aenderung(self, wertung):
+        # Unveränderte Runden bilden einen Anfang, alles danach ist neu: binäre Suche
+        unten, oben = 0, min(len(self._gesehen), wertung.anzahl_runden)
+        while unten < oben:
+            mitte = (unten + oben) // 2
+            if wertung.gewinne[mitte] is self._gesehen[mitte]:
+                unten = mitte + 1
+            else:
+                oben = mitte
+        return unten
+
+    @spanne("statistik")
+    def aktualisieren(self, wertung):
+        """Rechnet neue oder geänderte Runden der Wertung ein."""
+        ab = self._erste_aenderung(wertung)
+        if ab < len(self._gesehen):
+            if ab == len(self._gesehen) - 1 and self._vor_letzter is not None:
+                self.werte = self._vor_letzter
+                self._vor_letzter = None
+                del self._gesehen[ab:]
+            else:
+                self._zuruecksetzen()
+                ab = 0
+
+        for idx in range(ab, wertung.anzahl_runden):
+            if idx == wertung.anzahl_runden - 1:
+                self._vor_letzter = {name: wert.kopie() for name, wert in self.werte.items()}
+            r = Runde(
+                idx, wertung.plaetze[idx], wertung.gewinne[idx], wertung.bonus_empfaenger[idx],
+                wertung.staende[idx], wertung.staende[idx + 1],
+            )
+            for wert in self.werte.values():
+                wert.runde(r)
+            self._gesehen.append(wertung.gewinne[idx])
+        return self
+
+    def ergebnis(self, runden):
+        """Alle Kennzahlen; ``runden`` liefert die aktuellen Rundennamen."""
+        return {name: wert.ergebnis(runden) for name, wert in self.werte.items()}
+
+
+def statistik_fuer(cache, wertung, kennzahlen=ANZEIGE, schluessel="statistik"):
+    """Holt die Statistik zur Wertung aus ``cache`` (z. B. st.session_state) und bringt sie auf Stand."""
+    statistik = cache.get(schluessel)
+    if statistik is None or not statistik.passt(wertung.namen, wertung.startpunkte, kennzahlen):
+        statistik = Statistik(wertung.namen, wertung.startpunkte, kennzahlen)
+        cache[schluessel] = statistik
+    return statistik.aktualisieren(wertung)
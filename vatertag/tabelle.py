@@ -0,0 +1,146 @@
+"""Spielstand-Tabelle spaltenweise statt Zelle für Zelle.
+
+Jede Zelle ``E: <einsatz> | P: <platz> | <gewinn>[★]`` entsteht nicht mehr per
+f-String in einer Schleife über Spieler × Runden: jeder verschiedene Wert wird
+einmal formatiert, die Zellen aller neuen Runden werden gemeinsam per
+NumPy-Stringoperation zusammengesetzt. Fertige Spalten bleiben in der
+``Tabelle`` gemerkt; neu gebaut wird nur, was sich geändert hat – im Normalfall
+die neueste Runde.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from vatertag.messung import spanne
+
+STERN = "★"
+
+
+def _formatieren(werte, format_):
+    # Jeder verschiedene Wert nur einmal; meist gibt es nur eine Handvoll
+    if werte.dtype.kind == "f":
+        # Nach Bitmuster, damit -0.0 (Einsatz 0 × negativer Multiplikator) erhalten bleibt
+        eindeutig, index = np.unique(werte.astype(np.float64).view(np.int64), return_inverse=True)
+        eindeutig = eindeutig.view(np.float64)
+    else:
+        eindeutig, index = np.unique(werte, return_inverse=True)
+    texte = np.array([format_(w) for w in eindeutig.tolist()], dtype=str)
+    return texte[index.reshape(werte.shape)]
+
+
+def bonus_matrix(bonus_listen, namen):
+    """``[runde][spieler]`` → ist Bonus-Empfänger, aus den Namenslisten pro Runde."""
+    position = {name: s for s, name in enumerate(namen)}
+    matrix = np.zeros((len(bonus_listen), len(namen)), dtype=bool)
+    for r, bonus in enumerate(bonus_listen):
+        for name in bonus or ():
+            if name in position:
+                matrix[r, position[name]] = True
+    return matrix
+
+
+def zellen(einsaetze, plaetze, gewinne, bonus, plus_immer=False, ganzzahlig=False):
+    """Zelltexte für Matrizen gleicher Form (z. B. Runden × Spieler).
+
+    ``plus_immer`` setzt das ``+`` auch vor Nullen und Verluste (wie in
+    spielstand2025.py), ``ganzzahlig`` zeigt Einsätze als ganze Zahl.
+    """
+    einsaetze = np.asarray(einsaetze)
+    if ganzzahlig:
+        einsaetze = einsaetze.astype(int)
+    if plus_immer:
+        gewinn_text = _formatieren(np.asarray(gewinne, dtype=float), lambda g: f"+{round(g, 1)}")
+    else:
+        gewinn_text = _formatieren(
+            np.asarray(gewinne, dtype=float), lambda g: f"{'+' if g > 0 else ''}{round(g, 1)}"
+        )
+    texte = np.char.add("E: ", _formatieren(einsaetze, str))
+    texte = np.char.add(texte, " | P: ")
+    texte = np.char.add(texte, _formatieren(np.asarray(plaetze), str))
+    texte = np.char.add(texte, " | ")
+    texte = np.char.add(texte, gewinn_text)
+    return np.char.add(texte, np.where(np.asarray(bonus, dtype=bool), STERN, ""))
+
+
+class Tabelle:
+    """Gemerkte Rundenspalten eines Spiels (Zellen in Spielerreihenfolge wie ``namen``)."""
+
+    def __init__(self, namen, plus_immer=False, ganzzahlig=False):
+        self.namen = list(namen)
+        self.plus_immer = plus_immer
+        self.ganzzahlig = ganzzahlig
+        self.spalten = []  # je Runde (eingabe, zellen)
+        self._lock = threading.Lock()
+
+    def passt(self, namen, plus_immer=False, ganzzahlig=False):
+        return self.namen == list(namen) and (self.plus_immer, self.ganzzahlig) == (plus_immer, ganzzahlig)
+
+    @spanne("tabelle")
+    def bauen(self, punkte, einsaetze, plaetze, gewinne, bonus_listen, rundennamen, reihenfolge=None):
+        """Spielstand als DataFrame: Spieler nach Punkten, Runden neueste zuerst.
+
+        ``einsaetze``, ``plaetze`` und ``gewinne`` sind je Runde eine Folge in
+        Spielerreihenfolge (wie in ``Wertung``), ``bonus_listen`` je Runde die
+        Namen der Bonus-Empfänger. ``reihenfolge`` (Spielerindizes) ersetzt die
+        Sortierung nach Punkten, wenn die Zeilen schon sortiert vorliegen.
+        """
+        with self._lock:
+            spalten = self._spalten_aktualisieren(einsaetze, plaetze, gewinne, bonus_listen)
+
+        if reihenfolge is None:
+            reihenfolge = sorted(range(len(self.namen)), key=lambda s: -punkte[s])
+
+        # Neueste Runde zuerst; gleichnamige Runden wie bisher: Spalte an der
+        # Stelle der neuesten, Werte der ältesten
+        runden_spalten = {}
+        for i in range(len(rundennamen) - 1, -1, -1):
+            runden_spalten[rundennamen[i]] = i
+        if runden_spalten:
+            matrix = np.stack([spalten[i] for i in runden_spalten.values()], axis=1)[reihenfolge]
+        else:
+            matrix = np.empty((len(reihenfolge), 0), dtype=str)
+
+        # Ein Block für alle Rundenspalten statt einer Konvertierung pro Spalte
+        df = pd.DataFrame(matrix, columns=list(runden_spalten), dtype=object)
+        df.insert(0, "Punkte", [round(punkte[s], 1) for s in reihenfolge], allow_duplicates=True)
+        df.insert(0, "Spieler", [self.namen[s] for s in reihenfolge], allow_duplicates=True)
+        return df
+
+    def _spalten_aktualisieren(self, einsaetze, plaetze, gewinne, bonus_listen):
+        anzahl = len(gewinne)
+        del self.spalten[anzahl:]
+        eingaben = [
+            (tuple(einsaetze[i]), tuple(plaetze[i]), tuple(gewinne[i]), tuple(bonus_listen[i] or ()))
+            for i in range(anzahl)
+        ]
+        neu = [i for i in range(anzahl) if i >= len(self.spalten) or self.spalten[i][0] != eingaben[i]]
+        if neu:
+            texte = zellen(
+                [eingaben[i][0] for i in neu],
+                [eingaben[i][1] for i in neu],
+                [eingaben[i][2] for i in neu],
+                bonus_matrix([eingaben[i][3] for i in neu], self.namen),
+                self.plus_immer,
+                self.ganzzahlig,
+            )
+            self.spalten.extend([None] * (anzahl - len(self.spalten)))
+            for zeile, i in enumerate(neu):
+                self.spalten[i] = (eingaben[i], texte[zeile])
+        return [zellen_ for _, zellen_ in self.spalten]
+
+    def aus_wertung(self, wertung, rundennamen):
+        return self.bauen(
+            wertung.punkte, wertung.einsaetze, wertung.plaetze, wertung.gewinne,
+            wertung.bonus_empfaenger, rundennamen,
+        )
+
+
+def tabelle_fuer(cache, namen, plus_immer=False, ganzzahlig=False, schluessel="tabelle"):
+    """Holt die Tabelle aus ``cache`` (z. B. st.session_state) oder legt sie neu an."""
+    tabelle = cache.get(schluessel)
+    if tabelle is None or not tabelle.passt(namen, plus_immer, ganzzahlig):
+        tabelle = Tabelle(namen, plus_immer, ganzzahlig)
+        cache[schluessel] = tabelle
+    return tabelle
@@ -0,0 +1,127 @@
+"""Turnier: mehrere Spiele (Tische) gleichzeitig mit gemeinsamer Rangliste.
+
+Jeder Tisch hat seinen eigenen Listener auf die Anzeigetafel (siehe
+``vatertag.live``); alle laufen parallel, ein Rerun liest nichts aus dem
+Speicher. ``Turnier.version`` fasst die Versionen der Tische zusammen, damit
+``bei_aenderung_neu_laden`` wie bei einem einzelnen Spiel funktioniert.
+
+Tische ohne Anzeigetafel (noch nie von der Admin-App gespeichert) werden mit
+einem ``get_all`` geladen und nebenläufig gewertet. Rangliste und
+Tischübersicht entstehen pro Turnierstand einmal im Prozess.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from vatertag import anzeigetafel, kompakt
+from vatertag.cache import MAX_VERSIONEN
+from vatertag.layout import MIT_KOPF, spiel_laden, spiel_pfad
+from vatertag.live import live_spiel
+from vatertag.wertung import Wertung
+
+MAX_THREADS = 8
+
+
+class Turnier:
+    def __init__(self, db, spielnamen):
+        self.db = db
+        self.spielnamen = list(spielnamen)
+        # Alle Listener zuerst starten: die ersten Snapshots kommen parallel
+        self.tische = {name: live_spiel(db, name, sammlung=anzeigetafel.SAMMLUNG) for name in self.spielnamen}
+
+    @property
+    def version(self):
+        return tuple(live.version for live in self.tische.values())
+
+    def stand(self, timeout=10):
+        """``(version, {spielname: tafel oder None})``; wartet insgesamt höchstens ``timeout`` Sekunden."""
+        ende = time.monotonic() + timeout
+        staende = {name: live.stand(max(0.0, ende - time.monotonic())) for name, live in self.tische.items()}
+        return tuple(v for v, _ in staende.values()), {name: tafel for name, (_, tafel) in staende.items()}
+
+
+def _tafel_berechnen(db, doc):
+    daten = doc.daten
+    if daten.get("layout") in MIT_KOPF:
+        daten = spiel_laden(db, doc.id)
+    else:
+        daten = kompakt.dekodieren(daten)
+    namen = [sp["name"] for sp in daten.get("spieler", [])]
+    runden = daten.get("runden", [])
+    wertung = Wertung(namen, daten.get("multiplikatoren", []))
+    wertung.aktualisieren(runden)
+    return {**anzeigetafel.erstellen(wertung, runden), "update_time": doc.update_time}
+
+
+def tafeln_ergaenzen(db, tafeln):
+    """Fehlende Anzeigetafeln aus den Spielen berechnen (ein ``get_all``, Wertung nebenläufig)."""
+    fehlend = [name for name, tafel in tafeln.items() if tafel is None]
+    if not fehlend:
+        return dict(tafeln)
+    docs = [doc for doc in db.get_all([spiel_pfad(name) for name in fehlend]) if doc.exists]
+    with ThreadPoolExecutor(max_workers=min(MAX_THREADS, len(docs) or 1)) as pool:
+        berechnet = dict(zip((doc.id for doc in docs), pool.map(lambda doc: _tafel_berechnen(db, doc), docs)))
+    return {name: tafel if tafel is not None else berechnet.get(name) for name, tafel in tafeln.items()}
+
+
+def gesamtrangliste(tafeln):
+    """Alle Spieler aller Tische nach Punkten; wer an mehreren Tischen spielt, wird zusammengezählt."""
+    import pandas as pd
+
+    punkte, tische = {}, {}
+    for tisch, tafel in tafeln.items():
+        for sp in (tafel or {}).get("rangliste", []):
+            punkte[sp["name"]] = punkte.get(sp["name"], 0) + sp["punkte"]
+            tische.setdefault(sp["name"], []).append(tisch)
+    df = pd.DataFrame({
+        "Spieler": list(punkte),
+        "Punkte": [round(p, 1) for p in punkte.values()],
+        "Tisch": [", ".join(t) for t in tische.values()],
+    }).sort_values(["Punkte", "Spieler"], ascending=[False, True], ignore_index=True)
+    df.insert(0, "Platz", df["Punkte"].rank(method="min", ascending=False).astype(int))
+    return df
+
+
+def tischuebersicht(tafeln):
+    """Eine Zeile pro Tisch: Spieler, Runden, Führender und letzte Runde."""
+    import pandas as pd
+
+    zeilen = []
+    for tisch, tafel in tafeln.items():
+        if tafel is None:
+            zeilen.append({"Tisch": tisch, "Spieler": 0, "Runden": 0, "Führend": "–", "Punkte": None, "Letzte Runde": "–"})
+            continue
+        rangliste, runden = tafel.get("rangliste", []), tafel.get("runden", [])
+        zeilen.append({
+            "Tisch": tisch,
+            "Spieler": len(rangliste),
+            "Runden": len(runden),
+            "Führend": rangliste[0]["name"] if rangliste else "–",
+            "Punkte": round(rangliste[0]["punkte"], 1) if rangliste else None,
+            "Letzte Runde": runden[-1]["name"] if runden else "–",
+        })
+    return pd.DataFrame(zeilen)
+
+
+def _berechnen(db, tafeln):
+    tafeln = tafeln_ergaenzen(db, tafeln)
+    return {"tafeln": tafeln, "rangliste": gesamtrangliste(tafeln), "tische": tischuebersicht(tafeln)}
+
+
+@st.cache_resource(max_entries=MAX_VERSIONEN)
+def _ansicht(schluessel, _db, _tafeln):
+    return _berechnen(_db, _tafeln)
+
+
+def ansicht(db, tafeln):
+    """Tafeln (ergänzt), Gesamtrangliste und Tischübersicht – einmal pro Turnierstand im Prozess.
+
+    Fehlt einer Tafel die ``update_time`` (etwa weil sie erst aus dem Spiel
+    berechnet wird), ist der Stand nicht erkennbar; dann wird nicht gecacht.
+    """
+    schluessel = tuple((name, tafel.get("update_time") if tafel else None) for name, tafel in tafeln.items())
+    if any(zeit is None for _, zeit in schluessel):
+        return _berechnen(db, tafeln)
+    return _ansicht(schluessel, db, tafeln)
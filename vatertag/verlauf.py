@@ -0,0 +1,135 @@
+"""Punkteverlauf fürs Diagramm mit Punktebudget.
+
+Bis zum Budget (Spieler × Runden) wird jeder Punkt gezeichnet. Darüber werden
+die Runden in gleich große Eimer geteilt und je Spieler und Eimer nur der
+tiefste und höchste Stand behalten (Min/Max-Downsampling): Spitzen und
+Einbrüche bleiben sichtbar, die Datenmenge ist begrenzt. Die erste und die
+aktuelle Runde sind immer dabei.
+
+Die Eimergröße ist eine Zweierpotenz, abgeschlossene Eimer ändern sich beim
+Weiterspielen also nicht. ``Verlauf`` merkt sie sich; pro neuer Version wird
+nur der hintere, noch offene Teil neu ausgewählt.
+
+Das Diagramm selbst entsteht aus einer festen Vega-Lite-Vorlage, in die
+``spezifikation`` nur noch die Daten setzt.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from vatertag.messung import spanne
+
+PUNKTE_BUDGET = 1000  # Punkte pro Diagramm (alle Spieler zusammen)
+
+
+def eimergroesse(runden, spieler, budget=PUNKTE_BUDGET):
+    """Kleinste Zweierpotenz, mit der höchstens ``budget`` Punkte entstehen (1 = alle Punkte)."""
+    if spieler * runden <= budget:
+        return 1
+    groesse = 2
+    while groesse < runden and spieler * (2 * -(-runden // groesse) + 2) > budget:
+        groesse *= 2
+    return groesse
+
+
+def _min_max(werte, start, groesse):
+    """Indizes von Minimum und Maximum je Spieler und vollem Eimer; ``start`` ist der Index von ``werte[:, 0]``."""
+    spieler, runden = werte.shape
+    eimer = runden // groesse
+    if eimer == 0:
+        return [np.empty(0, dtype=int) for _ in range(spieler)]
+    block = werte[:, :eimer * groesse].reshape(spieler, eimer, groesse)
+    basis = start + np.arange(eimer) * groesse
+    tief = block.argmin(axis=2) + basis
+    hoch = block.argmax(axis=2) + basis
+    paare = np.stack([np.minimum(tief, hoch), np.maximum(tief, hoch)], axis=2)
+    # Liegen Minimum und Maximum auf derselben Runde, nur einmal
+    maske = np.ones(paare.shape, dtype=bool)
+    maske[:, :, 1] = paare[:, :, 0] != paare[:, :, 1]
+    return [paare[s][maske[s]] for s in range(spieler)]
+
+
+class Verlauf:
+    """Ausgewählte Runden je Spieler, mit gemerkten abgeschlossenen Eimern."""
+
+    def __init__(self, budget=PUNKTE_BUDGET):
+        self.budget = budget
+        self.werte = np.empty((0, 0))
+        self.groesse = 1
+        self.voll = 0  # Anzahl abgeschlossener Eimer in ``fertig``
+        self.fertig = []  # je Spieler: Rundenindizes aus abgeschlossenen Eimern
+        self._lock = threading.Lock()
+
+    def auswahl(self, werte):
+        """Rundenindizes je Spieler für eine Matrix Spieler × Runden."""
+        werte = np.asarray(werte, dtype=float)
+        spieler, runden = werte.shape
+        with self._lock:
+            groesse = eimergroesse(runden, spieler, self.budget)
+            if groesse == 1:
+                return [np.arange(runden) for _ in range(spieler)]
+
+            # Gemerkte Eimer gelten, solange Größe, Spieler und ihre Werte gleich sind
+            voll = self.voll
+            if groesse != self.groesse or self.werte.shape[0] != spieler:
+                voll = 0
+            else:
+                gleich = min(self.werte.shape[1], runden)
+                unterschied = np.flatnonzero((self.werte[:, :gleich] != werte[:, :gleich]).any(axis=0))
+                voll = min(voll, (unterschied[0] if len(unterschied) else gleich) // groesse)
+            if voll:
+                self.fertig = [idx[idx < voll * groesse] for idx in self.fertig]
+            else:
+                self.fertig = [np.empty(0, dtype=int) for _ in range(spieler)]
+
+            # Neue abgeschlossene Eimer anhängen
+            neu_voll = runden // groesse
+            if neu_voll > voll:
+                neu = _min_max(werte[:, voll * groesse:neu_voll * groesse], voll * groesse, groesse)
+                self.fertig = [np.concatenate([alt, n]) for alt, n in zip(self.fertig, neu)]
+            self.groesse, self.voll, self.werte = groesse, neu_voll, werte
+
+            # Offener letzter Eimer: jedes Mal frisch, dazu erste und aktuelle Runde
+            offen = werte[:, neu_voll * groesse:]
+            rest = _min_max(offen, neu_voll * groesse, offen.shape[1]) if offen.shape[1] else None
+            return [
+                np.unique(np.concatenate([[0], self.fertig[s], rest[s] if rest else [], [runden - 1]]).astype(int))
+                for s in range(spieler)
+            ]
+
+    @spanne("verlauf")
+    def daten(self, namen, werte, rundennamen):
+        """Lange Tabelle (Spieler, Runde, RundenIndex, Punkte) der ausgewählten Punkte, Spieler für Spieler."""
+        werte = np.asarray(werte, dtype=float).reshape(len(namen), len(rundennamen))
+        auswahl = self.auswahl(werte)
+        indizes = np.concatenate(auswahl) if auswahl else np.empty(0, dtype=int)
+        spieler = np.repeat(np.arange(len(namen)), [len(a) for a in auswahl])
+        return pd.DataFrame({
+            "Spieler": np.asarray(namen, dtype=object)[spieler],
+            "Runde": np.asarray(rundennamen, dtype=object)[indizes],
+            "RundenIndex": indizes,
+            "Punkte": werte[spieler, indizes],
+        })
+
+
+def verlauf_fuer(cache, budget=PUNKTE_BUDGET, schluessel="verlauf"):
+    """Holt den Verlauf aus ``cache`` (z. B. st.session_state) oder legt ihn neu an."""
+    verlauf = cache.get(schluessel)
+    if verlauf is None or verlauf.budget != budget:
+        verlauf = Verlauf(budget)
+        cache[schluessel] = verlauf
+    return verlauf
+
+
+def spezifikation(vorlage, daten, **kanaele):
+    """Vega-Lite-Vorlage (ohne Daten) mit ``daten`` füllen.
+
+    ``kanaele`` ergänzen einzelne Kodierungen, z. B. ``x={"sort": [...]}``;
+    die Vorlage selbst bleibt unverändert.
+    """
+    kodierung = dict(vorlage["encoding"])
+    for kanal, zusatz in kanaele.items():
+        kodierung[kanal] = {**kodierung[kanal], **zusatz}
+    return {**vorlage, "encoding": kodierung, "data": {"values": daten}}
@@ -0,0 +1,169 @@
+"""Inkrementelle Punkteberechnung für alle Apps.
+
+Nach jeder Runde wird der Zwischenstand aller Spieler gemerkt. Eine neue Runde
+kostet damit nur O(Spieler), eine geänderte Runde k rechnet nur k..n neu.
+"""
+
+from vatertag.messung import spanne
+
+START_PUNKTE = 20.0
+
+# Rubber-Banding-Regeln
+ALLE_LETZTEN = "alle_letzten"  # ab Runde 2 alle Spieler mit den wenigsten Punkten (streamlit_app.py)
+EIN_LETZTER = "ein_letzter"  # ab Runde 1 genau ein Letzter, bei Gleichstand der erste (spielstand2025.py)
+
+# Ab so vielen neu zu rechnenden Runden lohnt sich die NumPy-Variante
+VEKTOR_AB_RUNDEN = 32
+
+
+def multiplikator(multiplikatoren, platz):
+    return multiplikatoren[platz - 1] if platz - 1 < len(multiplikatoren) else 0
+
+
+def bonus_empfaenger(stand, namen, runden_idx, regel=ALLE_LETZTEN):
+    """Spieler, die in Runde ``runden_idx`` keine Punkte verlieren können."""
+    if not namen:
+        return []
+    if regel == EIN_LETZTER:
+        letzter = min(range(len(stand)), key=stand.__getitem__)
+        return [namen[letzter]]
+    if runden_idx == 0:
+        return []
+    min_punkte = min(stand)
+    return [name for name, punkte in zip(namen, stand) if punkte == min_punkte]
+
+
+def rundeneingabe(runde, namen):
+    """Einsätze und Plätze einer gespeicherten Runde in Spielerreihenfolge."""
+    einsaetze = tuple(runde["einsaetze"].get(name, 0) for name in namen)
+    plaetze = tuple(runde["plaetze"].get(name, 1) for name in namen)
+    return einsaetze, plaetze
+
+
+class Wertung:
+    """Punktestand eines Spiels mit gemerktem Zwischenstand nach jeder Runde.
+
+    Alle Listen sind nach Runden geordnet, innen nach Spielern (Reihenfolge
+    wie ``namen``). ``staende[k]`` ist der Punktestand vor Runde k,
+    ``staende[-1]`` der aktuelle.
+    """
+
+    def __init__(self, namen, multiplikatoren, regel=ALLE_LETZTEN, startpunkte=START_PUNKTE):
+        self.namen = list(namen)
+        self.multiplikatoren = list(multiplikatoren)
+        self.regel = regel
+        self.startpunkte = startpunkte
+        self.einsaetze = []
+        self.plaetze = []
+        self.gewinne = []
+        self.bonus_empfaenger = []
+        self.staende = [[startpunkte] * len(self.namen)]
+
+    def passt(self, namen, multiplikatoren, regel=ALLE_LETZTEN):
+        return (
+            self.namen == list(namen)
+            and self.multiplikatoren == list(multiplikatoren)
+            and self.regel == regel
+        )
+
+    @property
+    def anzahl_runden(self):
+        return len(self.gewinne)
+
+    @property
+    def punkte(self):
+        return self.staende[-1]
+
+    def kuerzen(self, anzahl):
+        """Vergisst alle Runden ab Index ``anzahl``."""
+        del self.einsaetze[anzahl:]
+        del self.plaetze[anzahl:]
+        del self.gewinne[anzahl:]
+        del self.bonus_empfaenger[anzahl:]
+        del self.staende[anzahl + 1:]
+
+    def runde_anhaengen(self, einsaetze, plaetze):
+        runden_idx = self.anzahl_runden
+        stand = self.staende[-1]
+        bonus = bonus_empfaenger(stand, self.namen, runden_idx, self.regel)
+
+        gewinne = []
+        for name, einsatz, platz in zip(self.namen, einsaetze, plaetze):
+            m = multiplikator(self.multiplikatoren, platz)
+            gewinn = einsatz * m
+            if m < 0 and name in bonus:
+                gewinn = 0  # Bonus für die Letzten: kein Punktverlust
+            gewinne.append(float(gewinn))
+
+        self.einsaetze.append(tuple(einsaetze))
+        self.plaetze.append(tuple(plaetze))
+        self.gewinne.append(gewinne)
+        self.bonus_empfaenger.append(bonus)
+        self.staende.append([p + g for p, g in zip(stand, gewinne)])
+
+    @spanne("wertung")
+    def aktualisieren(self, runden, ab=None):
+        """Gleicht die Wertung mit der Rundenliste ab.
+
+        Ohne ``ab`` wird die erste geänderte Runde per Vergleich gesucht; wer
+        weiß, welche Runde bearbeitet wurde, kann sie direkt angeben. Gibt den
+        Index der ersten neu berechneten Runde zurück.
+        """
+        start = min(len(runden), self.anzahl_runden)
+        if ab is not None:
+            start = min(start, ab)
+        else:
+            for idx in range(start):
+                if rundeneingabe(runden[idx], self.namen) != (self.einsaetze[idx], self.plaetze[idx]):
+                    start = idx
+                    break
+
+        self.kuerzen(start)
+        if len(runden) - start >= VEKTOR_AB_RUNDEN:
+            self._anhaengen_vektorisiert(runden[start:])
+        else:
+            for runde in runden[start:]:
+                self.runde_anhaengen(*rundeneingabe(runde, self.namen))
+        return start
+
+    def _anhaengen_vektorisiert(self, runden):
+        from vatertag import wertung_numpy
+
+        einsaetze, plaetze = wertung_numpy.matrizen(runden, self.namen)
+        gewinne, bonus, staende = wertung_numpy.berechnen(
+            einsaetze, plaetze, self.multiplikatoren, self.regel,
+            startstand=self.staende[-1], erste_runde=self.anzahl_runden,
+        )
+        for r, runde in enumerate(runden):
+            runden_einsaetze, runden_plaetze = rundeneingabe(runde, self.namen)
+            self.einsaetze.append(runden_einsaetze)
+            self.plaetze.append(runden_plaetze)
+            self.gewinne.append(gewinne[:, r].tolist())
+            self.bonus_empfaenger.append([self.namen[s] for s in bonus[:, r].nonzero()[0]])
+            self.staende.append(staende[:, r + 1].tolist())
+
+    def zwischenstand(self, runden_idx):
+        """Punkte je Spieler nach Runde ``runden_idx``."""
+        return dict(zip(self.namen, self.staende[runden_idx + 1]))
+
+    def spieler_eintraege(self):
+        """Spielerliste im gespeicherten Format (name, punkte, einsaetze, plaetze, gewinne)."""
+        return [
+            {
+                "name": name,
+                "punkte": self.staende[-1][s],
+                "einsaetze": [runde[s] for runde in self.einsaetze],
+                "plaetze": [runde[s] for runde in self.plaetze],
+                "gewinne": [runde[s] for runde in self.gewinne],
+            }
+            for s, name in enumerate(self.namen)
+        ]
+
+
+def wertung_fuer(cache, namen, multiplikatoren, regel=ALLE_LETZTEN, schluessel="wertung"):
+    """Holt die Wertung aus ``cache`` (z. B. st.session_state) oder legt sie neu an."""
+    wertung = cache.get(schluessel)
+    if wertung is None or not wertung.passt(namen, multiplikatoren, regel):
+        wertung = Wertung(namen, multiplikatoren, regel)
+        cache[schluessel] = wertung
+    return wertung
@@ -0,0 +1,62 @@
+"""Vektorisierte Wertung für große Spiele.
+
+Einsätze und Plätze liegen als Spieler × Runden-Matrizen (int) vor, die
+Auszahlung ist ein einziger Zugriff in die Multiplikator-Tabelle. Nur das
+Rubber-Banding hängt vom Zwischenstand ab und läuft deshalb als ein
+kumulativer Durchlauf über die Runden (je Runde eine Vektoroperation über alle
+Spieler). Ergebnisse sind identisch mit ``vatertag.wertung``.
+"""
+
+import numpy as np
+
+from vatertag.wertung import ALLE_LETZTEN, EIN_LETZTER, START_PUNKTE, rundeneingabe
+
+
+def matrizen(runden, namen):
+    """Einsätze und Plätze der Runden als Spieler × Runden-Matrizen."""
+    einsaetze = np.zeros((len(namen), len(runden)), dtype=np.int64)
+    plaetze = np.ones((len(namen), len(runden)), dtype=np.int64)
+    for r, runde in enumerate(runden):
+        einsaetze[:, r], plaetze[:, r] = rundeneingabe(runde, namen)
+    return einsaetze, plaetze
+
+
+def auszahlungsfaktoren(plaetze, multiplikatoren):
+    """Multiplikator je Spieler und Runde; Plätze ohne Multiplikator zählen 0."""
+    anzahl = len(multiplikatoren)
+    tabelle = np.append(np.asarray(multiplikatoren, dtype=float), 0.0)
+    idx = plaetze - 1
+    idx = np.where(idx < 0, idx + anzahl, idx)  # Platz 0 wie Listenindex -1
+    idx = np.where((idx < 0) | (idx >= anzahl), anzahl, idx)
+    return tabelle[idx]
+
+
+def berechnen(einsaetze, plaetze, multiplikatoren, regel=ALLE_LETZTEN, startstand=None, erste_runde=0):
+    """Gewinne, Bonus-Maske und Zwischenstände für alle Runden.
+
+    ``startstand`` ist der Punktestand vor der ersten übergebenen Runde,
+    ``erste_runde`` deren Index im Spiel (wichtig für "kein Bonus in Runde 1").
+    Rückgabe: ``gewinne`` und ``bonus`` (Spieler × Runden) sowie ``staende``
+    (Spieler × Runden+1, Spalte 0 ist der Startstand).
+    """
+    anzahl_spieler, anzahl_runden = einsaetze.shape
+    faktoren = auszahlungsfaktoren(plaetze, multiplikatoren)
+    gewinne = einsaetze * faktoren
+    verlust = faktoren < 0
+    bonus = np.zeros((anzahl_spieler, anzahl_runden), dtype=bool)
+
+    staende = np.empty((anzahl_spieler, anzahl_runden + 1))
+    staende[:, 0] = START_PUNKTE if startstand is None else startstand
+    if anzahl_spieler == 0:
+        return gewinne, bonus, staende
+
+    stand = staende[:, 0]
+    for r in range(anzahl_runden):
+        if regel == EIN_LETZTER:
+            bonus[np.argmin(stand), r] = True
+        elif erste_runde + r > 0:
+            bonus[:, r] = stand == stand.min()
+        gewinne[bonus[:, r] & verlust[:, r], r] = 0.0
+        stand = stand + gewinne[:, r]
+        staende[:, r + 1] = stand
+    return gewinne, bonus, staende